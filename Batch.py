@@ -0,0 +1,136 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Headless run (no Tk, no Qt) : dataset, charts and exports, e.g. from cron on a server
+# --         python Batch.py [--source DIR] [--output DIR] [--cache DIR] [--no-pdf] [--no-png] [--no-csv] [--workers N]
+# --                         [--parquet] [--feather] [--profile] [--memory-report]
+# -- Update :
+# --
+# ----------------------------------------------------
+
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+# ----- Standard
+import os
+import sys
+import argparse
+import multiprocessing
+import traceback
+from datetime import datetime
+# Non-interactive backend, set before pyplot is imported
+import matplotlib
+matplotlib.use('Agg')
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.Data_Fetching_Cleaning import create_dataset
+from functions.analysis import calculation_df, grouped_df_by_date, create_today_df, dense_frame
+from functions.vizualisations import get_all_plots
+from functions.positions import join_instruments, SparsePositions
+from functions.functions import create_output_folder, export_df_csv
+from functions.exporting import export_plots
+from functions.dataset_io import export_df_parquet, export_df_feather
+from functions.profiling import stage_timer, profile_run
+from functions.errors import DatasetError, EXIT_OK, EXIT_ERROR, EXIT_EXPORT_FAILED
+
+# ==============================================================================================================================
+# Functions
+# ==============================================================================================================================
+def parse_args(argv=None):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=f"{APP_NAME} - headless batch run")
+    parser.add_argument('--source', default=os.path.join(base_dir, SOURCE_FOLDER), help="Folder of the DEGIRO CSV exports")
+    parser.add_argument('--output', default=os.path.join(base_dir, OUTPUR_FOLDER), help="Folder of the exports (a dated subfolder is created)")
+    parser.add_argument('--cache', default=os.path.join(base_dir, CACHE_FOLDER), help="Folder of the persistent caches")
+    parser.add_argument('--no-pdf', action='store_true', help="Do not write the PDF report")
+    parser.add_argument('--no-png', action='store_true', help="Do not write the PNG charts")
+    parser.add_argument('--no-csv', action='store_true', help="Do not write the CSV dataset")
+    parser.add_argument('--parquet', action='store_true', default=EXPORT_PARQUET, help="Also write the dataset as Parquet, partitioned by year")
+    parser.add_argument('--feather', action='store_true', default=EXPORT_FEATHER, help="Also write the dataset as Feather")
+    parser.add_argument('--workers', type=int, default=EXPORT_MAX_WORKERS, help="Processes rendering the figures (1: no pool)")
+    parser.add_argument('--profile', action='store_true', default=PROFILE_RUN, help="Write a cProfile dump next to the exports")
+    parser.add_argument('--memory-report', action='store_true', default=MEMORY_REPORT, help="Print the memory of the daily dataset, compact schema vs former object layout")
+    return parser.parse_args(argv)
+
+def run(args):
+    """
+    Runs the whole pipeline without any GUI and writes the requested exports.
+
+    Args:
+        args (argparse.Namespace): The parsed command line (see parse_args).
+
+    Returns:
+        int: The exit code (functions.errors) : EXIT_OK, the code of the DatasetError, or EXIT_EXPORT_FAILED.
+    """
+    date_folder = os.path.join(args.output, datetime.now().strftime('%Y-%m-%d'))
+
+    try:
+        with stage_timer.stage('create_dataset'):
+            base_df, instruments_df = create_dataset(args.source, args.cache, MemoryReport=args.memory_report)
+    except DatasetError as e:
+        print(f"{e.title}: {e.message}", file=sys.stderr)
+        return e.exit_code
+
+    # Sparse storage (SPARSE_POSITIONS) : the dense daily rows are built only by the views needing them
+    sparse_positions = base_df if isinstance(base_df, SparsePositions) else None
+
+    with stage_timer.stage('calculation_df'):
+        cumulative_df = calculation_df(base_df)
+    with stage_timer.stage('grouped_df_by_date'):
+        grouped_df = grouped_df_by_date(cumulative_df, sparse_positions)
+    # Latest data, with the descriptive columns of its instruments
+    today_data = create_today_df(cumulative_df, instruments_df, sparse_positions)
+
+    with stage_timer.stage('get_all_plots'):
+        plots = get_all_plots(cumulative_df, today_data, grouped_df, instruments_df=instruments_df,
+                              sparse_positions=sparse_positions)
+
+    try:
+        create_output_folder(date_folder)
+        # Former wide layout, built once for the CSV and the columnar exports
+        if not args.no_csv or args.parquet or args.feather:
+            dataset = join_instruments(dense_frame(cumulative_df, sparse_positions), instruments_df)
+        if not args.no_csv:
+            with stage_timer.stage('export: CSV'):
+                export_df_csv(date_folder, dataset, popup=False)
+        if args.parquet:
+            with stage_timer.stage('export: Parquet'):
+                export_df_parquet(date_folder, dataset, popup=False)
+        if args.feather:
+            with stage_timer.stage('export: Feather'):
+                export_df_feather(date_folder, dataset, popup=False)
+        if not (args.no_png and args.no_pdf):
+            # PNG files and PDF pages rendered in one pass by the worker processes
+            with stage_timer.stage('export: PNG / PDF'):
+                export_plots(plots,
+                             pdf_filepath=None if args.no_pdf else os.path.join(date_folder, 'Degiro Analysis.pdf'),
+                             png_folder=None if args.no_png else date_folder,
+                             max_workers=args.workers,
+                             progress=lambda done, total, name: print(f"Export {done}/{total} : {name}"))
+    except OSError as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return EXIT_EXPORT_FAILED
+    return EXIT_OK
+
+def main(argv=None):
+    args = parse_args(argv)
+    date_folder = os.path.join(args.output, datetime.now().strftime('%Y-%m-%d'))
+    profile_path = os.path.join(date_folder, PROFILE_FILE) if args.profile else None
+    try:
+        with profile_run(profile_path):
+            exit_code = run(args)
+    except Exception:
+        traceback.print_exc()
+        exit_code = EXIT_ERROR
+    print(stage_timer.summary())
+    return exit_code
+
+# ==============================================================================================================================
+# Init
+# ==============================================================================================================================
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -96,6 +96,66 @@ EXCHANGES_SUFFIXES = {
     "FTSE": ".FT",    # FTSE 100 Index (UK)
 }
 SOURCE_FOLDER = 'source'
+# First bytes of an export read to detect its delimiter, and the part of them used to detect its encoding
+SNIFF_SAMPLE_SIZE = 100000
+ENCODING_SAMPLE_SIZE = 10000
+# Below this chardet confidence, an export which is not UTF-8 is read as Latin-1
+ENCODING_MIN_CONFIDENCE = 0.5
 OUTPUR_FOLDER = 'output'
+# Persistent cache (prices, ...) kept across runs
+CACHE_FOLDER = 'cache'
+PRICE_CACHE_DB = 'prices.db'
+FIGI_CACHE_DB = 'openfigi.db'
+METADATA_CACHE_DB = 'metadata.db'
+# Snapshots (Parquet) of the parsed exports, in a subfolder of the cache folder ; unchanged files are not parsed again
+TRANSACTION_SNAPSHOTS = True
+SNAPSHOT_FOLDER = 'transactions'
+SNAPSHOT_INDEX_DB = 'snapshots.db'
+# Columnar exports of the dataset : Parquet folder (partitioned by year), Feather file, their compression, and
+# whether the batch mode writes them
+DATASET_PARQUET_FOLDER = 'dataset'
+DATASET_FEATHER_FILE = 'dataset.feather'
+DATASET_COMPRESSION = 'zstd'
+EXPORT_PARQUET = False
+EXPORT_FEATHER = False
+# Rows fetched at once when the price DB is exported to CSV
+DB_EXPORT_BATCH_SIZE = 10000
+# Asset type, sector and country are fetched again after this many days
+METADATA_TTL_DAYS = 30
+# OpenFIGI mapping API (documented limits : jobs per request, (requests, seconds))
+OPENFIGI_URL = 'https://api.openfigi.com/v3/mapping'
+OPENFIGI_TIMEOUT = 30
+OPENFIGI_MAX_RETRIES = 3
+OPENFIGI_MAX_JOBS = 10
+OPENFIGI_RATE_LIMIT = (25, 60)
+OPENFIGI_MAX_JOBS_WITH_KEY = 100
+OPENFIGI_RATE_LIMIT_WITH_KEY = (25, 6)
+# OpenFIGI API key (larger batches, higher rate limit) ; the OPENFIGI_API_KEY environment variable takes precedence
+OPENFIGI_API_KEY = None
+# Concurrent fetch stage (Yahoo Finance) : pool size, timeout (s), retries, first backoff delay (s), (requests, seconds)
+FETCH_MAX_WORKERS = 8
+FETCH_TIMEOUT = 30
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 1.0
+YAHOO_RATE_LIMIT = (10, 1)
+# Download the closes of all the tickers in one multi-symbol request (per-ticker requests otherwise)
+BULK_DOWNLOAD = True
+# Parallel export of the figures : worker processes, instruments per task
+EXPORT_MAX_WORKERS = 4
+EXPORT_CHUNK_SIZE = 10
+# Profile the whole run with cProfile ; the dump is written next to the exports
+PROFILE_RUN = False
+PROFILE_FILE = 'profile.pstats'
+# Print the memory of the daily dataset, compact schema vs former object layout
+MEMORY_REPORT = False
+# Store the daily positions over their holding intervals only (runs of unchanged days) ; the dense daily rows are
+# then built only for the charts and exports needing them
+SPARSE_POSITIONS = False
+# Save the portfolio state after each run (cache folder) ; the next run only values the days after it, unless the
+# transactions or the stored closes up to it changed (full rebuild)
+INCREMENTAL_RUN = True
+CHECKPOINT_DB = 'checkpoint.db'
+# Days before today not checkpointed, the latest closes being still revised by Yahoo Finance
+CHECKPOINT_MARGIN_DAYS = 3
 
 print("config.py loaded successfully")
\ No newline at end of file
@@ -20,7 +20,7 @@ Start Install/Updates needed Python Packages
 ============================================''')
 
 # List of packages to install
-packages = ["pandas", "matplotlib", "seaborn","yfinance","numpy","openfigi","PyQt5","requests","chardet"]
+packages = ["pandas", "matplotlib", "seaborn","yfinance","numpy","openfigi","PyQt5","requests","chardet","pyarrow"]
 
 # Installing each package
 for package in packages:
@@ -0,0 +1,102 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Benchmark of the red/green value lines : one plot call per pair of days (former code) vs one
+# --         LineCollection (plot_colored_segments), on the three portfolio charts, with a pixel comparison
+# --         python Docs/benchmarks/colored_segments.py [--years 5] [--output DIR]
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+# ----- Standard
+import os
+import sys
+import io
+import time
+import argparse
+from unittest import mock
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# The modules import each other from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# ----- From Files
+from functions import vizualisations
+
+CHARTS = ['plot_total_by_date', 'plot_total_pct_by_date', 'plot_total_var_by_date']
+
+# ==============================================================================================================================
+# Functions
+# ==============================================================================================================================
+def portfolio_series(years):
+    """
+    A synthetic daily portfolio : invested value growing, market value oscillating around it.
+    """
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=years * 365 + 1, freq='D')
+    rng = np.random.default_rng(0)
+    buying_value = np.linspace(1000, 20000, len(dates))
+    actual_value = buying_value * (1 + 0.1 * np.sin(np.arange(len(dates)) / 40) + 0.02 * rng.standard_normal(len(dates)))
+    df = pd.DataFrame({'Date': dates, 'Buying_value': buying_value, 'Actual_value': actual_value})
+    df['Value_diff'] = df['Actual_value'] - df['Buying_value']
+    df['Variation_%'] = df['Value_diff'] / df['Buying_value'] * 100
+    return df
+
+def measure(chart, df):
+    """
+    Builds one chart, then renders it on screen buffer, as PDF and as PNG.
+
+    Returns:
+        tuple: Build, draw and PDF times (s), the number of artists of the axes and the PNG pixels (without legend).
+    """
+    start = time.perf_counter()
+    fig = getattr(vizualisations, chart)(df.copy())
+    built = time.perf_counter()
+    fig.canvas.draw()
+    drawn = time.perf_counter()
+    fig.savefig(io.BytesIO(), format='pdf')
+    saved = time.perf_counter()
+    # Pixels compared without the legend : its 'best' location does not see the value line drawn as one collection
+    for ax in fig.axes:
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+    png = io.BytesIO()
+    fig.savefig(png, format='png')
+    artists = len(fig.axes[0].get_children())
+    plt.close(fig)
+    return built - start, drawn - built, saved - drawn, artists, plt.imread(io.BytesIO(png.getvalue()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-pair plot calls vs one LineCollection")
+    parser.add_argument('--years', type=int, default=5, help="Length of the daily series, in years")
+    parser.add_argument('--output', help="Folder where both renderings of each chart are written, stacked")
+    args = parser.parse_args(argv)
+
+    df = portfolio_series(args.years)
+    print(f"{len(df)} daily points, backend {matplotlib.get_backend()}")
+    print(f"{'Chart':<24}{'build (s)':>18}{'draw (s)':>18}{'PDF (s)':>18}{'artists':>17}{'pixels differing':>17}")
+    identical = True
+    for chart in CHARTS:
+        with mock.patch.object(vizualisations, 'plot_colored_segments', vizualisations.plot_segments_per_pair):
+            *before, before_png = measure(chart, df)
+        *after, after_png = measure(chart, df)
+        differing = (np.abs(before_png - after_png).max(axis=2) > 0).mean() if before_png.shape == after_png.shape else 1.0
+        identical &= differing == 0
+        timings = ''.join(f"{old:>8.3f} -> {new:<6.3f}" for old, new in zip(before[:3], after[:3]))
+        print(f"{chart:<24}{timings}{before[3]:>8} -> {after[3]:<5}{differing:>17.4%}")
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+            plt.imsave(os.path.join(args.output, f'{chart}.png'), np.concatenate([before_png, after_png], axis=0))
+    print("Renderings identical" if identical else "Renderings differ")
+    return 0 if identical else 1
+
+# ==============================================================================================================================
+# Init
+# ==============================================================================================================================
+if __name__ == '__main__':
+    sys.exit(main())
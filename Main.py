@@ -24,10 +24,13 @@ from datetime import datetime
 import sys
 import queue
 import threading
+import multiprocessing
 
 
 # ----- From Files
 from functions.callAllFunctions import *
+from functions.profiling import stage_timer, profile_run
+from functions.errors import DatasetError
 
 # ==============================================================================================================================
 # Functions
@@ -51,6 +54,7 @@ current_date = datetime.now().strftime('%Y-%m-%d')
 exe_dir = get_exe_dir(__file__)
 source_folder = os.path.join(exe_dir, SOURCE_FOLDER)
 output_folder = os.path.join(exe_dir, OUTPUR_FOLDER)
+cache_folder = os.path.join(exe_dir, CACHE_FOLDER)
 date_folder = os.path.join(output_folder, current_date)
 pdf_filepath = os.path.join(date_folder, 'Degiro Analysis.pdf')
 
@@ -58,30 +62,60 @@ pdf_filepath = os.path.join(date_folder, 'Degiro Analysis.pdf')
 # Init 
 # ==============================================================================================================================
 
-# Start the Tkinter popup in a separate thread
-command_queue = queue.Queue()
-popup_thread = threading.Thread(target=run_popup, args=(command_queue,))
-popup_thread.start()
-
-# Create Dataset 
-base_df = create_dataset(source_folder)
-
-cumulative_df = calculation_df(base_df)
-# get dataset grouped by date
-grouped_df = grouped_df_by_date(cumulative_df)
-
-#get today dataset
-today = cumulative_df['Date'].max()
-# Filter for the latest data
-today_data = cumulative_df[cumulative_df['Date'] == today].copy()
-
-plots = get_all_plots(cumulative_df,today_data,grouped_df)
-
-# After the loop, close the popup
-command_queue.put('close')
-# Wait for the popup thread to finish
-popup_thread.join()
-
-createUI(plots,pdf_filepath,date_folder,cumulative_df)
-exit()
-
+# The export worker processes import this file : the run only starts in the main process
+if __name__ == '__main__':
+    # Needed by the worker processes of the frozen executable
+    multiprocessing.freeze_support()
+
+    # Optional cProfile dump of the whole run
+    profile_path = os.path.join(date_folder, PROFILE_FILE) if PROFILE_RUN else None
+
+    with profile_run(profile_path):
+        try:
+            # Start the Tkinter popup in a separate thread
+            command_queue = queue.Queue()
+            popup_thread = threading.Thread(target=run_popup, args=(command_queue,))
+            popup_thread.start()
+
+            # Create Dataset 
+            try:
+                with stage_timer.stage('create_dataset'):
+                    base_df, instruments_df, metadata_enrichment = create_dataset(source_folder, cache_folder, BackgroundMetadata=True)
+            except DatasetError as e:
+                command_queue.put('close')
+                show_popup(e.title, e.message)
+                sys.exit()
+
+            # Sparse storage (SPARSE_POSITIONS) : the dense daily rows are built only by the views needing them
+            sparse_positions = base_df if isinstance(base_df, SparsePositions) else None
+
+            with stage_timer.stage('calculation_df'):
+                cumulative_df = calculation_df(base_df)
+            # get dataset grouped by date
+            with stage_timer.stage('grouped_df_by_date'):
+                grouped_df = grouped_df_by_date(cumulative_df, sparse_positions)
+
+            #get today dataset, with the descriptive columns of its instruments
+            today_data = create_today_df(cumulative_df, instruments_df, sparse_positions)
+
+            with stage_timer.stage('get_all_plots'):
+                plots = get_all_plots(cumulative_df,today_data,grouped_df, instruments_df=instruments_df,
+                                      sparse_positions=sparse_positions)
+
+            # Asset type, sector and country fetched in the background : the charts don't wait for them. Once known,
+            # the figures of the latest data (KPI, pivot table, pies) are built again on their next request
+            def apply_metadata(enrichment):
+                enrichment.apply(instruments_df)
+                plots.set_data(today_data=create_today_df(cumulative_df, instruments_df, sparse_positions))
+            metadata_enrichment.add_done_callback(apply_metadata)
+
+            # After the loop, close the popup
+            command_queue.put('close')
+            # Wait for the popup thread to finish
+            popup_thread.join()
+
+            createUI(plots,pdf_filepath,date_folder,cumulative_df,cache_folder,instruments_df,sparse_positions)
+        finally:
+            # Wall time and calls of each stage, also when the window is closed (sys.exit)
+            print(stage_timer.summary())
+    exit()
@@ -13,36 +13,63 @@ import yfinance as yf #https://github.com/ranaroussi/yfinance
 import pandas as pd
 import requests
 import glob
-import tkinter as tk
-from tkinter import messagebox
 import csv
 import sys
 import sqlite3  # Use SQLite or replace with SQLAlchemy for other databases
 import socket
 import os
+import io
+import codecs
+import gzip
+from contextlib import closing
 import chardet
 import json
+import time
+import numpy as np
 
 # Const
 from Config.config import *
-
-
-
-def detect_file_encoding(file_path, sample_size=10000):
+# ----- From Files
+from functions.positions import create_positions_df, legacy_layout, SparsePositions
+from functions.source_cache import TransactionSnapshots
+from functions.ticker_store import TickerStore
+from functions.price_repository import price_repository
+from functions.checkpoint import CheckpointStore, PortfolioCheckpoint, split_fifo_costs, resume_positions_df
+from functions.prices import AsOfPriceIndex, asof_lookup_frame, normalize_history
+from functions.price_cache import PriceStore
+from functions.openfigi import OpenFigiMapper
+from functions.fetching import FetchStats, RateLimiter, with_retry, yahoo_history, yahoo_bulk_history, yahoo_metadata, fetch_instruments, UNKNOWN_METADATA
+from functions.metadata import MetadataCache, MetadataEnrichment
+from functions.profiling import stage_timer, memory_report
+from functions.errors import SourceFolderEmpty, NoInternet, InvalidExport
+from functions.functions import notify
+
+
+
+def detect_file_encoding(sample, sample_size=ENCODING_SAMPLE_SIZE):
     """
-    Detect the text encoding of a file using chardet.
+    Detect the text encoding of a file : UTF-8 when the sample decodes as UTF-8, else the guess of chardet,
+    else Latin-1 when chardet is not confident (short exports of a few accented names are often taken for
+    Cyrillic code pages).
 
     Parameters:
-        file_path (str): Path to the file to check.
-        sample_size (int): Number of bytes to read for detection (default: 10,000).
+        sample (bytes): The first bytes of the file (see read_degiro_export).
+        sample_size (int): Number of bytes used for detection (default: ENCODING_SAMPLE_SIZE).
 
     Returns:
         str: Detected encoding (e.g., 'utf-8', 'ISO-8859-1').
     """
-    with open(file_path, 'rb') as f:
-        raw_data = f.read(sample_size)
-        result = chardet.detect(raw_data)
-        return result['encoding']
+    sample = sample[:sample_size]
+    try:
+        # Not final : the sample may end inside a character
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    result = chardet.detect(sample)
+    if result['encoding'] is None or result['confidence'] < ENCODING_MIN_CONFIDENCE:
+        return 'latin-1'
+    return result['encoding']
 
   
 def show_popup(title,message) :
@@ -59,6 +86,9 @@ def show_popup(title,message) :
     Returns:
         None
     """
+    # Imported here : the batch mode runs without tkinter
+    import tkinter as tk
+    from tkinter import messagebox
     # Create the root window (it won't appear)
     root = tk.Tk()
     root.withdraw()  # Hide the root window
@@ -121,12 +151,13 @@ def is_internet_up():
         # If unable to connect, return False
         return False
     
-def detect_delimiter(file_path):
+def detect_delimiter(sample, encoding=None):
     """
     Detects the delimiter used in a CSV file by inspecting a sample of its contents.
 
     Args:
-        file_path (str): The path to the CSV file whose delimiter is to be detected.
+        sample (bytes): The first bytes of the CSV file (see read_degiro_export).
+        encoding (str, optional): The encoding of the file (see detect_file_encoding) ; UTF-8 by default.
 
     Returns:
         str: The delimiter character used in the CSV file (e.g., ',', ';', '\t').
@@ -135,18 +166,42 @@ def detect_delimiter(file_path):
         csv.Error: If the delimiter cannot be determined from the file's sample.
 
     Notes:
-        - This function reads a sample of the first 10,000 characters from the file to guess the delimiter.
+        - The sample is decoded with the encoding of the file ; a character cut at its end is ignored.
         - It uses the `csv.Sniffer` class from the Python `csv` module to detect the delimiter.
         - The function may raise a `csv.Error` if the sample is insufficient or the file format is irregular.
 
     Example:
-        >>> detect_delimiter('data.csv')
+        >>> detect_delimiter(b'Date,Heure,Produit\n', 'utf-8')
         ','  # Returns the delimiter used in the CSV file (e.g., comma, tab, etc.)
     """
-    with open(file_path, 'r', newline='') as file:
-        sample = file.read(100000)  # Read a sample of the file
-        dialect = csv.Sniffer().sniff(sample)  # Sniff the dialect
-        return dialect.delimiter
+    dialect = csv.Sniffer().sniff(sample.decode(encoding or 'utf-8', errors='ignore'))  # Sniff the dialect
+    return dialect.delimiter
+
+class SampledFile(io.RawIOBase):
+    """
+    Binary stream of a file whose first bytes were already read : the sample is returned first, then the rest of
+    the file, read from the same handle. The parser gets the whole file while the disk is read once.
+
+    Example:
+        >>> with open('source/Transactions.csv', 'rb') as f:
+        ...     sample = f.read(SNIFF_SAMPLE_SIZE)
+        ...     df = pd.read_csv(io.BufferedReader(SampledFile(sample, f)), delimiter=';')
+    """
+
+    def __init__(self, sample, handle):
+        self.sample = memoryview(sample)
+        self.handle = handle
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.sample.nbytes:
+            size = min(len(buffer), self.sample.nbytes)
+            buffer[:size] = self.sample[:size]
+            self.sample = self.sample[size:]
+            return size
+        return self.handle.readinto(buffer)
 
 def IsDEGIROexport(df2):
     """
@@ -197,294 +252,149 @@ def IsDEGIROexport(df2):
     else:
         return False
 
-def get_ticker_from_isin(isin, api_key=None):
-    """
-    Given an ISIN and an OpenFIGI API key, fetches the corresponding ticker symbol.
-
-    Parameters:
-    - isin (str): The ISIN of the security.
-    - api_key (str): The OpenFIGI API key.
-
-    Example of JSON response
-    [
-        {
-            "data": [
-                {
-                    "figi": "BBG01L3DLZ45",
-                    "name": "ORPEA SA- RTS",
-                    "ticker": "ORPD1EUR",
-                    "exchCode": "EP",
-                    "compositeFIGI": "BBG01L3DLZ36",
-                    "securityType": "Right",
-                    "marketSector": "Equity",
-                    "shareClassFIGI": "BBG01L34ZZ40",
-                    "securityType2": "Right",
-                    "securityDescription": "ORPD1EUR"
-                },
-                {
-                    "figi": "BBG01L3DLZ63",
-                    "name": "ORPEA SA- RTS",
-                    "ticker": "ORPD1EUR",
-                    "exchCode": "EZ",
-                    "compositeFIGI": "BBG01L3DLZ54",
-                    "securityType": "Right",
-                    "marketSector": "Equity",
-                    "shareClassFIGI": "BBG01L34ZZ40",
-                    "securityType2": "Right",
-                    "securityDescription": "ORPD1EUR"
-                }
-            ]
-        }
-    ]
-    Returns:
-    - str: The corresponding ticker symbol, or an error message if not found.
+def read_degiro_export(file):
     """
-    url = "https://api.openfigi.com/v3/mapping"
-
-    # Prepare the headers with API key for authentication
-    headers = {"Content-Type": "application/json"}
-    if api_key:
-        headers |= {"X-OPENFIGI-APIKEY": api_key}
-        
-    # Prepare the payload for the request
-    payload = [{
-        "idType": "ID_ISIN",
-        "idValue": isin
-    }]
-
-    # Make the request to OpenFIGI API
-    response = requests.post(url, headers=headers, json=payload)
-
-    # Check if the response was successful
-    if response.status_code == 200:
-        data = response.json()
-        # print(json.dumps(data, indent=4))
-        if data and 'warning' not in data[0] and 'error' not in data[0]:
-            # Extract the ticker symbols from the response (if available)
-            tickers = [item.get("data", [{}])[0].get("ticker", None) for item in data if item.get("data")] [0]
-            
-            # If there are multiple tickers, return all of them
-            if tickers:
-                return tickers
-            else:
-                return "No tickers found for the given ISIN."
-        else:
-            return "No mapping found."
-    else:
-        return f"Error: {response.status_code} - {response.text}"
-
-# Function to calculate FIFO unit cost, fees included
-def get_fifo_unit_cost(row):
-    global purchase_history
+    Reads one DEGIRO export in one pass : encoding and delimiter detection, parsing, format check and date / time
+    conversion.
 
-    dt = row['DateTime']
-    isin = row.iloc[3]        # Code ISIN
-    quantity = row.iloc[6]    # Quantité
-    price = row.iloc[7]       # Cours
-    fees = row.iloc[14]          # fees
-    
-    # Check if fees is NaN and set to 0 if so
-    if pd.isna(fees):  # or math.isnan(fees) if you're working with floats directly
-        fees = 0
-    full_price = price + (-fees) # with fees
-
-    if isin not in purchase_history:
-        purchase_history[isin] = []
-
-    if quantity > 0:
-        # This is a BUY → store in FIFO queue
-        purchase_history[isin].append([quantity, full_price])
-        print(f'achat le {dt}, qté {quantity}, prix {price}')
-        return 0.0  # No cost for buys
-    else:
-        print (f'sell found {isin}')
-        # This is a SELL → calculate FIFO cost
-        sell_qty = -quantity
-        total_cost = 0.0
-        total_units = 0
-
-        # Loop to consume units from the FIFO purchase history until all units are sold
-        while sell_qty > 0 and purchase_history[isin]:
-            # Access the first purchase batch (FIFO principle)
-            batch_qty, batch_price = purchase_history[isin][0]
-            print(f"Batch Quantity: {batch_qty}, Batch Price: {batch_price}")  # Debugging line
-            # If the entire batch can be used for the sale
-            if batch_qty <= sell_qty:
-                total_cost += batch_qty * batch_price  # Add batch cost to total cost
-                total_units += batch_qty  # Add batch quantity to total units sold
-                sell_qty -= batch_qty  # Decrease the remaining quantity to sell
-                purchase_history[isin].pop(0)  # Remove this batch from purchase history (since it's fully used)
-            else:
-                # If only part of the batch is needed for the sale
-                total_cost += sell_qty * batch_price  # Add the partial batch cost
-                total_units += sell_qty  # Add the sold units to total
-                purchase_history[isin][0][0] = batch_qty - sell_qty  # Update the batch with remaining quantity
-                sell_qty = 0  # All units to be sold have been processed
-
-        # Return the cost per unit of the sold items, if any were sold
-        # If no units were sold (i.e., total_units == 0), return 0.0
-        print(f"Total Cost: {total_cost}, Total Units: {total_units}")
-        output = total_cost / total_units if total_units else 0.0
-        print (f'fifo value {output}')
-        return output
+    Args:
+        file (str): The path of the CSV export.
 
+    Returns:
+        pandas.DataFrame: The transactions of the file, with its own column titles ; the date (index 0) is a datetime
+        and the time (index 1) a timedelta.
 
+    Raises:
+        InvalidExport: If the file does not conform to Degiro's export format.
 
-def export_sqlite_to_csv(db_name, table_name, output_csv):
+    Example:
+        >>> df = read_degiro_export('source/Transactions.csv')
     """
-    Extract data from a SQLite3 database and export it to a CSV file.
+    # One read of the file : encoding and delimiter from its first bytes, then the parser streams the rest
+    with open(file, 'rb') as f:
+        with stage_timer.stage('dataset: sniff CSV'):
+            sample = f.read(SNIFF_SAMPLE_SIZE)
+            encoding = detect_file_encoding(sample)
+            delim = detect_delimiter(sample, encoding)
+        with stage_timer.stage('dataset: read CSV'):
+            df = pd.read_csv(io.BufferedReader(SampledFile(sample, f)), delimiter=delim, encoding=encoding )  # Use detected delimiter
+    # Check if Df is based on Degiro standards
+    if not IsDEGIROexport(df) :
+        raise InvalidExport("Export Not Ok", f"File {file} is not a supported DEGIRO export format. Please format it proprely. End of process.")
 
-    Parameters:
-    db_name (str): The name of the SQLite database file.
-    table_name (str): The name of the table to export.
-    output_csv (str): The name of the output CSV file.
+    # Convert 'Date' column to datetime format ; Index: 0, Column Title: Date
+    df[df.columns[1]] = pd.to_timedelta(df.iloc[:, 1] + ':00') #if it only has HH:MM
+    df[df.columns[0]] = pd.to_datetime(df.iloc[:, 0], format='%d-%m-%Y')
+    return df
 
+def drop_duplicate_transactions(df, file_ids):
     """
-    # Connect to the SQLite database
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-
-    # Execute a query to fetch all data from the table
-    cursor.execute(f"SELECT * FROM {table_name}")
-
-    # Fetch all rows from the result of the query
-    rows = cursor.fetchall()
-
-    # Open a CSV file for writing
-    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
+    Drops the transactions present in several exports (overlapping files, e.g. a yearly export and a year-to-date one),
+    in one vectorized pass over a hash of their key.
 
-        # Write the column headers (optional)
-        column_names = [description[0] for description in cursor.description]  # Get column names
-        csv_writer.writerow(column_names)
-
-        # Write the data rows
-        csv_writer.writerows(rows)
-
-    # Close the cursor and the connection
-    cursor.close()
-    conn.close()
-
-    #show_popup('DB (CSV) Saved', f'DB saved as CSV to {output_csv}')
-
-def create_table_if_not_exists(tickers_data_df, db_name):
-    """
-    Creates a table in the specified SQLite database if it doesn't already exist, 
-    based on the structure of the provided DataFrame.
+    The key of a transaction is its order ID (ID Ordre) with its date, time, ISIN, quantity and price : the partial
+    executions of one order share the order ID. An empty order ID leaves the other columns as the key.
+    Identical executions within one export are real trades : a key found n times in one file and m times in another
+    is kept max(n, m) times.
 
     Args:
-        tickers_data_df (pandas.DataFrame): The DataFrame containing the data. Its column names and data types are used to 
-                                             dynamically define the table structure.
-        db_name (str): The name of the SQLite database in which the table will be created.
+        df (pandas.DataFrame): The transactions of all the exports, concatenated.
+        file_ids (array-like): The export of each row (e.g. its position in the list of files).
 
     Returns:
-        None: The function does not return any value. It modifies the database by creating the table if needed.
-
-    Notes:
-        - The table is named `tickers_data` and consists of columns derived from the DataFrame's column names.
-        - The function assumes that the `Date` and `Ticker` columns are always present and are used as the composite primary key.
-        - Columns of type `float64` are stored as `FLOAT`, columns of type `int64` as `INTEGER`, and other columns are stored as `TEXT`.
-        - If the table already exists, the function does nothing.
+        tuple: (pandas.DataFrame, int)
+            - The transactions without the duplicates, index reset.
+            - The number of rows dropped.
 
     Example:
-        >>> create_table_if_not_exists(df, 'stocks.db')
-        # Creates a table named 'tickers_data' in the 'stocks.db' database based on the columns in df.
+        >>> df, dropped = drop_duplicate_transactions(pd.concat([yearly, year_to_date]), [0] * len(yearly) + [1] * len(year_to_date))
     """
-    
-    # Get the columns of the DataFrame
-    columns = tickers_data_df.columns
-
-    # Connect to the SQLite database
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
+    '''
+    Index: 0, Column Title: Date
+    Index: 1, Column Title: Heure
+    Index: 3, Column Title: Code ISIN
+    Index: 6, Column Title: Quantité
+    Index: 7, Column Title: Cours
+    Index: 18, Column Title: ID Ordre
+    '''
+    keys = pd.util.hash_pandas_object(df.iloc[:, [18, 0, 1, 3, 6, 7]], index=False).to_numpy()
+    # Rank of each row among the identical ones of its export : the n-th of a file matches the n-th of another
+    occurrence = pd.Series(keys).groupby([np.asarray(file_ids), keys]).cumcount().to_numpy()
+    duplicated = pd.DataFrame({'key': keys, 'occurrence': occurrence}).duplicated().to_numpy()
+    return df[~duplicated].reset_index(drop=True), int(duplicated.sum())
+
+def export_sqlite_to_csv(db_name, table_name, output_csv, start=None, end=None, tickers=None, compress=None,
+                         batch_size=DB_EXPORT_BATCH_SIZE):
+    """
+    Extract data from a SQLite3 database and export it to a CSV file.
 
-    # Prepare the SQL for table creation dynamically
-    sql = 'CREATE TABLE IF NOT EXISTS tickers_data ('
-    sql += 'Date DATE, '
-    sql += 'Ticker TEXT, '
-    
-    # Adding columns dynamically based on DataFrame's column names (excluding 'Date' and 'Ticker')
-    for col in columns:
-        if col not in ['Date', 'Ticker']:  # Exclude 'Date' and 'Ticker' columns
-            if tickers_data_df[col].dtype == 'float64':
-                column_type = 'FLOAT'
-            elif tickers_data_df[col].dtype == 'int64':
-                column_type = 'INTEGER'
-            else:
-                column_type = 'TEXT'  # Default to TEXT for other data types
-            sql += f'{col} {column_type}, '
+    The rows are streamed : the cursor is read by batches of `batch_size` rows, each batch written before the next
+    one is fetched, so the memory stays bounded whatever the size of the table.
 
-    # Remove the trailing comma and space, and add the PRIMARY KEY for the 'Date' and 'Ticker' combination
-    sql = sql.rstrip(', ') + ', PRIMARY KEY (Date, Ticker))'
-    
-    # Execute the SQL to create the table
-    cursor.execute(sql)
-    conn.commit()
-    conn.close()
+    Parameters:
+    db_name (str): The name of the SQLite database file.
+    table_name (str): The name of the table to export.
+    output_csv (str): The name of the output CSV file.
+    start, end (str or datetime, optional): Only the rows with start <= Date < end.
+    tickers (list, optional): Only the rows of these tickers.
+    compress (bool, optional): Write the CSV gzip-compressed ; by default when output_csv ends with '.gz'.
+    batch_size (int): Rows fetched at once (default: DB_EXPORT_BATCH_SIZE).
 
-# Function to alter the table if new columns are present
-def get_columns_from_db(conn, table_name):
-    """
-    Get the column names from the existing table in the database.
-    """
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [column[1] for column in cursor.fetchall()]  # Fetch column names
-    return columns
+    Returns:
+    int: The number of rows written.
 
-def alter_table_for_new_columns(conn, df_columns, table_name):
-    """
-    Alter the table to add columns that are missing in the database.
+    Example:
+        >>> export_sqlite_to_csv('tickers_data.db', 'tickers_data', 'dboutput.csv.gz', start='2024-01-01', tickers=['ASML.AS'])
     """
-    existing_columns = get_columns_from_db(conn, table_name)
+    # Filters as parameters ; the tickers as one JSON array, whatever their number
+    conditions, params = [], []
+    if start is not None:
+        conditions.append('Date >= ?')
+        params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+    if end is not None:
+        conditions.append('Date < ?')
+        params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+    if tickers is not None:
+        conditions.append('Ticker IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(list(tickers)))
+    table = table_name.replace('"', '""')
+    query = f'SELECT * FROM "{table}"' + (f' WHERE {" AND ".join(conditions)}' if conditions else '')
+
+    if compress is None:
+        compress = output_csv.endswith('.gz')
+    rows_written = 0
+    with closing(sqlite3.connect(db_name)) as conn:
+        cursor = conn.execute(query, params)
+        cursor.arraysize = batch_size
+        # Open a CSV file for writing
+        with (gzip.open(output_csv, 'wt', newline='', encoding='utf-8') if compress
+              else open(output_csv, 'w', newline='', encoding='utf-8')) as csvfile:
+            csv_writer = csv.writer(csvfile)
+
+            # Write the column headers (optional)
+            column_names = [description[0] for description in cursor.description]  # Get column names
+            csv_writer.writerow(column_names)
+
+            # Write the data rows, one batch at a time
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                csv_writer.writerows(rows)
+                rows_written += len(rows)
 
-    # Determine which columns are not present in the existing table
-    missing_columns = [col for col in df_columns if col not in existing_columns]
-    
-    for column in missing_columns:
-        # Dynamically add the missing columns (we assume all are TEXT for simplicity)
-        alter_sql = f"ALTER TABLE {table_name} ADD COLUMN `{column}` TEXT"
-        cursor = conn.cursor()
-        cursor.execute(alter_sql)
-        print(f"Added new column: {column}")
-    
-    conn.commit()
+    #show_popup('DB (CSV) Saved', f'DB saved as CSV to {output_csv}')
+    return rows_written
 
 def store_new_tickers_data(tickers_data, yahoo_ticker, db_path="tickers_data.db"):
     """
-    Store the new ticker data in the database with dynamic columns handling.
+    Store the new ticker data in the database (see TickerStore), in one transaction.
     """
-    conn = sqlite3.connect(db_path)
-    
-    # Get the DataFrame and columns from Yahoo Finance data
-    tickers_data_df = tickers_data.copy()
-    
-    # Add 'Ticker' column dynamically if it doesn't exist in the DataFrame
-    tickers_data_df['Ticker'] = yahoo_ticker
-
-    # Create the table if it doesn't exist
-    create_table_if_not_exists(tickers_data_df,db_path)
-    
-    # Dynamically adjust the table to match the DataFrame columns
-    alter_table_for_new_columns(conn, tickers_data_df.columns, 'tickers_data')
-    
-    # Create the dynamic SQL insert query
-    placeholders = ", ".join(["?"] * len(tickers_data_df.columns))
-    
-    # Escape column names by wrapping them in backticks
-    columns = ", ".join([f"`{col}`" for col in tickers_data_df.columns])
-    
-    insert_query = f"INSERT OR IGNORE INTO tickers_data ({columns}) VALUES ({placeholders})"
-    
-    # Insert data into the table
-    for _, row in tickers_data_df.iterrows():
-        conn.execute(insert_query, tuple(row))
-    
-    conn.commit()
+    with TickerStore(db_path) as store:
+        store.write(yahoo_ticker, tickers_data)
     print(f"Data for {yahoo_ticker} stored successfully!")
-    conn.close()
 
-def create_dataset(SourceFolder):
+def create_dataset(SourceFolder, CacheFolder=None, BackgroundMetadata=False, MemoryReport=MEMORY_REPORT):
     """
     This function processes a folder containing CSV files of Degiro exports, detects the delimiter, reads the data into 
     a pandas DataFrame, and calculates cumulative quantities and values for each product (identified by ISIN) 
@@ -501,21 +411,36 @@ def create_dataset(SourceFolder):
 
     Args:
         SourceFolder (str): The path to the folder containing the CSV files for Degiro exports.
+        CacheFolder (str, optional): The folder of the persistent price store, kept across runs. Only the dates not
+            stored yet are fetched from Yahoo Finance. Defaults to the 'cache' folder next to SourceFolder.
+        BackgroundMetadata (bool, optional): If True, the asset type, sector and country missing from the metadata cache
+            are fetched in the background : the instrument table is returned with 'Unknown' for them, together with the
+            running MetadataEnrichment, whose `apply(instruments_df)` fills the columns once it is done (see
+            MetadataEnrichment.add_done_callback). If False (default), the function waits.
+        MemoryReport (bool, optional): Print the memory of the daily dataset, compact schema vs former object layout
+            (see functions.profiling.memory_report). Defaults to MEMORY_REPORT.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the cumulative quantities and values for each product across the date range.
-        The columns include:
+        tuple: (cumulative_df, instruments_df), plus the MetadataEnrichment when BackgroundMetadata is True.
+        - cumulative_df (pd.DataFrame): The daily fact table, one row per product and per date of the date range
+          (a SparsePositions, holding intervals only, when SPARSE_POSITIONS is set):
             - 'Date': The date of the data.
-            - 'Products': The name of the product (from the Degiro export).
-            - 'ISIN': The ISIN code of the product.
-            - 'Place': The exchange where the product is traded.
-            - 'Exec Place': The execution place (trading venue).
+            - 'ISIN': The ISIN code of the product (categorical, key of instruments_df).
             - 'Qty': The cumulative quantity of the product as of that date.
             - 'Buying_value': The cumulative value of the product based on quantity.
             - 'Actual_value': The cumulative value of the product based on the stock's closing price on that date.
+        - instruments_df (pd.DataFrame): One row per ISIN (index) with its descriptive columns:
+            - 'Products': The name of the product (from the Degiro export).
+            - 'Place': The exchange where the product is traded.
+            - 'Exec Place': The execution place (trading venue).
+            - 'Asset Type', 'Sector', 'Geographical Location': From the metadata cache / Yahoo Finance.
+        functions.positions.join_instruments adds the descriptive columns to the rows of a view needing them.
 
     Raises:
-        SystemExit: If the source folder is empty, if no internet connection is detected, or if the CSV file does not conform to Degiro's export format.
+        SourceFolderEmpty: If the source folder is empty.
+        NoInternet: If no internet connection is detected.
+        InvalidExport: If a CSV file does not conform to Degiro's export format.
+        All of them are DatasetError (functions.errors), with a popup title and an exit code for the batch mode.
 
     Notes:
         - The function assumes that the first column in the CSV files represents the 'Date' field.
@@ -523,12 +448,14 @@ def create_dataset(SourceFolder):
           the fifth column represents the 'Place boursiè' (exchange), and the sixth column represents the 'Lieu d'exécution' 
           (execution place).
         - The function uses the Yahoo Finance API to fetch historical stock data based on the product's ISIN and exchange.
+        - With INCREMENTAL_RUN, the state of the portfolio a few days back (CHECKPOINT_MARGIN_DAYS) is saved in the cache
+          folder ; the next run only values the days after it, unless the transactions up to that date changed.
         - If there is no internet connection or if no stock price data is available for the requested dates, the function will 
           handle these cases by skipping or using the closest available date.
 
     Example:
-        df = create_dataset('path_to_your_csv_folder')
-        print(df.head())
+        cumulative_df, instruments_df = create_dataset('path_to_your_csv_folder')
+        print(join_instruments(cumulative_df, instruments_df).head())
     """
 
     os.makedirs(SourceFolder, exist_ok=True)
@@ -536,25 +463,27 @@ def create_dataset(SourceFolder):
     # Get all CSV files in the 'source' folder
     csv_files = glob.glob(f'{SourceFolder}/*.csv')
     if not csv_files :
-        show_popup("Source Folder Empty", F"Please fill source folder ({SourceFolder})  with your Degiro export. End of process.")
-        sys.exit()
+        raise SourceFolderEmpty("Source Folder Empty", F"Please fill source folder ({SourceFolder})  with your Degiro export. End of process.")
 
     # check if internet is up. if not, close it
     if not is_internet_up() :
-        show_popup("No Internet", "Please connect to Internet. End of process.")
-        sys.exit()
+        raise NoInternet("No Internet", "Please connect to Internet. End of process.")
+
+    # Persistent caches : prices, mappings, metadata and parsed exports
+    if CacheFolder is None:
+        CacheFolder = os.path.join(os.path.dirname(os.path.abspath(SourceFolder)), CACHE_FOLDER)
+    # Parsed exports : an unchanged file (path, size, mtime, content hash) is loaded from its snapshot
+    snapshots = TransactionSnapshots(os.path.join(CacheFolder, SNAPSHOT_FOLDER)) if TRANSACTION_SNAPSHOTS else None
 
     # Iterate over files, detect the delimiter, and read them into DataFrame
     dfs = []
     for file in csv_files:
-        delim = detect_delimiter(file)
-        encoding = detect_file_encoding(file)
-        df = pd.read_csv(file, delimiter=delim, encoding=encoding )  # Use detected delimiter
-        # Check if Df is based on Degiro standards
-        if not IsDEGIROexport(df) :
-            show_popup("Export Not Ok", f"File {file} is not a supported DEGIRO export format. Please format it proprely. End of process.")
-            sys.exit() 
-            # Align columns with the first dataframe (dfs[0])
+        if snapshots is not None:
+            with stage_timer.stage('dataset: load exports'):
+                df = snapshots.load(file, read_degiro_export)
+        else:
+            df = read_degiro_export(file)
+        # Align columns with the first dataframe (dfs[0])
         if len(dfs) == 0:
             dfs.append(df)  # Add the first dataframe
         else:
@@ -562,13 +491,14 @@ def create_dataset(SourceFolder):
             dfs.append(df)
     # Concatenate all DataFrames
     df = pd.concat(dfs, ignore_index=True, axis=0, join='outer')
+    # Overlapping exports : each trade is kept once, before any cost basis
+    with stage_timer.stage('dataset: duplicates'):
+        df, dropped = drop_duplicate_transactions(df, np.repeat(np.arange(len(dfs)), [len(part) for part in dfs]))
+    if dropped:
+        notify('Duplicate transactions', f"{dropped} duplicate transactions dropped (overlapping exports)", popup=False)
     
-    # Convert 'Date' column to datetime format ; Index: 0, Column Title: Date
-    df.iloc[:, 1] = pd.to_timedelta(df.iloc[:, 1] + ':00') #if it only has HH:MM
     # Add the time to the datetime
-    df.iloc[:, 0] = pd.to_datetime(df.iloc[:, 0], format='%d-%m-%Y')
     df['DateTime'] = df.iloc[:, 0] + df.iloc[:, 1]
-    
     # convert price to num
     '''df.iloc[:, 7] = df.iloc[:, 7].replace({',': '.'}, regex=True)
     df.iloc[:, 7] = pd.to_numeric(df.iloc[:, 7], errors='coerce')'''
@@ -583,19 +513,35 @@ def create_dataset(SourceFolder):
     min_date = date_range.min()  # The minimum date
     max_date = date_range.max()  # The maximum date
 
-    # Global variable to keep track of FIFO purchase history per product (ISIN)
-    global purchase_history
-    purchase_history = {}
+    # Persistent price store : only the missing dates are downloaded
+    # Yahoo calls are rate limited, retried with backoff and timed
+    fetch_stats = FetchStats()
+    yahoo_limiter = RateLimiter(*YAHOO_RATE_LIMIT)
+    price_store = PriceStore(os.path.join(CacheFolder, PRICE_CACHE_DB),
+                             provider=with_retry(yahoo_history, 'history', fetch_stats, yahoo_limiter),
+                             bulk_provider=with_retry(yahoo_bulk_history, 'bulk', fetch_stats, yahoo_limiter))
+    get_metadata = with_retry(yahoo_metadata, 'info', fetch_stats, yahoo_limiter)
+    # ISIN -> ticker mapping : cached answers, then one batched OpenFIGI lookup for the new ISINs
+    figi_mapper = OpenFigiMapper(os.path.join(CacheFolder, FIGI_CACHE_DB),
+                                 api_key=os.environ.get('OPENFIGI_API_KEY') or OPENFIGI_API_KEY)
+
     # FIFO COST
     df = df.sort_values(by='DateTime', ascending=True)  # Sort by date to process chronologically  
-    # Now, apply the get_fifo_cost function to the DataFrame
-    df['FIFO Unit Cost'] = df.apply(get_fifo_unit_cost, axis=1) 
 
-    
-
-    print(df)
-    # Initialize a list to hold cumulative values for each product and each column
-    cumulative_values = []
+    # Checkpoint of the previous run : the days up to its date are not valued again, unless the transactions up to
+    # that date changed (full rebuild)
+    checkpoint_store, checkpoint, checkpoint_date = None, None, None
+    if INCREMENTAL_RUN and len(date_range) > CHECKPOINT_MARGIN_DAYS:
+        checkpoint_store = CheckpointStore(os.path.join(CacheFolder, CHECKPOINT_DB))
+        checkpoint_date = date_range[-1 - CHECKPOINT_MARGIN_DAYS]
+        checkpoint = checkpoint_store.load()
+        if checkpoint is not None and not (checkpoint.date <= checkpoint_date and checkpoint.matches(df)):
+            print(f"Transactions changed up to the checkpoint of {checkpoint.date:%Y-%m-%d} : full rebuild")
+            checkpoint = None
+
+    # One pass per product through a FIFO lot ledger ; the ledger keeps the lots still open
+    with stage_timer.stage('dataset: FIFO cost'):
+        df['FIFO Unit Cost'], fifo_ledger, checkpoint_ledger = split_fifo_costs(df, checkpoint, checkpoint_date)
 
     # Iterate through each product in the DataFrame
     '''
@@ -606,147 +552,183 @@ def create_dataset(SourceFolder):
     Index: 6, Column Title: Quantité
     Index: 16, Column Title: Montant négocié
     '''
+    # First row of each product : metadata source, computed once instead of once per day
+    first_rows = df.dropna(subset=[df.columns[3]]).drop_duplicates(subset=df.columns[3], keep='first').set_index(df.columns[3])
+    with stage_timer.stage('dataset: OpenFIGI mapping'):
+        tickers = figi_mapper.map_isins(df.iloc[:, 3].dropna().unique())
+    # First known exchange of each product
+    exchanges = df.groupby(df.columns[3])[df.columns[4]].first()
+    jobs = []
     for ISIN in df.iloc[:, 3].dropna().unique():
-        print(ISIN)
-        # Filter data for the current product
-        product_df = df[df.iloc[:, 3] == ISIN]
-        # Initialize variables to store the running totals 
-        running_quantity = 0
-        running_montant = 0
-        running_value = 0
-
         # Find My tickers values
-        ticker = get_ticker_from_isin(ISIN)
-        exchange = df[df.iloc[:, 3] == ISIN].iloc[:, 4].dropna().unique()[0]
-        yahoo_ticker = get_yahoo_ticker(ticker, exchange)
-        if yahoo_ticker:
-            tickers_data = yf.Ticker(yahoo_ticker).history(start=min_date, end=max_date).reset_index()
+        ticker = tickers[ISIN]
+        exchange = exchanges[ISIN]
+        jobs.append((ISIN, get_yahoo_ticker(ticker, exchange) if ticker else None))
+    ticker_of = dict(jobs)
+    # Mapping and histories of this run, kept for the exports (no network access then)
+    price_repository.reset(ticker_of, price_store, min_date, max_date)
+
+    # Asset type, sector and country : cached per ISIN, the missing or expired ones are fetched in the background
+    metadata_cache = MetadataCache(os.path.join(CacheFolder, METADATA_CACHE_DB))
+    known_metadata = metadata_cache.get_fresh([ISIN for ISIN, yahoo_ticker in jobs])
+    enrichment = MetadataEnrichment([job for job in jobs if job[0] not in known_metadata], metadata_cache, get_metadata)
+    enrichment.start()
+
+    def value_prices(start, calendar):
+        """
+        As-of closes of every day of `calendar`, from the closes since `start`.
+
+        Returns:
+            tuple: The valued instruments (order of the export), the (date x instrument) closes and, per instrument,
+            the last date with a known close up to the checkpoint date.
+        """
+        last_valued = {}
+        if BULK_DOWNLOAD:
+            # Closes of all the tickers in one wide (date x ticker) frame, the new dates downloaded in one request
+            tickers_list = [yahoo_ticker for ISIN, yahoo_ticker in jobs if yahoo_ticker]
+            closes = price_store.get_close_frame(tickers_list, start, max_date) if tickers_list else pd.DataFrame()
+            # Products without any price are skipped
+            isins = [ISIN for ISIN, yahoo_ticker in jobs if yahoo_ticker and closes[yahoo_ticker].notna().any()]
+            # As-of closes of every day of the range, for all the instruments at once
+            prices = asof_lookup_frame(closes, calendar)[:, [closes.columns.get_loc(ticker_of[ISIN]) for ISIN in isins]]
+            if checkpoint_date is not None:
+                last_valued = {ISIN: closes[ticker_of[ISIN]].loc[:checkpoint_date].last_valid_index() for ISIN in isins}
         else:
-            print(f"Invalid or missing ticker: {yahoo_ticker}")
-            tickers_data = pd.DataFrame()  # or handle appropriately
-        tickers_data['Date'] = pd.to_datetime(tickers_data['Date']).dt.tz_localize(None).dt.date
-
+            # Prices are downloaded concurrently ; each instrument is processed as soon as it arrives
+            daily_prices = {}
+            for ISIN, yahoo_ticker, tickers_data, info in fetch_instruments(jobs, price_store.get_history, None,
+                                                                            start, max_date):
+                # As-of price index, built once per ticker
+                price_index = AsOfPriceIndex.from_history(tickers_data if tickers_data is not None else pd.DataFrame())
+                if price_index.empty:
+                    continue
+                # Closing price of every day of the range ; a missing date (week-end, holiday) takes the closest previous price
+                daily_prices[ISIN] = price_index.lookup(calendar)
+                if start == min_date:
+                    price_repository.add_history(yahoo_ticker, tickers_data)
+                if checkpoint_date is not None:
+                    known = price_index.dates[price_index.dates <= np.datetime64(checkpoint_date)]
+                    last_valued[ISIN] = pd.Timestamp(known[-1]) if len(known) else None
+            # Keep the order of the export, whatever the order of arrival
+            isins = [ISIN for ISIN, yahoo_ticker in jobs if ISIN in daily_prices]
+            prices = np.column_stack([daily_prices[ISIN] for ISIN in isins]) if isins else np.zeros((len(calendar), 0))
+        return isins, prices, last_valued
+
+    def stored_closes(valued_isins, until):
+        # Stored closes up to a checkpoint date (included) : the prices of the checkpointed days
+        tickers_list = [ticker_of[ISIN] for ISIN in valued_isins]
+        if not tickers_list:
+            return pd.DataFrame()
+        return price_store.load_close_frame(tickers_list, min_date, until + pd.Timedelta(days=1))
+
+    fetch_start = time.perf_counter()
+    if checkpoint is not None:
+        # Only the days after the checkpoint, from the oldest last known close (as-of lookups of the first days)
+        isins, prices, last_valued = value_prices(checkpoint.price_start(), date_range[date_range > checkpoint.date])
+        if not checkpoint.covers(df, isins):
+            print(f"Instruments changed since the checkpoint of {checkpoint.date:%Y-%m-%d} : full rebuild")
+            checkpoint = None
+        elif not checkpoint.prices_match(stored_closes(checkpoint.isins, checkpoint.date)):
+            # e.g. closes adjusted again after a new dividend or split
+            print(f"Prices changed up to the checkpoint of {checkpoint.date:%Y-%m-%d} : full rebuild")
+            checkpoint = None
+        if checkpoint is None:
+            with stage_timer.stage('dataset: FIFO cost'):
+                df['FIFO Unit Cost'], fifo_ledger, checkpoint_ledger = split_fifo_costs(df, None, checkpoint_date)
+    if checkpoint is None:
+        isins, prices, last_valued = value_prices(min_date, date_range)
+    fetch_stats.total = time.perf_counter() - fetch_start
+    stage_timer.record('dataset: prices', fetch_stats.total)
+
+    if not BackgroundMetadata:
+        enrichment.join()
+    print(fetch_stats.summary())
+
+    # Add Metadata ; products still being enriched are 'Unknown' for now
+    metadata = {}
+    for ISIN in isins:
+        metadata[ISIN] = {
+            'Products': first_rows.loc[ISIN, df.columns[2]],  # First value for 'Produit' corresponding to ISIN
+            'Place': first_rows.loc[ISIN, df.columns[4]],  # First value for 'Place boursiè'
+            'Exec Place': first_rows.loc[ISIN, df.columns[5]],  # First value for 'Lieu d'exécution'
+            **(known_metadata.get(ISIN) or enrichment.metadata.get(ISIN) or UNKNOWN_METADATA),
+        }
 
+    # Running quantities, invested amounts and values for every product and every date, computed on dense arrays
+    metadata = pd.DataFrame.from_dict(metadata, orient='index')
+    with stage_timer.stage('dataset: positions'):
+        if checkpoint_store is None:
+            cumulative_df, instruments_df = create_positions_df(df, date_range, isins, prices, metadata, sparse=SPARSE_POSITIONS)
+        else:
+            cumulative_df, instruments_df, next_checkpoint = resume_positions_df(
+                df, date_range, isins, prices, metadata, checkpoint, checkpoint_date, last_valued, checkpoint_ledger,
+                sparse=SPARSE_POSITIONS, price_fingerprint=PortfolioCheckpoint.closes_fingerprint(stored_closes(isins, checkpoint_date)))
+    if checkpoint_store is not None:
+        # A checkpoint not saved only means a full rebuild next time
         try:
-            ticker_obj = yf.Ticker(yahoo_ticker)
-            info = ticker_obj.info
-            asset_type = info.get('quoteType', 'Unknown').capitalize()
-            sector = info.get('sector', 'Unknown')
-            location = info.get('country', 'Unknown')
-        except Exception as e:
-            asset_type = 'Unknown'
-            sector = 'Unknown'
-            location = 'Unknown'
-
-
-        # Create a dictionary with 'Date' as key and 'Close' as value (using Date as the index)
-        tickers_data_dict = dict(zip(tickers_data['Date'], tickers_data['Close']))
-        if not tickers_data_dict:
-            continue
-        # Iterate through the date range and calculate cumulative quantities and amounts for the current product
-        for single_date in date_range:
-            # TEST FIFO
-            fifo_cost = product_df[product_df.iloc[:, 0] == single_date]['FIFO Unit Cost'].sum()  
-
-            # Get the quantities and montant for the current date and product
-            daily_quantity = product_df[product_df.iloc[:, 0] == single_date].iloc[:, 6].sum()
-            daily_montant =- product_df[product_df.iloc[:, 0] == single_date].iloc[:, 16].sum() 
-        # Lookup the stock price for the given date, handle missing dates
-            single_date = pd.to_datetime(single_date).tz_localize(None).date()
-            if single_date in tickers_data_dict:
-                daily_value = tickers_data_dict[single_date]
-            else:
-            # If the date is missing, use the closest available date (previous day)
-                # Find the closest date less than or equal to the single_date
-                # Check if the iterable is not empty before calling max()
-                filtered_dates = [date for date in tickers_data_dict if date <= single_date]
-                if filtered_dates:
-                    closest_date = max(filtered_dates)
-                    daily_value = tickers_data_dict[closest_date]
-                else:
-                    # Handle the case where no valid dates are found
-                    closest_date = None  # or any other default value you prefer
-                    daily_value = 0
-            # Update running totals
-            running_quantity += daily_quantity
-            if running_quantity == 0 :
-                running_montant += 0
-            elif  fifo_cost != 0 :
-                # If sold, i got a fifo_cost. I must deduct my invested amount with this and not with the actual selling value
-                # this way, if i sell all, i'll deduct exactly the invested amount
-                # daily_quantity is neg due to sell, no need to * -1
-                running_montant += fifo_cost * daily_quantity 
-                
-            else :
-                running_montant += daily_montant
-            running_value = (daily_value * running_quantity)
-
-            # Add Metadata
-            product = df[df.iloc[:, 3] == ISIN].iloc[:, 2].iloc[0]  # Get the first value for 'Produit' corresponding to ISIN
-            place = df[df.iloc[:, 3] == ISIN].iloc[:, 4].iloc[0]  # Get the first value for 'Place boursiè'
-            exec_place = df[df.iloc[:, 3] == ISIN].iloc[:, 5].iloc[0]  # Get the first value for 'Lieu d'exécution'
-            
-            # Append the result for the current date, product, and cumulative values
-            cumulative_values.append([
-                single_date, product, ISIN, place, exec_place,
-                running_quantity, running_montant, running_value,
-                asset_type, sector, location , fifo_cost
-            ])
-
-    # Create a DataFrame with the date, product, cumulative quantity, and cumulative 'Montant négocié'
-    cumulative_df = pd.DataFrame(cumulative_values, columns=[
-    'Date', 'Products', 'ISIN', 'Place', 'Exec Place',
-    'Qty', 'Buying_value', 'Actual_value',
-    'Asset Type', 'Sector', 'Geographical Location' ,'test fifo'
-                ])
-
-    
-    return cumulative_df
-
-
-def store_tickers_data_sqlite3_DB(df, output_folder):
+            checkpoint_store.save(next_checkpoint)
+        except sqlite3.Error as e:
+            print(f"Checkpoint not saved: {e}")
+    if MemoryReport and isinstance(cumulative_df, SparsePositions):
+        print(memory_report({'object layout': legacy_layout(cumulative_df.to_frame(), instruments_df),
+                             'sparse runs': [cumulative_df.runs, instruments_df]}).to_string())
+        print(f"{len(cumulative_df)} runs instead of {len(date_range) * len(isins)} daily rows")
+    elif MemoryReport:
+        print(memory_report({'object layout': legacy_layout(cumulative_df, instruments_df),
+                             'star schema': [cumulative_df, instruments_df]}).to_string())
+
+    if BackgroundMetadata:
+        return cumulative_df, instruments_df, enrichment
+    return cumulative_df, instruments_df
+
+
+def store_tickers_data_sqlite3_DB(df, output_folder, CacheFolder, repository=None):
     """
     This function stores stock data for unique ISIN values in a SQLite database.
     
     Parameters:
     df (pandas.DataFrame): A DataFrame containing stock data with columns like 'ISIN', 'Place', 'Date', etc.
     output_folder (str): The directory where the SQLite database ('tickers_data.db') will be saved.
+    CacheFolder (str): The folder of the persistent caches ; read when the data does not come from a run of this process.
+    repository (PriceRepository, optional): The mapping and histories to export (default: the ones of the last
+        create_dataset run of this process).
 
     Process:
     - Iterates over unique ISIN values in the DataFrame.
-    - Retrieves the corresponding stock ticker and Yahoo Finance ticker symbol.
-    - Fetches historical stock data from Yahoo Finance.
+    - Retrieves the corresponding Yahoo Finance ticker symbol, from the mapping of the run (or the OpenFIGI cache ;
+      an ISIN without cached mapping is skipped).
+    - Retrieves its price history from the run (local price store), without any network access.
     - Stores the stock data in an SQLite database.
     """
-    
-    # Initialize SQLite connection to store data
-    conn = sqlite3.connect(f'{output_folder}/tickers_data.db')
-    cursor = conn.cursor()
-
-    # Iterate over each unique ISIN in the DataFrame to store its data
-    for isin in df['ISIN'].unique():
-        # Filter the DataFrame for the current ISIN to extract relevant information
-        ISIN = df[df['ISIN'] == isin]['ISIN'].unique()[0]
-        exchange = df[df['ISIN'] == isin]['Place'].unique()[0]
-
-        # Get the stock ticker symbol using the ISIN and exchange
-        ticker = get_ticker_from_isin(ISIN)
-        yahoo_ticker = get_yahoo_ticker(ticker, exchange)
-
-        # Retrieve the historical stock data from Yahoo Finance
-        min_date = pd.to_datetime(df['Date'].min())  # Start date for stock data
-        max_date = pd.to_datetime(df['Date'].max())  # End date for stock data
-        tickers_data = yf.Ticker(yahoo_ticker).history(start=min_date, end=max_date).reset_index()
-        
-        # Clean and format the 'Date' column to remove timezone info and convert to date only
-        tickers_data['Date'] = pd.to_datetime(tickers_data['Date']).dt.tz_localize(None).dt.date
-
-        # Store the fetched stock data in the SQLite database
-        store_new_tickers_data(tickers_data, yahoo_ticker, f'{output_folder}/tickers_data.db')
-
-    # Commit the changes to the database and close the connection
-    conn.commit()
-    conn.close()
+    repository = repository if repository is not None else price_repository
+    # Date range of the data (end exclusive, like yfinance)
+    min_date = pd.to_datetime(df['Date'].min())
+    max_date = pd.to_datetime(df['Date'].max())
+    if repository.store is None:
+        # No run in this process : the price store of the last one
+        repository.reset({}, PriceStore(os.path.join(CacheFolder, PRICE_CACHE_DB)), min_date, max_date)
+
+    # First exchange of each ISIN, in the order of the data
+    places = list(df.drop_duplicates(subset='ISIN')[['ISIN', 'Place']].astype(object).itertuples(index=False, name=None))
+    # ISINs unknown to the run : tickers from the mapping cache filled by create_dataset, never asked online
+    unknown = [ISIN for ISIN, exchange in places if not repository.knows(ISIN)]
+    tickers = OpenFigiMapper(os.path.join(CacheFolder, FIGI_CACHE_DB)).get_cached(unknown) if unknown else {}
+    not_cached = [ISIN for ISIN in unknown if ISIN not in tickers]
+    if not_cached:
+        print(f"No cached ticker for {', '.join(map(str, not_cached))} : not exported")
+
+    # One connection and one transaction for the whole export
+    with TickerStore(f'{output_folder}/tickers_data.db') as store:
+        for ISIN, exchange in places:
+            if repository.knows(ISIN):
+                yahoo_ticker = repository.ticker(ISIN)
+            else:
+                yahoo_ticker = get_yahoo_ticker(tickers[ISIN], exchange) if tickers.get(ISIN) else None
+            if not yahoo_ticker:
+                continue
+            # Store the price history of the run in the SQLite database
+            store.write(yahoo_ticker, repository.history(yahoo_ticker, min_date, max_date))
+    print(f"{store.rows} rows stored in {output_folder}/tickers_data.db")
 
     # Show a popup message indicating the data has been saved
-    #show_popup('DB Saved', f'DB saved to {output_folder}')
\ No newline at end of file
+    #show_popup('DB Saved', f'DB saved to {output_folder}')
@@ -2,14 +2,20 @@
 import Config.config as config  # Correct way to import the config module with an alias
 
 import sys
-from PyQt5.QtWidgets import QApplication,QGridLayout,QLineEdit,QCheckBox, QMainWindow, QVBoxLayout, QWidget, QTabWidget, QScrollArea, QPushButton, QLabel,QDateEdit,QVBoxLayout 
-from PyQt5.QtCore import QDate
+import time
+from PyQt5.QtWidgets import QApplication,QGridLayout,QLineEdit,QCheckBox, QMainWindow, QVBoxLayout, QWidget, QTabWidget, QScrollArea, QPushButton, QLabel,QDateEdit,QVBoxLayout ,QProgressDialog
+from PyQt5.QtCore import QDate, Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.ticker import ScalarFormatter
 
 # ----- From Files
 from functions.functions import *
 from functions.Data_Fetching_Cleaning import *
+from functions.profiling import stage_timer
+from functions.exporting import export_plots
+from functions.positions import join_instruments
+from functions.analysis import dense_frame
+from functions.dataset_io import export_df_parquet, export_df_feather
 
 class CustomNavigationToolbar(NavigationToolbar):
     def __init__(self, canvas, parent):
@@ -172,7 +178,7 @@ class MatplotlibTab(QWidget):
 
 # Main window class
 class MainWindow(QMainWindow):
-    def __init__(self, plots, pdf_filepath, date_folder, df):
+    def __init__(self, plots, pdf_filepath, date_folder, df, cache_folder, instruments_df=None, sparse_positions=None):
         super().__init__()
 
         self.setWindowTitle("Degiro Analysis")
@@ -188,7 +194,7 @@ class MainWindow(QMainWindow):
         self.create_tabs(plots)
 
         # Create the ButtonTab and add it as a tab
-        button_tab = ButtonTab(plots, pdf_filepath, date_folder, df)
+        button_tab = ButtonTab(plots, pdf_filepath, date_folder, df, cache_folder, instruments_df, sparse_positions)
         self.tabs.addTab(button_tab, "Exports")
 
         # Set the QTabWidget as the central widget
@@ -260,54 +266,71 @@ class MainWindow(QMainWindow):
     def create_tabs(self, plots):
         # List of all the figures and plots
         figs_data = [
-            {"title": "About", "fig": plots["ReadMe"], "grid_size": (1, 1), "show_toolbar": False},
-            {"title": "KPI", "fig": plots["KPI Plot"], "grid_size": (1, 1), "show_toolbar": False},
-            {"title": "Pivot Table", "fig": plots["Pivot Table"], "grid_size": (1, 1), "show_toolbar": False},
+            {"title": "About", "fig": "ReadMe", "grid_size": (1, 1), "show_toolbar": False},
+            {"title": "KPI", "fig": "KPI Plot", "grid_size": (1, 1), "show_toolbar": False},
+            {"title": "Pivot Table", "fig": "Pivot Table", "grid_size": (1, 1), "show_toolbar": False},
             # Tab with 4 subplots (2x2 grid)
             {"title": "Portfolio Overview", 
             "plots_data": [
-                #(plots["Total Var by Date"], (1, 1),True),  # Use plot from the 'plots' dictionary
-                (plots["Pie Portfolio by Asset Type"], (1, 2),True),     # Similarly use 'Sine Wave'
-                (plots["Portfolio Product Percentage"], (2, 1),True), # Use 'Cosine Wave'
-                (plots["Pie Portfolio by ISIN"], (2, 2),True)  # Use 'Exponential Curve'
+                #("Total Var by Date", (1, 1),True),  # Use plot from the 'plots' registry
+                ("Pie Portfolio by Asset Type", (1, 2),True),     # Similarly use 'Sine Wave'
+                ("Portfolio Product Percentage", (2, 1),True), # Use 'Cosine Wave'
+                ("Pie Portfolio by ISIN", (2, 2),True)  # Use 'Exponential Curve'
             ], "grid_size": (2, 2)},
             # Tab with 4 subplots (2x2 grid)
             {"title": "Portfolio Overview by date", 
             "plots_data": [
-                (plots["Total Pct by Date"], (1, 1),True),  # Use plot from the 'plots' dictionary
-                (plots["Total by Date"], (1, 2),True),     # Similarly use 'Sine Wave'
-                (plots["Total Var by Date"], (2, 1),True), # Use 'Cosine Wave'
-                #(plots["Pie Portfolio by ISIN"], (2, 2),True)  # Use 'Exponential Curve'
+                ("Total Pct by Date", (1, 1),True),  # Use plot from the 'plots' registry
+                ("Total by Date", (1, 2),True),     # Similarly use 'Sine Wave'
+                ("Total Var by Date", (2, 1),True), # Use 'Cosine Wave'
+                #("Pie Portfolio by ISIN", (2, 2),True)  # Use 'Exponential Curve'
             ], "grid_size": (2, 2)},
             # other
             {"title": "Appendixes", 
             "plots_data": [
-                (plots["ISIN Percentage by Date"], (1, 1),True),  # Use plot from the 'plots' dictionary
-                (plots["ISIN by Date"], (1, 2),True),     # Similarly use 'Sine Wave'
-                (plots["Portfolio by ISIN by Date"], (2, 1),True) # Use 'Cosine Wave'
+                ("ISIN Percentage by Date", (1, 1),True),  # Use plot from the 'plots' registry
+                ("ISIN by Date", (1, 2),True),     # Similarly use 'Sine Wave'
+                ("Portfolio by ISIN by Date", (2, 1),True) # Use 'Cosine Wave'
             ], "grid_size": (2, 2)},
         ]
 
-        # Dynamically create tabs from figs_data
+        # Dynamically create tabs from figs_data ; the figures of a tab are built the first time it is shown
+        self.plots = plots
+        self.pending_tabs = {}  # tab index -> tab_data, until the tab is shown
+        self.tabs.currentChanged.connect(self.build_tab)
         for tab_data in figs_data:
-            if "plots_data" in tab_data:
-                # Handle a group of subplots
-                tab = MatplotlibTab(
-                    plots_data=tab_data["plots_data"],  # directly pass plots_data
-                    grid_size=tab_data["grid_size"]
-                )
-            else:
-                # Handle a single figure (wrap it in a list as figs_data)
-                tab = MatplotlibTab(fig=tab_data["fig"], grid_size=tab_data["grid_size"], show_toolbar=tab_data["show_toolbar"])
-
-            
+            page = QWidget()
+            page.setLayout(QVBoxLayout())
             # Add the tab to the UI
-            self.tabs.addTab(tab, tab_data["title"])
-            
+            index = self.tabs.addTab(page, tab_data["title"])
+            self.pending_tabs[index] = tab_data
+        self.build_tab(self.tabs.currentIndex())
+
+    def build_tab(self, index):
+        """
+        Builds the figures of a tab (from the plot registry) and their canvases, on first display.
+        """
+        tab_data = self.pending_tabs.pop(index, None)
+        if tab_data is None:
+            return
+        # Figures, canvas creation and drawing of the tab are timed
+        tab_start = time.perf_counter()
+        if "plots_data" in tab_data:
+            # Handle a group of subplots
+            tab = MatplotlibTab(
+                plots_data=[(self.plots[name], position, show_toolbar) for name, position, show_toolbar in tab_data["plots_data"]],
+                grid_size=tab_data["grid_size"]
+            )
+        else:
+            # Handle a single figure (wrap it in a list as figs_data)
+            tab = MatplotlibTab(fig=self.plots[tab_data["fig"]], grid_size=tab_data["grid_size"], show_toolbar=tab_data["show_toolbar"])
+        stage_timer.record(f'Qt tab: {tab_data["title"]}', time.perf_counter() - tab_start)
+        self.tabs.widget(index).layout().addWidget(tab)
+
 
 
 class ButtonTab(QWidget):
-    def __init__(self, plots, pdf_filepath, date_folder,df):
+    def __init__(self, plots, pdf_filepath, date_folder,df, cache_folder, instruments_df=None, sparse_positions=None):
         super().__init__()
 
         # Save the passed parameters for later use
@@ -315,6 +338,11 @@ class ButtonTab(QWidget):
         self.pdf_filepath = pdf_filepath
         self.date_folder = date_folder
         self.df=df
+        self.cache_folder = cache_folder
+        # Instrument table of df (descriptive columns, one row per ISIN)
+        self.instruments_df = instruments_df
+        # Sparse storage of df (holding intervals only), None when df has every day
+        self.sparse_positions = sparse_positions
         # Create a label for feedback
         #self.label = QLabel("Click a button to perform an action.", self)
 
@@ -323,6 +351,7 @@ class ButtonTab(QWidget):
         self.button2 = QPushButton("Export Each Plot as PNG", self)
         self.button3 = QPushButton("Export dataset as CSV", self)
         self.button4 = QPushButton("Export stock data as SQL DB & CSV", self)
+        self.button5 = QPushButton("Export dataset as Parquet & Feather", self)
 
         # Automatically add buttons to the instance, then apply size and style
         self.set_button_size_and_style()
@@ -332,6 +361,7 @@ class ButtonTab(QWidget):
         self.button2.clicked.connect(lambda: self.Export_PNG())
         self.button3.clicked.connect(lambda: self.Export_CSV())
         self.button4.clicked.connect(lambda: self.Export_DB())
+        self.button5.clicked.connect(lambda: self.Export_Columnar())
 
         # Set up the grid layout
         layout = QGridLayout()
@@ -342,6 +372,7 @@ class ButtonTab(QWidget):
         layout.addWidget(self.button2, 1, 1)
         layout.addWidget(self.button3, 2, 0)
         layout.addWidget(self.button4, 2, 1)
+        layout.addWidget(self.button5, 3, 0)
 
         self.setLayout(layout)
     def set_button_size_and_style(self):
@@ -351,21 +382,53 @@ class ButtonTab(QWidget):
                 button.setFixedSize(500, 150)
                 button.setStyleSheet("font-size: 25px; padding: 15px;")
 
+    def export_progress(self, title):
+        """
+        Opens a progress dialog for an export ; returns it with the progress callback of export_plots.
+        """
+        dialog = QProgressDialog(title, None, 0, 0, self)  # No cancel button
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.show()
+
+        def progress(done, total, name):
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+            dialog.setLabelText(f"{title} : {name} ({done}/{total})")
+            # Keep the window responsive while the workers render
+            QApplication.processEvents()
+        return dialog, progress
+
     def Export_PDF(self):
         create_output_folder(self.date_folder)
-        plots_saveAs_OnePDF(self.pdf_filepath, self.plots)
+        # Pages rendered by worker processes, assembled in order
+        dialog, progress = self.export_progress("Exporting the PDF report")
+        export_plots(self.plots, pdf_filepath=self.pdf_filepath, progress=progress)
+        dialog.close()
+        notify('Report exported to pdf', f'Report exported to {self.pdf_filepath}')
         open_system(self.pdf_filepath)
 
     def Export_PNG(self):
         create_output_folder(self.date_folder)
-        plots_saveAs_PNG(self.date_folder, self.plots)
+        # Figures rendered and written by worker processes
+        dialog, progress = self.export_progress("Exporting the plots as PNG")
+        export_plots(self.plots, png_folder=self.date_folder, progress=progress)
+        dialog.close()
+        notify('Plots exported as PNG', f'Imgs exported to {self.date_folder}')
 
     def Export_CSV(self):
         create_output_folder(self.date_folder)
-        export_df_csv(self.date_folder,self.df)
+        # Former wide layout : the descriptive columns are joined for the export only
+        export_df_csv(self.date_folder,join_instruments(dense_frame(self.df, self.sparse_positions), self.instruments_df))
+    def Export_Columnar(self):
+        create_output_folder(self.date_folder)
+        # Same rows and columns as the CSV, with their dtypes ; read back with read_dataset
+        dataset = join_instruments(dense_frame(self.df, self.sparse_positions), self.instruments_df)
+        export_df_parquet(self.date_folder, dataset)
+        export_df_feather(self.date_folder, dataset)
     def Export_DB(self):
         create_output_folder(self.date_folder)
-        store_tickers_data_sqlite3_DB(self.df, self.date_folder)
+        store_tickers_data_sqlite3_DB(join_instruments(self.df, self.instruments_df, ['Place']), self.date_folder, self.cache_folder)
         export_sqlite_to_csv(f'{self.date_folder}/tickers_data.db', 'tickers_data', f'{self.date_folder}/dboutput.csv')
    
 # New ConfigEditTab to edit the config file variables
@@ -445,9 +508,9 @@ class ConfigEditTab(QWidget):
             config_file.writelines(updated_lines)
         print('saved')
 
-def createUI(plots,pdf_filepath,date_folder,df):
+def createUI(plots,pdf_filepath,date_folder,df,cache_folder,instruments_df=None,sparse_positions=None):
     app = QApplication(sys.argv)
-    window = MainWindow(plots,pdf_filepath,date_folder,df)
+    window = MainWindow(plots,pdf_filepath,date_folder,df,cache_folder,instruments_df,sparse_positions)
     # Show the window and run the event loop
     window.showMaximized()
     sys.exit(app.exec_())
@@ -1,20 +1,33 @@
 import pandas as pd
+# ----- From Files
+from functions.positions import join_instruments, SparsePositions
+
+def adjust_values(df) :
+    """
+    Values a position without known price at its buying value (in place), and returns the frame.
+    """
+    # Handle case where Actual_value is 0 and Buying_value is not 0
+    df.loc[
+        (df['Actual_value'] == 0) &
+        (df['Buying_value'] != 0) &
+        (df['Qty'] != 0),
+        'Actual_value'
+    ] = df['Buying_value']
+    return df
 
 def calculation_df(df) :
 
+    # Sparse storage : only the rows of the holding intervals (the other rows are zeros)
+    if isinstance(df, SparsePositions):
+        df = df.to_frame(active_only=True)
+
     df_copy = df.copy()
 
     # Formatting
     df_copy['Date'] = pd.to_datetime(df_copy['Date'], format='%d-%m-%y')
 
     #Adjusting values
-    # Handle case where Actual_value is 0 and Buying_value is not 0
-    df_copy.loc[
-        (df_copy['Actual_value'] == 0) &
-        (df_copy['Buying_value'] != 0) &
-        (df_copy['Qty'] != 0),
-        'Actual_value'
-    ] = df_copy['Buying_value']
+    adjust_values(df_copy)
 
     # Calculations
     # Calculate total Actual_value per day and %of product ; excluding total rows
@@ -27,18 +40,36 @@ def calculation_df(df) :
     df_copy.loc[:, 'Percentage_diff'] = ((df_copy['Actual_value'] - df_copy['Buying_value']) / df_copy['Buying_value']) * 100
     return df_copy
 
-def grouped_df_by_date(df) :
+def grouped_df_by_date(df, sparse_positions=None) :
     grouped = df.copy()
     grouped = grouped.groupby('Date').agg({
         'Buying_value': 'sum',
         'Actual_value': 'sum'
-    }).reset_index()
+    })
+    # Sparse storage : the days without any position have no row, their totals are 0
+    if sparse_positions is not None:
+        grouped = grouped.reindex(sparse_positions.date_range.normalize(), fill_value=0).rename_axis('Date')
+    grouped = grouped.reset_index()
     grouped['Variation_%'] = ((grouped['Actual_value'] - grouped['Buying_value']) / grouped['Buying_value']) * 100
     grouped.loc[:, 'Value_diff'] = (grouped['Actual_value'] - grouped['Buying_value'])
     return grouped
 
-def create_today_df(df):
-    df_copy = df.copy()
-
+def create_today_df(df, instruments_df=None, sparse_positions=None):
+    """
+    Returns the rows of the latest date, joined with the descriptive columns of their instruments
+    (pivot table, pies, KPI). With the sparse storage, the rows of all the instruments (closed positions
+    included) are materialized for that date only.
+    """
+    if sparse_positions is not None:
+        return join_instruments(calculation_df(sparse_positions.to_frame(dates=sparse_positions.date_range[-1:])), instruments_df)
+    today_data = df[df['Date'] == df['Date'].max()].copy()
+    return join_instruments(today_data, instruments_df)
 
-    return df_copy
\ No newline at end of file
+def dense_frame(df, sparse_positions=None):
+    """
+    Returns the dataset with a row for every instrument and every day (CSV export, charts over the whole
+    calendar) : `df` itself, or the rows materialized from the sparse storage.
+    """
+    if sparse_positions is None:
+        return df
+    return calculation_df(sparse_positions.to_frame())
\ No newline at end of file
@@ -0,0 +1,347 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Checkpoint of the portfolio at the end of a run, so that the next run only values the new days
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+import hashlib
+import copy
+import os
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.cost_basis import FifoLedger, compute_fifo_costs
+from functions.positions import (SparsePositions, MEASURE_DTYPES, build_position_arrays, compute_positions,
+                                 positions_to_frame, instruments_frame)
+
+# Bumped when the content of a checkpoint changes : older checkpoints are then ignored (full rebuild)
+CHECKPOINT_VERSION = 3
+
+class PortfolioCheckpoint:
+    """
+    State of the portfolio at the end of a day (the checkpoint date), saved after a run :
+        - the running quantity and invested amount of every instrument ;
+        - the last date with a known close of every instrument (start of the price lookups of the next run) ;
+        - the open FIFO lots ;
+        - the daily positions up to that date (SparsePositions, runs only) ;
+        - a fingerprint of the transactions up to that date ;
+        - a fingerprint of the closes up to that date, as stored in the price store.
+
+    History before the checkpoint cannot change unless the exports or the stored closes do (e.g. closes adjusted
+    again after a new dividend or split) : the next run checks both fingerprints, then only runs the FIFO ledger,
+    the price lookups and the position engine on the days after the checkpoint.
+
+    Example:
+        >>> checkpoint = CheckpointStore('cache/checkpoint.db').load()
+        >>> if checkpoint is not None and checkpoint.matches(df) and checkpoint.prices_match(closes):
+        ...     quantity, amount = checkpoint.initial_state(isins)
+    """
+
+    def __init__(self, date, fingerprint, isins, quantity, amount, last_valued, ledger, history, price_fingerprint=None):
+        """
+        Args:
+            date (datetime): The checkpoint date ; the state is the one at the end of that day.
+            fingerprint (str): transactions_fingerprint of the transactions up to `date`.
+            isins (list): The valued instruments, in output order.
+            quantity, amount (array-like): Running quantity and invested amount per instrument, aligned with `isins`.
+            last_valued (dict): ISIN -> last date with a known close up to `date` (None when there is none).
+            ledger (FifoLedger): The open lots at the end of `date`.
+            history (SparsePositions): The daily positions up to `date`.
+            price_fingerprint (str, optional): closes_fingerprint of the closes up to `date` the positions were valued
+                with ; None never matches.
+        """
+        self.date = pd.Timestamp(date).normalize()
+        self.fingerprint = fingerprint
+        self.isins = list(isins)
+        self.quantity = np.asarray(quantity, dtype='int64')
+        self.amount = np.asarray(amount, dtype='float64')
+        self.last_valued = dict(last_valued)
+        self.ledger = ledger
+        self.history = history
+        self.price_fingerprint = price_fingerprint
+
+    @staticmethod
+    def transactions_fingerprint(df, date):
+        """
+        Fingerprint of the transactions up to a date (included), whatever their order or the file they come from.
+
+        Args:
+            df (pandas.DataFrame): The DEGIRO transactions (index 0 is the trading date).
+            date (datetime): The last date taken into account.
+
+        Returns:
+            str: A SHA-256 hex digest.
+        """
+        rows = df[df.iloc[:, 0] <= date].drop(columns=['DateTime', 'FIFO Unit Cost'], errors='ignore')
+        hashes = np.sort(pd.util.hash_pandas_object(rows, index=False).to_numpy())
+        return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+    def matches(self, df):
+        """
+        True when the transactions up to the checkpoint date are the ones the checkpoint was computed from.
+        """
+        return self.transactions_fingerprint(df, self.date) == self.fingerprint
+
+    @staticmethod
+    def closes_fingerprint(closes):
+        """
+        Fingerprint of closing prices : tickers, dates and values.
+
+        Args:
+            closes (pandas.DataFrame): Wide (date x ticker) closes, e.g. PriceStore.load_close_frame up to a date.
+
+        Returns:
+            str: A SHA-256 hex digest.
+        """
+        digest = hashlib.sha256()
+        digest.update('\n'.join(map(str, closes.columns)).encode())
+        digest.update(pd.DatetimeIndex(closes.index).to_numpy(dtype='datetime64[ns]').tobytes())
+        digest.update(closes.to_numpy(dtype='float64').tobytes())
+        return digest.hexdigest()
+
+    def prices_match(self, closes):
+        """
+        True when the closes up to the checkpoint date are the ones the checkpointed days were valued with.
+        """
+        return self.price_fingerprint is not None and self.closes_fingerprint(closes) == self.price_fingerprint
+
+    def covers(self, df, isins):
+        """
+        True when the valuation can resume with these instruments : all the instruments of the checkpoint are
+        still valued, and the new ones were only traded after the checkpoint date (no history to rebuild).
+        """
+        if not set(self.isins) <= set(isins):
+            return False
+        traded_before = set(df.loc[df.iloc[:, 0] <= self.date].iloc[:, 3].dropna())
+        return not (set(isins) - set(self.isins)) & traded_before
+
+    def initial_state(self, isins):
+        """
+        Returns the running quantity and invested amount at the checkpoint date, aligned with `isins`
+        (0 for an instrument unknown to the checkpoint).
+        """
+        position = pd.Index(self.isins).get_indexer(isins)
+        known = position >= 0
+        quantity = np.where(known, self.quantity[np.clip(position, 0, None)], 0) if len(self.isins) else np.zeros(len(isins), dtype='int64')
+        amount = np.where(known, self.amount[np.clip(position, 0, None)], 0.0) if len(self.isins) else np.zeros(len(isins))
+        return quantity.astype('int64'), amount.astype('float64')
+
+    def price_start(self):
+        """
+        First date of the closes needed after the checkpoint : the oldest last known close of the instruments, so
+        that the as-of lookups of the new days find the closes preceding them.
+        """
+        dates = [pd.Timestamp(date) for date in self.last_valued.values() if date is not None]
+        return min(dates + [self.date])
+
+def split_fifo_costs(df, checkpoint=None, checkpoint_date=None):
+    """
+    Runs the FIFO ledger on the transactions after the checkpoint (all of them without checkpoint), keeping a copy
+    of the ledger at the end of the next checkpoint date.
+
+    Args:
+        df (pandas.DataFrame): The DEGIRO transactions, sorted chronologically.
+        checkpoint (PortfolioCheckpoint, optional): The checkpoint to resume from ; its ledger is left untouched.
+        checkpoint_date (datetime, optional): The date of the next checkpoint.
+
+    Returns:
+        tuple:
+            - pandas.Series: The FIFO unit cost of the rows after the checkpoint, NaN for the rows before it.
+            - FifoLedger: The ledger after all the transactions.
+            - FifoLedger: A copy of the ledger at the end of `checkpoint_date` (None without checkpoint_date).
+    """
+    dates = df.iloc[:, 0]
+    ledger = copy.deepcopy(checkpoint.ledger) if checkpoint is not None else FifoLedger()
+    rows = dates > checkpoint.date if checkpoint is not None else pd.Series(True, index=df.index)
+    if checkpoint_date is None:
+        costs, ledger = compute_fifo_costs(df[rows], ledger)
+        return costs.reindex(df.index), ledger, None
+    # Lots are consumed in the same order as in one pass : only the ledger is copied in between
+    costs_before, ledger = compute_fifo_costs(df[rows & (dates <= checkpoint_date)], ledger)
+    ledger_at_checkpoint = copy.deepcopy(ledger)
+    costs_after, ledger = compute_fifo_costs(df[rows & (dates > checkpoint_date)], ledger)
+    costs = pd.concat([costs_before, costs_after]).reindex(df.index).rename('FIFO Unit Cost')
+    return costs, ledger, ledger_at_checkpoint
+
+def resume_positions_df(df, date_range, isins, prices, metadata, checkpoint=None, checkpoint_date=None, last_valued=None,
+                        ledger=None, sparse=False, price_fingerprint=None):
+    """
+    Runs the position engine on the days after the checkpoint only (on all of them without checkpoint), and
+    prepares the checkpoint of the next run.
+
+    Args:
+        df (pandas.DataFrame): The DEGIRO transactions, with the 'FIFO Unit Cost' of the rows after the checkpoint.
+        date_range (pandas.DatetimeIndex): The daily calendar of the dataset.
+        isins (list): The instruments to value, in output order ; checkpoint.covers(df, isins) must be True.
+        prices (numpy.ndarray): Closing price per (date after the checkpoint, instrument), 0 when unknown.
+        metadata (pandas.DataFrame): Descriptive columns indexed by ISIN (see instruments_frame).
+        checkpoint (PortfolioCheckpoint, optional): The checkpoint to resume from.
+        checkpoint_date (datetime): The date of the next checkpoint.
+        last_valued (dict): ISIN -> last date with a known close up to `checkpoint_date`.
+        ledger (FifoLedger): The open lots at the end of `checkpoint_date` (see split_fifo_costs).
+        sparse (bool): Return the daily positions as SparsePositions instead of the dense fact table.
+        price_fingerprint (str, optional): PortfolioCheckpoint.closes_fingerprint of the closes of `isins` up to
+            `checkpoint_date`, saved with the next checkpoint.
+
+    Returns:
+        tuple: The daily positions and the instrument table (see create_positions_df), then the next PortfolioCheckpoint.
+    """
+    valued_range = date_range[date_range > checkpoint.date] if checkpoint is not None else date_range
+    initial_quantity, initial_amount = checkpoint.initial_state(isins) if checkpoint is not None else (None, None)
+    quantities, amounts, fifo_costs = build_position_arrays(df, valued_range, isins)
+    running_quantity, running_amount, market_value = compute_positions(quantities, amounts, fifo_costs, prices,
+                                                                       initial_quantity, initial_amount)
+    positions = SparsePositions.from_arrays(valued_range, isins, running_quantity, running_amount, market_value, fifo_costs)
+    if checkpoint is not None:
+        positions = checkpoint.history.extend(positions)
+
+    # State at the end of the next checkpoint date (the one of the current checkpoint when no day was valued before it)
+    row = valued_range.get_indexer([checkpoint_date])[0]
+    if row >= 0:
+        quantity, amount = running_quantity[row], running_amount[row]
+    else:
+        quantity, amount = checkpoint.initial_state(isins)
+    previous = checkpoint.last_valued if checkpoint is not None else {}
+    next_checkpoint = PortfolioCheckpoint(
+        date=checkpoint_date,
+        fingerprint=PortfolioCheckpoint.transactions_fingerprint(df, checkpoint_date),
+        isins=isins,
+        quantity=quantity,
+        amount=amount,
+        last_valued={isin: last_valued.get(isin) if last_valued.get(isin) is not None else previous.get(isin) for isin in isins},
+        ledger=ledger,
+        history=positions.clip(checkpoint_date),
+        price_fingerprint=price_fingerprint,
+    )
+
+    if sparse:
+        cumulative_df = positions
+    elif checkpoint is None:
+        cumulative_df = positions_to_frame(date_range, isins, running_quantity, running_amount, market_value, fifo_costs)
+    else:
+        cumulative_df = positions.to_frame()
+    return cumulative_df, instruments_frame(isins, metadata), next_checkpoint
+
+class CheckpointStore:
+    """
+    Persistent storage (SQLite) of the last PortfolioCheckpoint : one checkpoint per cache folder, replaced
+    after each run.
+
+    Example:
+        >>> store = CheckpointStore('cache/checkpoint.db')
+        >>> store.save(checkpoint)
+        >>> store.load().date
+        Timestamp('2026-10-17 00:00:00')
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Its folder is created if needed.
+        """
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS checkpoint_info (Key TEXT PRIMARY KEY, Value TEXT)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS checkpoint_positions (
+                Position INTEGER PRIMARY KEY,
+                ISIN TEXT NOT NULL,
+                Quantity INTEGER NOT NULL,
+                Amount REAL NOT NULL,
+                LastValued TEXT)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS checkpoint_lots (
+                ISIN TEXT NOT NULL,
+                Position INTEGER NOT NULL,
+                Quantity REAL NOT NULL,
+                UnitCost REAL NOT NULL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS checkpoint_runs (
+                ISIN TEXT NOT NULL,
+                Start TEXT NOT NULL,
+                Days INTEGER NOT NULL,
+                Qty REAL, Buying_value REAL, Actual_value REAL, "test fifo" REAL)''')
+            conn.commit()
+
+    def load(self):
+        """
+        Returns the saved checkpoint, or None when there is none (or an unreadable / outdated one).
+        """
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                info = dict(conn.execute('SELECT Key, Value FROM checkpoint_info').fetchall())
+                if info.get('version') != str(CHECKPOINT_VERSION):
+                    return None
+                positions = conn.execute('SELECT ISIN, Quantity, Amount, LastValued FROM checkpoint_positions '
+                                         'ORDER BY Position').fetchall()
+                lots = conn.execute('SELECT ISIN, Quantity, UnitCost FROM checkpoint_lots '
+                                    'ORDER BY ISIN, Position').fetchall()
+                runs = pd.read_sql_query('SELECT ISIN, Start, Days, Qty, Buying_value, Actual_value, "test fifo" '
+                                         'FROM checkpoint_runs ORDER BY rowid', conn)
+        except sqlite3.Error:
+            return None
+
+        isins = [isin for isin, *values in positions]
+        ledger = FifoLedger()
+        for isin, quantity, unit_cost in lots:
+            ledger.buy(isin, quantity, unit_cost)
+        runs['ISIN'] = pd.Categorical(runs['ISIN'], dtype=pd.Categorical(isins).dtype)
+        runs['Start'] = pd.to_datetime(runs['Start'])
+        runs = runs.astype({'Days': 'int32', **MEASURE_DTYPES})
+        date_range = pd.date_range(info['first_date'], info['date'], freq='D')
+        return PortfolioCheckpoint(
+            date=info['date'],
+            fingerprint=info['fingerprint'],
+            isins=isins,
+            quantity=[quantity for isin, quantity, amount, last_valued in positions],
+            amount=[amount for isin, quantity, amount, last_valued in positions],
+            last_valued={isin: pd.Timestamp(last_valued) if last_valued else None
+                         for isin, quantity, amount, last_valued in positions},
+            ledger=ledger,
+            history=SparsePositions(runs, date_range, isins),
+            price_fingerprint=info.get('prices') or None,
+        )
+
+    def save(self, checkpoint):
+        """
+        Replaces the saved checkpoint, in one transaction.
+        """
+        history = checkpoint.history
+        runs = history.runs.astype({'ISIN': object})
+        runs['Start'] = runs['Start'].dt.strftime('%Y-%m-%d')
+        info = {
+            'version': str(CHECKPOINT_VERSION),
+            'date': checkpoint.date.strftime('%Y-%m-%d'),
+            'first_date': history.date_range[0].strftime('%Y-%m-%d') if len(history.date_range) else checkpoint.date.strftime('%Y-%m-%d'),
+            'fingerprint': checkpoint.fingerprint,
+            'prices': checkpoint.price_fingerprint or '',
+        }
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                for table in ('checkpoint_info', 'checkpoint_positions', 'checkpoint_lots', 'checkpoint_runs'):
+                    conn.execute(f'DELETE FROM {table}')
+                conn.executemany('INSERT INTO checkpoint_info (Key, Value) VALUES (?, ?)', info.items())
+                conn.executemany(
+                    'INSERT INTO checkpoint_positions (Position, ISIN, Quantity, Amount, LastValued) VALUES (?, ?, ?, ?, ?)',
+                    [(position, isin, int(checkpoint.quantity[position]), float(checkpoint.amount[position]),
+                      checkpoint.last_valued[isin].strftime('%Y-%m-%d') if checkpoint.last_valued.get(isin) is not None else None)
+                     for position, isin in enumerate(checkpoint.isins)])
+                conn.executemany(
+                    'INSERT INTO checkpoint_lots (ISIN, Position, Quantity, UnitCost) VALUES (?, ?, ?, ?)',
+                    [(isin, position, float(quantity), float(unit_cost))
+                     for isin, lots in checkpoint.ledger.lots.items() for position, (quantity, unit_cost) in enumerate(lots)])
+                conn.executemany(
+                    'INSERT INTO checkpoint_runs (ISIN, Start, Days, Qty, Buying_value, Actual_value, "test fifo") '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(isin, start, int(days), *[float(value) for value in values])
+                     for isin, start, days, *values in runs[['ISIN', 'Start', 'Days', *MEASURE_DTYPES]].itertuples(index=False, name=None)])
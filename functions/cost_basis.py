@@ -0,0 +1,138 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : FIFO cost basis engine (lot ledger per instrument)
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import numpy as np
+import pandas as pd
+from collections import deque
+
+class FifoLedger:
+    """
+    Lot ledger of one portfolio : per instrument, a FIFO queue of the open purchase lots [quantity, unit cost].
+
+    The ledger holds all its state : several portfolios can be processed at the same time, each with its own ledger.
+
+    Example:
+        >>> ledger = FifoLedger()
+        >>> ledger.buy('NL0010273215', 10, 600.0)
+        >>> ledger.buy('NL0010273215', 5, 700.0)
+        >>> ledger.sell('NL0010273215', 12)
+        616.6666666666666
+        >>> ledger.open_lots()
+                   ISIN  Quantity  Unit Cost
+        0  NL0010273215       3.0      700.0
+    """
+
+    def __init__(self):
+        self.lots = {}
+
+    def buy(self, isin, quantity, unit_cost):
+        """
+        Adds a purchase lot at the end of the queue of the instrument.
+        """
+        self.lots.setdefault(isin, deque()).append([quantity, unit_cost])
+
+    def sell(self, isin, quantity):
+        """
+        Consumes `quantity` units from the oldest lots of the instrument.
+
+        Returns:
+            float: The average unit cost of the consumed units ; 0 when no lot was available.
+        """
+        lots = self.lots.setdefault(isin, deque())
+        remaining = quantity
+        total_cost = 0.0
+        total_units = 0
+        while remaining > 0 and lots:
+            lot = lots[0]
+            if lot[0] <= remaining:
+                # The entire lot is used
+                total_cost += lot[0] * lot[1]
+                total_units += lot[0]
+                remaining -= lot[0]
+                lots.popleft()
+            else:
+                # Only part of the lot is needed
+                total_cost += remaining * lot[1]
+                total_units += remaining
+                lot[0] -= remaining
+                remaining = 0
+        return total_cost / total_units if total_units else 0.0
+
+    def open_lots(self):
+        """
+        Returns the lots not sold yet, oldest first per instrument.
+
+        Returns:
+            pandas.DataFrame: Columns 'ISIN', 'Quantity' and 'Unit Cost', one row per open lot.
+        """
+        rows = [(isin, quantity, unit_cost) for isin, lots in self.lots.items() for quantity, unit_cost in lots]
+        return pd.DataFrame(rows, columns=['ISIN', 'Quantity', 'Unit Cost'])
+
+def fifo_unit_costs(isins, quantities, unit_costs, ledger=None):
+    """
+    Runs the transactions through a FIFO ledger, instrument by instrument, in one pass.
+
+    A positive quantity is a purchase, stored as a lot ; any other quantity is a sale, which consumes the oldest lots.
+
+    Args:
+        isins (array-like): ISIN of each transaction.
+        quantities (array-like): Signed quantity of each transaction.
+        unit_costs (array-like): Unit cost of each transaction, fees included.
+        ledger (FifoLedger, optional): The ledger to update (default: a new one).
+
+    Returns:
+        tuple: (numpy.ndarray, FifoLedger)
+            - The FIFO unit cost of each sale, aligned with the input (0 for the purchases).
+            - The ledger, holding the open lots.
+    """
+    ledger = ledger if ledger is not None else FifoLedger()
+    quantities = np.asarray(quantities, dtype='float64')
+    unit_costs = np.asarray(unit_costs, dtype='float64')
+    costs = np.zeros(len(quantities), dtype='float64')
+
+    # Rows of each instrument, in the order of the transactions
+    codes, uniques = pd.factorize(pd.Series(isins), use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    for rows in np.split(order, bounds) if len(order) else []:
+        isin = uniques[codes[rows[0]]]
+        for row in rows:
+            if quantities[row] > 0:
+                ledger.buy(isin, quantities[row], unit_costs[row])
+            else:
+                costs[row] = ledger.sell(isin, -quantities[row])
+    return costs, ledger
+
+def compute_fifo_costs(df, ledger=None):
+    """
+    FIFO unit cost, fees included, of the sales of a DEGIRO export.
+
+    The unit cost of a lot is the price of the purchase, minus the fees column (negative amount).
+
+    Args:
+        df (pandas.DataFrame): The DEGIRO transactions, sorted chronologically.
+        ledger (FifoLedger, optional): The ledger to update (default: a new one).
+
+    Returns:
+        tuple: (pandas.Series, FifoLedger)
+            - The FIFO unit cost of each row, indexed like `df` (0 for the purchases).
+            - The ledger, holding the open lots.
+    """
+    '''
+    Index: 3, Column Title: Code ISIN
+    Index: 6, Column Title: Quantité
+    Index: 7, Column Title: Cours
+    Index: 14, Column Title: Frais de courtage
+    '''
+    fees = pd.to_numeric(df.iloc[:, 14], errors='coerce').fillna(0)
+    unit_costs = pd.to_numeric(df.iloc[:, 7], errors='coerce') - fees
+    costs, ledger = fifo_unit_costs(df.iloc[:, 3], df.iloc[:, 6], unit_costs, ledger)
+    return pd.Series(costs, index=df.index, name='FIFO Unit Cost'), ledger
@@ -0,0 +1,90 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Columnar exports of the dataset (Parquet partitioned by year, Feather) and their read-back
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+import shutil
+import pandas as pd
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.functions import notify
+
+# Partition key of the Parquet dataset, derived from the 'Date' column
+PARTITION_COLUMN = 'Year'
+
+def export_df_parquet(OutputFolder, df, popup=True):
+    """
+    Exports a dataset as compressed Parquet, partitioned by year : one folder 'Year=YYYY' per year of its 'Date'
+    column. The dtypes (categories, datetimes, int32, ...) are stored with the data.
+
+    Args:
+        OutputFolder (str): The folder of the export.
+        df (pandas.DataFrame): The dataset, with a 'Date' column.
+        popup (bool): Show a popup once done (default) ; False prints the message instead (batch mode).
+
+    Returns:
+        str: The path of the dataset folder (see read_dataset).
+
+    Example:
+        >>> path = export_df_parquet('output/2026-10-18', join_instruments(cumulative_df, instruments_df))
+        >>> df = read_dataset(path)
+    """
+    output_path = os.path.join(OutputFolder, DATASET_PARQUET_FOLDER)
+    # A new export replaces the previous one : the files of the partitions would add up otherwise
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    df.assign(**{PARTITION_COLUMN: df['Date'].dt.year}).to_parquet(
+        output_path, partition_cols=[PARTITION_COLUMN], compression=DATASET_COMPRESSION, index=False)
+    notify('Data exported to Parquet', f'Data exported to {output_path}', popup)
+    return output_path
+
+def export_df_feather(OutputFolder, df, popup=True):
+    """
+    Exports a dataset as one compressed Feather file, the fastest to load back entirely.
+
+    Args:
+        OutputFolder (str): The folder of the export.
+        df (pandas.DataFrame): The dataset.
+        popup (bool): Show a popup once done (default) ; False prints the message instead (batch mode).
+
+    Returns:
+        str: The path of the Feather file (see read_dataset).
+    """
+    output_file = os.path.join(OutputFolder, DATASET_FEATHER_FILE)
+    # Feather stores the columns only
+    df.reset_index(drop=True).to_feather(output_file, compression=DATASET_COMPRESSION)
+    notify('Data exported to Feather', f'Data exported to {output_file}', popup)
+    return output_file
+
+def read_dataset(path, years=None):
+    """
+    Loads back a dataset exported by export_df_parquet or export_df_feather, with its dtypes : nothing is parsed.
+
+    Args:
+        path (str): The Parquet dataset folder, or a Feather / Parquet file.
+        years (list, optional): Only these years of a Parquet dataset ; the other partitions are not read.
+
+    Returns:
+        pandas.DataFrame: The dataset, with its columns in their exported order. The rows of a Parquet dataset come
+        year by year, each year in its exported order.
+
+    Example:
+        >>> df = read_dataset('output/2026-10-18/dataset', years=[2025, 2026])
+    """
+    if os.path.isdir(path):
+        filters = [(PARTITION_COLUMN, 'in', list(years))] if years is not None else None
+        df = pd.read_parquet(path, filters=filters)
+        # The partition key comes back as an extra column
+        return df.drop(columns=[PARTITION_COLUMN]).reset_index(drop=True)
+    if path.endswith('.feather'):
+        return pd.read_feather(path)
+    return pd.read_parquet(path)
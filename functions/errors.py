@@ -0,0 +1,37 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Errors stopping a run, and the exit codes of the batch mode
+# -- Update :
+# --
+# ----------------------------------------------------
+
+# Exit codes of the batch mode (Batch.py)
+EXIT_OK = 0
+EXIT_ERROR = 1              # Unexpected error
+EXIT_SOURCE_EMPTY = 2       # No CSV in the source folder
+EXIT_NO_INTERNET = 3        # No internet connection
+EXIT_INVALID_EXPORT = 4     # A CSV is not a DEGIRO export
+EXIT_EXPORT_FAILED = 5      # The PDF / PNG / CSV could not be written
+
+class DatasetError(Exception):
+    """
+    Raised when the dataset can't be built. The UI shows it in a popup (title + message), the batch mode exits
+    with `exit_code`.
+    """
+    exit_code = EXIT_ERROR
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+class SourceFolderEmpty(DatasetError):
+    exit_code = EXIT_SOURCE_EMPTY
+
+class NoInternet(DatasetError):
+    exit_code = EXIT_NO_INTERNET
+
+class InvalidExport(DatasetError):
+    exit_code = EXIT_INVALID_EXPORT
@@ -0,0 +1,148 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Parallel export of the figures (PNG, multi-page PDF) with a process pool
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+import pickle
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.functions import png_filename
+from functions.profiling import stage_timer
+
+# Plot registry of a worker process, built from the data sent by the parent
+_worker_plots = None
+
+def plan_export(plots, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Splits the export of a plot registry in tasks, in the order of the report : one task per entry, the
+    per-instrument lists being cut in chunks of `chunk_size` instruments.
+
+    Returns:
+        list: (name, isins or None, offset) tuples ; offset is the position of the first figure in its list.
+    """
+    tasks = []
+    for name in plots:
+        if name in plots.per_instrument:
+            isins = plots._value('instruments').isins
+            for start in range(0, len(isins), chunk_size):
+                tasks.append((name, isins[start:start + chunk_size], start))
+        else:
+            tasks.append((name, None, 0))
+    return tasks
+
+def render_task(plots, name, isins, offset, png_folder=None, pdf=False):
+    """
+    Builds the figures of one task, writes their PNG files and closes them.
+
+    Args:
+        pdf (bool or PdfPages): True to return the pages pickled (worker process) ; a PdfPages to write them directly.
+
+    Returns:
+        list: The figures pickled (pages of the PDF, in order) when `pdf` is True, else an empty list.
+    """
+    # Figures already memoized (e.g. shown in the UI) are reused and kept
+    memoized = isins is None and plots.is_built(name)
+    if isins is None:
+        figures = plots.build(name)
+        # A single figure is named after its key, a list after its key and position
+        positions = [None] if not isinstance(plots[name], list) else range(len(figures))
+    else:
+        figures = plots.build(name, isins)
+        positions = range(offset, offset + len(figures))
+    pages = []
+    for idx, fig in zip(positions, figures):
+        if png_folder:
+            fig.savefig(os.path.join(png_folder, png_filename(name, fig, idx)))
+        if isinstance(pdf, PdfPages):
+            pdf.savefig(fig)
+        elif pdf:
+            pages.append(pickle.dumps(fig))
+    if not memoized:
+        if isins is None:
+            plots.discard(name)
+        for fig in figures:
+            plt.close(fig)
+    return pages
+
+def _init_worker(data):
+    # Non-interactive backend : the workers never show anything
+    plt.switch_backend('Agg')
+    from functions.vizualisations import get_all_plots
+    global _worker_plots
+    _worker_plots = get_all_plots(**data)
+
+def _run_task(name, isins, offset, png_folder, pdf):
+    return render_task(_worker_plots, name, isins, offset, png_folder, pdf)
+
+def export_plots(plots, pdf_filepath=None, png_folder=None, max_workers=EXPORT_MAX_WORKERS, chunk_size=EXPORT_CHUNK_SIZE,
+                 progress=None):
+    """
+    Exports the figures of a plot registry as PNG files and/or one multi-page PDF, rendering them concurrently.
+
+    Worker processes (Agg backend) rebuild the figures from the data of the registry, write the PNG files and send
+    the PDF pages back ; the parent writes the pages in the order of the report as soon as they are available.
+    Each figure is closed once written, so the memory stays bounded. The memoized figures of `plots` (UI) are
+    left untouched.
+
+    Args:
+        plots (PlotRegistry): The registry, e.g. from get_all_plots.
+        pdf_filepath (str, optional): The PDF to write.
+        png_folder (str, optional): The folder of the PNG files (must exist).
+        max_workers (int): Number of worker processes (default: EXPORT_MAX_WORKERS), capped to the number of CPUs ;
+            1 renders in this process.
+        chunk_size (int): Instruments per task for the per-instrument lists (default: EXPORT_CHUNK_SIZE).
+        progress (callable, optional): `progress(done, total, name)`, called in this process after each task.
+
+    Example:
+        >>> export_plots(plots, pdf_filepath='output/Degiro Analysis.pdf', png_folder='output',
+        ...              progress=lambda done, total, name: print(f'{done}/{total} {name}'))
+    """
+    tasks = plan_export(plots, chunk_size)
+    # More processes than cores only adds overhead
+    max_workers = min(max_workers, os.cpu_count() or 1, len(tasks))
+    with PdfPages(pdf_filepath) if pdf_filepath else nullcontext() as pdf:
+        def write_pages(pages):
+            for page in pages:
+                fig = pickle.loads(page)
+                pdf.savefig(fig)
+                plt.close(fig)
+
+        if max_workers <= 1:
+            for done, (name, isins, offset) in enumerate(tasks, start=1):
+                render_task(plots, name, isins, offset, png_folder, pdf)
+                if progress:
+                    progress(done, len(tasks), name)
+            return
+
+        # Spawned workers : no inherited GUI state, same behaviour on every OS
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(plots.data,)) as executor:
+            futures = {executor.submit(_run_task, name, isins, offset, png_folder, pdf is not None): position
+                       for position, (name, isins, offset) in enumerate(tasks)}
+            # Pages arrived ahead of their turn, by task position
+            waiting = {}
+            next_position = 0
+            for done, future in enumerate(as_completed(futures), start=1):
+                position = futures[future]
+                waiting[position] = future.result()
+                # Write the pages of the report in order
+                while next_position in waiting:
+                    with stage_timer.stage('export: PDF pages'):
+                        write_pages(waiting.pop(next_position))
+                    next_position += 1
+                if progress:
+                    progress(done, len(tasks), tasks[position][0])
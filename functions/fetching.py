@@ -0,0 +1,207 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Concurrent fetch stage (prices, metadata) with a bounded worker pool
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import yfinance as yf #https://github.com/ranaroussi/yfinance
+import threading
+import time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.profiling import stage_timer
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter : at most `max_calls` calls in any `period` seconds.
+
+    `wait()` blocks until a new call is allowed, then records it. It can be shared between threads.
+
+    Example:
+        >>> limiter = RateLimiter(25, 60)  # 25 calls per minute
+        >>> limiter.wait()
+    """
+
+    def __init__(self, max_calls, period):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # Forget the calls out of the window
+                while self.calls and now - self.calls[0] >= self.period:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                delay = self.period - (now - self.calls[0])
+            time.sleep(delay)
+
+class FetchStats:
+    """
+    Latency of the network calls, per kind of call ('history', 'info', ...), and total wall time of the fetch stage
+    (set by the caller). Thread-safe, so that the workers can record their calls directly.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.lock = threading.Lock()
+        self.total = 0.0
+
+    def record(self, kind, seconds, failed=False):
+        with self.lock:
+            self.latencies[kind].append(seconds)
+            if failed:
+                self.failures[kind] += 1
+
+    def summary(self):
+        """
+        Returns the statistics as a printable table.
+        """
+        lines = [f"{'Call':<12}{'Count':>8}{'Failed':>8}{'Mean (s)':>10}{'Max (s)':>10}{'Sum (s)':>10}"]
+        for kind, values in self.latencies.items():
+            lines.append(f"{kind:<12}{len(values):>8}{self.failures[kind]:>8}"
+                         f"{sum(values) / len(values):>10.3f}{max(values):>10.3f}{sum(values):>10.3f}")
+        lines.append(f"Fetch stage wall time : {self.total:.3f}s")
+        return "\n".join(lines)
+
+def with_retry(func, kind, stats=None, rate_limiter=None, retries=FETCH_RETRIES, backoff=FETCH_BACKOFF):
+    """
+    Wraps a network call with rate limiting, retries with exponential backoff and latency recording (FetchStats and
+    the 'fetch: <kind>' stage of the pipeline timer).
+
+    Args:
+        func (callable): The call to wrap.
+        kind (str): Name of the call in the statistics (e.g. 'history').
+        stats (FetchStats, optional): Where the latency of each attempt is recorded.
+        rate_limiter (RateLimiter, optional): Limiter of the provider, waited before each attempt.
+        retries (int): Number of retries after a failed attempt.
+        backoff (float): Delay before the first retry, in seconds ; doubled on each retry.
+
+    Returns:
+        callable: The wrapped call ; it raises the last error once the retries are exhausted.
+    """
+    def wrapped(*args, **kwargs):
+        for attempt in range(retries + 1):
+            if rate_limiter:
+                rate_limiter.wait()
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                stage_timer.record(f'fetch: {kind}', time.perf_counter() - start)
+                if stats:
+                    stats.record(kind, time.perf_counter() - start, failed=True)
+                if attempt == retries:
+                    raise
+                print(f"{kind} call failed ({e}), retry in {backoff * 2 ** attempt:.1f}s")
+                time.sleep(backoff * 2 ** attempt)
+            else:
+                stage_timer.record(f'fetch: {kind}', time.perf_counter() - start)
+                if stats:
+                    stats.record(kind, time.perf_counter() - start)
+                return result
+    return wrapped
+
+def yahoo_history(yahoo_ticker, start, end, timeout=FETCH_TIMEOUT):
+    """
+    Default price provider : daily history of a ticker from Yahoo Finance.
+
+    A provider is any callable `provider(yahoo_ticker, start, end)` returning a history shaped like
+    `yf.Ticker(...).history()` ('Date' index or column, Open/High/Low/Close/... columns). `end` is exclusive.
+    """
+    return yf.Ticker(yahoo_ticker).history(start=start, end=end, timeout=timeout)
+
+def yahoo_bulk_history(yahoo_tickers, start, end, timeout=FETCH_TIMEOUT):
+    """
+    Bulk price provider : daily history of several tickers from Yahoo Finance, in one multi-symbol request.
+
+    A bulk provider is any callable `bulk_provider(yahoo_tickers, start, end)` returning a dict
+    yahoo_ticker -> history (same layout as a single provider). A ticker which failed is absent or empty.
+    """
+    data = yf.download(list(yahoo_tickers), start=start, end=end, group_by='ticker', auto_adjust=True, actions=True,
+                       progress=False, timeout=timeout, multi_level_index=True)
+    if data is None or data.empty:
+        return {}
+    downloaded = set(data.columns.get_level_values(0))
+    return {ticker: data[ticker].dropna(how='all') for ticker in yahoo_tickers if ticker in downloaded}
+
+def yahoo_metadata(yahoo_ticker):
+    """
+    Descriptive data of a ticker from Yahoo Finance.
+
+    Returns:
+        dict: 'Asset Type', 'Sector' and 'Geographical Location' of the instrument.
+    """
+    info = yf.Ticker(yahoo_ticker).info
+    return {
+        'Asset Type': info.get('quoteType', 'Unknown').capitalize(),
+        'Sector': info.get('sector', 'Unknown'),
+        'Geographical Location': info.get('country', 'Unknown'),
+    }
+
+UNKNOWN_METADATA = {'Asset Type': 'Unknown', 'Sector': 'Unknown', 'Geographical Location': 'Unknown'}
+
+def fetch_instruments(jobs, get_history, get_metadata, start, end, max_workers=FETCH_MAX_WORKERS):
+    """
+    Fetches the price history and the metadata of several instruments concurrently.
+
+    Each instrument is handled by one worker of a bounded thread pool ; results are yielded as soon as they
+    arrive, so that the caller can process an instrument while the others are still downloading.
+
+    Args:
+        jobs (list): (ISIN, yahoo_ticker) pairs. A job without ticker is yielded immediately, without history.
+        get_history (callable): `get_history(yahoo_ticker, start, end)` -> price history (e.g. PriceStore.get_history).
+            None when the prices come from a bulk download : only the metadata is fetched.
+        get_metadata (callable): `get_metadata(yahoo_ticker)` -> dict of metadata (e.g. yahoo_metadata).
+            None when the metadata comes from elsewhere (MetadataCache) : only the prices are fetched.
+        start, end (datetime): The date range of the histories (`end` exclusive).
+        max_workers (int): Size of the worker pool (default: FETCH_MAX_WORKERS).
+
+    Yields:
+        tuple: (ISIN, yahoo_ticker, history, metadata). history and metadata are None when they were not asked
+        for or could not be fetched.
+
+    Example:
+        >>> for isin, ticker, history, metadata in fetch_instruments(jobs, store.get_history, yahoo_metadata, start, end):
+        ...     print(isin, len(history))
+    """
+    def fetch_one(isin, yahoo_ticker):
+        history = None
+        if get_history:
+            try:
+                history = get_history(yahoo_ticker, start, end)
+            except Exception as e:
+                print(f"Unable to fetch prices of {yahoo_ticker}: {e}")
+        metadata = None
+        if get_metadata:
+            try:
+                metadata = get_metadata(yahoo_ticker)
+            except Exception as e:
+                print(f"Unable to fetch metadata of {yahoo_ticker}: {e}")
+        return isin, yahoo_ticker, history, metadata
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for isin, yahoo_ticker in jobs:
+            if not yahoo_ticker:
+                print(f"Invalid or missing ticker: {yahoo_ticker}")
+                yield isin, yahoo_ticker, None, None
+                continue
+            futures.append(executor.submit(fetch_one, isin, yahoo_ticker))
+        for future in as_completed(futures):
+            yield future.result()
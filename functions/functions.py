@@ -15,8 +15,6 @@ from Config.config import *
 import os
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
-import tkinter as tk
-from tkinter import messagebox
 import platform
 import queue
 import time
@@ -26,12 +24,24 @@ def sanitize_filename(filename):
     # Remove any characters that are not allowed in filenames (such as slashes, colons, etc.)
     return re.sub(r'[\\/*?:"<>|]', "_", filename)
 
+def png_filename(title, plot, idx=None):
+    """
+    File name of a figure exported as PNG : the title of its axes, else the key of the plot (with the position of
+    the figure when the plot is a list of figures).
+    """
+    # Get the plot's title (handling cases where the title might be missing or empty)
+    default_title = f"{title}_plot_{idx+1}" if idx is not None else f"{title}"
+    plot_title = plot.gca().get_title() if plot.gca().get_title() else default_title
+    return f'{sanitize_filename(plot_title)}.png'
+
 def create_output_folder(date_folder) :
     os.makedirs(date_folder, exist_ok=True)
 
 # Create a class to handle the popup
 class NonClosablePopup:
     def __init__(self, title, message, command_queue):
+        # Imported here : the batch mode runs without tkinter
+        import tkinter as tk
         self.command_queue = command_queue
         self.root = tk.Tk()
         self.root.withdraw()  # Hide the root window
@@ -100,6 +110,9 @@ def show_popup(title, message):
     Example usage:
     show_popup("Information", "This is a message!")
     """
+    # Imported here : the batch mode runs without tkinter
+    import tkinter as tk
+    from tkinter import messagebox
     # Create the root window (it won't appear)
     root = tk.Tk()
     root.withdraw()  # Hide the root window
@@ -127,14 +140,23 @@ def open_system(path):
     except Exception as e:
         print(f"An error occurred while trying to open the folder: {e}")
 
-def export_df_csv(OutputFolder,df):
+def notify(title, message, popup=True):
+    """
+    Tells the user that an action is done : a popup in the UI, a console line in batch mode (popup=False).
+    """
+    if popup:
+        show_popup(title, message)
+    else:
+        print(f"{title}: {message}")
+
+def export_df_csv(OutputFolder,df, popup=True):
 # Define the output file path inside the new subfolder
     output_file = os.path.join(OutputFolder, 'output_file.csv')
     # Export the DataFrame to the CSV file in the 'output' folder
     df.to_csv(output_file, index=False)
-    show_popup('Data exported to csv', f'Data exported to {output_file}')
+    notify('Data exported to csv', f'Data exported to {output_file}', popup)
 
-def plots_saveAs_OnePDF(pdf_filepath, plots_dict):
+def plots_saveAs_OnePDF(pdf_filepath, plots_dict, popup=True):
     """
     Save multiple plots into a single PDF file.
 
@@ -149,6 +171,9 @@ def plots_saveAs_OnePDF(pdf_filepath, plots_dict):
     plots_dict : dict
         A dictionary where the keys are titles (strings) and the values are plot objects (matplotlib figures or lists of figures).
         Each entry in the dictionary represents a plot or a list of plots that will be saved into the PDF.
+
+    popup : bool, optional
+        Show a popup once done (default). False prints the message instead (batch mode).
     
     The function will iterate over the dictionary, and for each plot or list of plots:
     - It will save each plot to the provided PDF file.
@@ -184,10 +209,10 @@ def plots_saveAs_OnePDF(pdf_filepath, plots_dict):
                 pdf.savefig(plot)  # Save the current plot (figure) to the PDF
                 plt.close(plot)    # Close the plot after saving
                 plt.close(plot)    # Close the plot after saving
-    show_popup('Report exported to pdf', f'Report exported to {pdf_filepath}')
+    notify('Report exported to pdf', f'Report exported to {pdf_filepath}', popup)
 
 
-def plots_saveAs_PNG(outputFolderPath, plots_dict):
+def plots_saveAs_PNG(outputFolderPath, plots_dict, popup=True):
     """
     Save multiple plots as PNG files in a specified folder.
 
@@ -203,6 +228,9 @@ def plots_saveAs_PNG(outputFolderPath, plots_dict):
         A dictionary where the keys are titles (strings) and the values are plot objects (matplotlib figures or lists of figures).
         Each entry in the dictionary represents a plot or a list of plots that will be saved as PNG files.
 
+    popup : bool, optional
+        Show a popup once done (default). False prints the message instead (batch mode).
+
     The function will iterate over the dictionary and save each plot to the specified folder. If a plot has no title, 
     the function will generate a default title. After saving each plot, it will be closed to free up memory.
 
@@ -226,17 +254,11 @@ def plots_saveAs_PNG(outputFolderPath, plots_dict):
     for title, plot in plots_dict.items():  # title is the key, plot is the figure object
         if isinstance(plot, list):  # Check if the plot is a list of figures
             for idx, p in enumerate(plot):
-                # Get the plot's title (handling cases where the title might be missing or empty)
-                plot_title = p.gca().get_title() if p.gca().get_title() else f"{title}_plot_{idx+1}"
-                sanitized_title = sanitize_filename(plot_title)  # Sanitize the title
-                p.savefig(os.path.join(outputFolderPath, f'{sanitized_title}.png'))
+                p.savefig(os.path.join(outputFolderPath, png_filename(title, p, idx)))
                 plt.close(p)  # Close the plot after saving
         else:
-            # Get the plot's title (handling cases where the title might be missing or empty)
-            plot_title = plot.gca().get_title() if plot.gca().get_title() else f"{title}"
-            sanitized_title = sanitize_filename(plot_title)  # Sanitize the title
-            plot.savefig(os.path.join(outputFolderPath, f'{sanitized_title}.png'))
+            plot.savefig(os.path.join(outputFolderPath, png_filename(title, plot)))
             plt.close(plot)  # Close the plot after saving
 
-    show_popup('Plots exported as PNG', f'Imgs exported to {outputFolderPath}')
+    notify('Plots exported as PNG', f'Imgs exported to {outputFolderPath}', popup)
 
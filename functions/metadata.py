@@ -0,0 +1,187 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Instrument metadata (asset type, sector, country) cache with a time-to-live
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+import threading
+import os
+from contextlib import closing
+from datetime import datetime, timedelta
+import pandas as pd
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.fetching import fetch_instruments
+
+# Dataset columns filled from the metadata
+METADATA_COLUMNS = ['Asset Type', 'Sector', 'Geographical Location']
+
+class MetadataCache:
+    """
+    Persistent cache (SQLite) of the instrument metadata, keyed by ISIN, with a time-to-live.
+
+    The metadata of an instrument almost never changes : an entry younger than the TTL is used as is, an older one
+    is fetched again.
+
+    Example:
+        >>> cache = MetadataCache('cache/metadata.db', ttl_days=30)
+        >>> cache.get_fresh(['NL0010273215'])
+        {'NL0010273215': {'Asset Type': 'Equity', 'Sector': 'Technology', 'Geographical Location': 'Netherlands'}}
+    """
+
+    def __init__(self, db_path, ttl_days=METADATA_TTL_DAYS):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Its folder is created if needed.
+            ttl_days (float): Time-to-live of an entry, in days (default: METADATA_TTL_DAYS).
+        """
+        self.db_path = db_path
+        self.ttl = timedelta(days=ttl_days)
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS instrument_metadata (
+                ISIN TEXT PRIMARY KEY,
+                Ticker TEXT,
+                "Asset Type" TEXT,
+                Sector TEXT,
+                "Geographical Location" TEXT,
+                Updated TEXT NOT NULL)''')
+            conn.commit()
+
+    def get_fresh(self, isins):
+        """
+        Returns the cached metadata younger than the TTL, as a dict ISIN -> metadata dict.
+        Unknown or expired ISINs are absent from the dict.
+        """
+        isins = list(isins)
+        oldest = (datetime.now() - self.ttl).isoformat(timespec='seconds')
+        fresh = {}
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            # Stay under the SQLite variables limit
+            for i in range(0, len(isins), 500):
+                chunk = isins[i:i + 500]
+                rows = conn.execute(
+                    'SELECT ISIN, "Asset Type", Sector, "Geographical Location" FROM instrument_metadata '
+                    f'WHERE Updated >= ? AND ISIN IN ({", ".join(["?"] * len(chunk))})', (oldest, *chunk)
+                ).fetchall()
+                for isin, *values in rows:
+                    fresh[isin] = dict(zip(METADATA_COLUMNS, values))
+        return fresh
+
+    def save(self, isin, yahoo_ticker, metadata):
+        """
+        Stores (or refreshes) the metadata of an instrument.
+        """
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.execute('INSERT OR REPLACE INTO instrument_metadata (ISIN, Ticker, "Asset Type", Sector, '
+                         '"Geographical Location", Updated) VALUES (?, ?, ?, ?, ?, ?)',
+                         (isin, yahoo_ticker, *[metadata[column] for column in METADATA_COLUMNS],
+                          datetime.now().isoformat(timespec='seconds')))
+            conn.commit()
+
+class MetadataEnrichment:
+    """
+    Fetches the metadata of the instruments missing from the cache, through the concurrent fetch stage, either
+    right away (run) or in a background thread (start), so that the valuation and the charts are not blocked on it.
+
+    Successful lookups are saved in the cache ; failed ones are retried on the next run.
+
+    Example:
+        >>> enrichment = MetadataEnrichment(jobs, cache, yahoo_metadata)
+        >>> enrichment.start()
+        >>> ...  # valuation, charts
+        >>> enrichment.add_done_callback(lambda enrichment: enrichment.apply(instruments_df))
+    """
+
+    def __init__(self, jobs, cache, get_metadata, max_workers=FETCH_MAX_WORKERS):
+        """
+        Args:
+            jobs (list): (ISIN, yahoo_ticker) pairs to enrich.
+            cache (MetadataCache): Where the results are saved.
+            get_metadata (callable): `get_metadata(yahoo_ticker)` -> dict of metadata (e.g. yahoo_metadata).
+            max_workers (int): Size of the worker pool.
+        """
+        self.jobs = [(isin, yahoo_ticker) for isin, yahoo_ticker in jobs if yahoo_ticker]
+        self.cache = cache
+        self.get_metadata = get_metadata
+        self.max_workers = max_workers
+        self.metadata = {}
+        self.thread = None
+        self.finished = False
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def run(self):
+        """
+        Fetches the metadata in the calling thread, then calls the done callbacks.
+        """
+        try:
+            for isin, yahoo_ticker, history, metadata in fetch_instruments(self.jobs, None, self.get_metadata, None, None,
+                                                                           max_workers=self.max_workers):
+                if metadata is None:
+                    continue
+                self.cache.save(isin, yahoo_ticker, metadata)
+                self.metadata[isin] = metadata
+        finally:
+            with self.lock:
+                self.finished = True
+                callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback(self)
+        return self.metadata
+
+    def add_done_callback(self, callback):
+        """
+        Calls `callback(enrichment)` once the metadata is fetched : right away when it already is, else from the
+        thread fetching it (so it must not draw anything itself).
+        """
+        with self.lock:
+            if not self.finished:
+                self.callbacks.append(callback)
+                return
+        callback(self)
+
+    def start(self):
+        """
+        Fetches the metadata in a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def done(self):
+        return self.thread is None or not self.thread.is_alive()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.done()
+
+    def apply(self, instruments_df):
+        """
+        Fills the 'Asset Type', 'Sector' and 'Geographical Location' columns of the instrument table with the metadata
+        fetched so far. Rows of other instruments are left untouched.
+
+        Args:
+            instruments_df (pandas.DataFrame): The instrument table, indexed by ISIN (functions.positions.instruments_frame),
+                modified in place.
+
+        Returns:
+            pandas.DataFrame: The same table.
+        """
+        if not self.metadata:
+            return instruments_df
+        for column in METADATA_COLUMNS:
+            values = instruments_df.index.map({isin: metadata[column] for isin, metadata in self.metadata.items()})
+            instruments_df[column] = pd.Series(values, index=instruments_df.index).fillna(instruments_df[column])
+        return instruments_df
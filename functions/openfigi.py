@@ -0,0 +1,167 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Batched ISIN -> ticker mapping through OpenFIGI, with a persistent cache
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import requests
+import sqlite3
+import time
+import os
+from contextlib import closing
+from datetime import datetime
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.fetching import RateLimiter
+
+class OpenFigiMapper:
+    """
+    Maps ISINs to tickers through the OpenFIGI mapping API.
+
+    - All the unresolved ISINs are sent together, in as few POSTs as possible (OPENFIGI_MAX_JOBS jobs per request).
+    - Requests follow the documented per-minute limits, which depend on the presence of an API key.
+    - Every answer, "no mapping found" included, is saved in a local cache table : a known ISIN never hits the
+      network again. HTTP or job errors are not cached and are retried on the next run.
+
+    Example:
+        >>> mapper = OpenFigiMapper('cache/openfigi.db')
+        >>> mapper.map_isins(['NL0010273215', 'FR0000120578'])
+        {'NL0010273215': 'ASML', 'FR0000120578': 'SAN'}
+    """
+
+    def __init__(self, db_path, api_key=None, url=OPENFIGI_URL, timeout=OPENFIGI_TIMEOUT, session=None):
+        """
+        Args:
+            db_path (str): Path of the SQLite cache file. Its folder is created if needed.
+            api_key (str, optional): The OpenFIGI API key ; it raises the batch size and the rate limit.
+            url (str): The mapping endpoint (default: OPENFIGI_URL), e.g. a local stand-in for tests.
+            timeout (float): Timeout of each request, in seconds.
+            session (requests.Session, optional): The HTTP session to reuse (default: a new one).
+        """
+        self.db_path = db_path
+        self.api_key = api_key
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers.update({"X-OPENFIGI-APIKEY": api_key})
+            self.max_jobs = OPENFIGI_MAX_JOBS_WITH_KEY
+            self.rate_limiter = RateLimiter(*OPENFIGI_RATE_LIMIT_WITH_KEY)
+        else:
+            self.max_jobs = OPENFIGI_MAX_JOBS
+            self.rate_limiter = RateLimiter(*OPENFIGI_RATE_LIMIT)
+
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS figi_mapping (
+                ISIN TEXT PRIMARY KEY,
+                Ticker TEXT,
+                Status TEXT NOT NULL,
+                Updated TEXT NOT NULL)''')
+            conn.commit()
+
+    def get_cached(self, isins):
+        """
+        Returns the cached answers for the given ISINs, as a dict ISIN -> ticker (None when no mapping exists).
+        ISINs never asked before are absent from the dict.
+        """
+        isins = list(isins)
+        cached = {}
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            # Stay under the SQLite variables limit
+            for i in range(0, len(isins), 500):
+                chunk = isins[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT ISIN, Ticker FROM figi_mapping WHERE ISIN IN ({', '.join(['?'] * len(chunk))})", chunk
+                ).fetchall()
+                cached.update(dict(rows))
+        return cached
+
+    def _save(self, results):
+        # results : list of (ISIN, ticker or None, status)
+        now = datetime.now().isoformat(timespec='seconds')
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.executemany('INSERT OR REPLACE INTO figi_mapping (ISIN, Ticker, Status, Updated) VALUES (?, ?, ?, ?)',
+                             [(isin, ticker, status, now) for isin, ticker, status in results])
+            conn.commit()
+
+    def _post(self, jobs):
+        # One mapping request, retried after a full window when the rate limit is hit anyway
+        for attempt in range(OPENFIGI_MAX_RETRIES + 1):
+            self.rate_limiter.wait()
+            response = self.session.post(self.url, json=jobs, timeout=self.timeout)
+            if response.status_code != 429:
+                return response
+            print(f"OpenFIGI rate limit reached, waiting {self.rate_limiter.period}s")
+            time.sleep(self.rate_limiter.period)
+        return response
+
+    def fetch(self, isins):
+        """
+        Asks OpenFIGI for the given ISINs, in batches, and caches the answers. A batch answered with another count
+        of results than of ISINs is skipped, not cached : it is asked again on the next run.
+
+        Returns:
+            dict: ISIN -> ticker (None when no mapping exists) for the ISINs that got an answer.
+        """
+        isins = list(dict.fromkeys(isins))
+        mapping = {}
+        for i in range(0, len(isins), self.max_jobs):
+            batch = isins[i:i + self.max_jobs]
+            jobs = [{"idType": "ID_ISIN", "idValue": isin} for isin in batch]
+            try:
+                response = self._post(jobs)
+            except requests.RequestException as e:
+                print(f"OpenFIGI request failed: {e}")
+                continue
+            if response.status_code != 200:
+                print(f"Error: {response.status_code} - {response.text}")
+                continue
+
+            # One answer per job, in the order of the jobs : answers of another count cannot be matched to the ISINs
+            answers = response.json()
+            if not isinstance(answers, list) or len(answers) != len(batch):
+                count = len(answers) if isinstance(answers, list) else 'no'
+                print(f"OpenFIGI error: {count} answers for {len(batch)} ISINs, batch not cached")
+                continue
+            results = []
+            for isin, answer in zip(batch, answers):
+                if answer.get('data'):
+                    results.append((isin, answer['data'][0].get('ticker'), 'found'))
+                elif 'warning' in answer or 'data' in answer:
+                    results.append((isin, None, 'not found'))
+                else:
+                    print(f"OpenFIGI error for {isin}: {answer.get('error')}")
+            self._save(results)
+            mapping.update({isin: ticker for isin, ticker, status in results})
+        return mapping
+
+    def map_isins(self, isins):
+        """
+        Resolves several ISINs at once : cached answers first, then one batched lookup for the others.
+
+        Returns:
+            dict: ISIN -> ticker, None when no mapping was found or the lookup failed.
+        """
+        isins = [isin for isin in dict.fromkeys(isins) if isinstance(isin, str)]
+        mapping = self.get_cached(isins)
+        unresolved = [isin for isin in isins if isin not in mapping]
+        if unresolved:
+            mapping.update(self.fetch(unresolved))
+        return {isin: mapping.get(isin) for isin in isins}
+
+    def map_isin(self, isin):
+        """
+        Resolves a single ISIN (see map_isins).
+        """
+        return self.map_isins([isin])[isin]
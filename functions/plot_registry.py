@@ -0,0 +1,148 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Lazy, memoized registry of the figures (report, exports and UI tabs)
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+from collections.abc import Mapping
+import matplotlib.pyplot as plt
+
+# ----- From Files
+from functions.profiling import stage_timer
+
+class PlotRegistry(Mapping):
+    """
+    Registry of the figures of the report : each entry is a builder with declared inputs, built on first request
+    and memoized until one of its inputs changes.
+
+    The registry behaves like the dict of figures it replaces (`plots["KPI Plot"]`, `plots.items()`, ...), so the
+    PDF export, the PNG export and the Qt tabs all pull from the same figures, in the order of registration.
+
+    Example:
+        >>> plots = PlotRegistry()
+        >>> plots.register("KPI Plot", plot_KPI, inputs=('today_data',))
+        >>> plots.set_data(today_data=today_data)
+        >>> fig = plots["KPI Plot"]   # built now
+        >>> fig is plots["KPI Plot"]  # memoized
+        True
+        >>> plots.set_data(today_data=other_day)  # the next request builds it again
+    """
+
+    def __init__(self):
+        self.builders = {}     # name -> (builder, inputs)
+        self.data = {}         # input name -> value
+        self.versions = {}     # input name -> version, bumped when the value changes
+        self.derivations = {}  # derived input name -> (function, inputs)
+        self.derived = {}      # derived input name -> (value, versions of the inputs used)
+        self.figures = {}      # name -> (figure or list of figures, versions of the inputs used)
+        self.per_instrument = set()  # names of the lists with one figure per instrument
+
+    def register(self, name, builder, inputs=(), per_instrument=False):
+        """
+        Declares a figure.
+
+        Args:
+            name (str): Key of the figure (e.g. "KPI Plot").
+            builder (callable): Called with the values of `inputs`, in order ; returns a figure or a list of figures.
+            inputs (tuple): Names of the data the figure depends on (see set_data).
+            per_instrument (bool): The builder returns one figure per instrument of its 'instruments' input
+                (InstrumentPartition), so it can be built for a part of the instruments (see build).
+        """
+        self.builders[name] = (builder, tuple(inputs))
+        if per_instrument:
+            self.per_instrument.add(name)
+        else:
+            self.per_instrument.discard(name)
+        self.discard(name)
+
+    def derive(self, name, function, inputs):
+        """
+        Declares an input computed from other inputs (e.g. the dataset split by ISIN), shared by the builders
+        using it, computed on first use and recomputed when one of its own inputs changes.
+        """
+        self.derivations[name] = (function, tuple(inputs))
+        self.derived.pop(name, None)
+
+    def _value(self, key):
+        if key not in self.derivations:
+            return self.data[key]
+        function, inputs = self.derivations[key]
+        versions = self._input_versions(inputs)
+        if key not in self.derived or self.derived[key][1] != versions:
+            self.derived[key] = (function(*[self._value(name) for name in inputs]), versions)
+        return self.derived[key][0]
+
+    def set_data(self, **data):
+        """
+        Sets the inputs of the builders. A value which is not the same object as before invalidates the figures
+        depending on it.
+        """
+        for key, value in data.items():
+            if key in self.data and self.data[key] is value:
+                continue
+            self.data[key] = value
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _input_versions(self, inputs):
+        return tuple(self._input_versions(self.derivations[key][1]) if key in self.derivations else self.versions.get(key, 0)
+                     for key in inputs)
+
+    def is_built(self, name):
+        """
+        True when the figure is memoized and up to date.
+        """
+        builder, inputs = self.builders[name]
+        return name in self.figures and self.figures[name][1] == self._input_versions(inputs)
+
+    def __getitem__(self, name):
+        builder, inputs = self.builders[name]
+        if not self.is_built(name):
+            self.discard(name)
+            # Versions read before building : data set meanwhile (e.g. from a background thread) rebuilds it next time
+            versions = self._input_versions(inputs)
+            with stage_timer.stage(f'plot: {name}'):
+                figure = builder(*[self._value(key) for key in inputs])
+            self.figures[name] = (figure, versions)
+        return self.figures[name][0]
+
+    def build(self, name, isins=None):
+        """
+        Builds the figures of an entry for some instruments only (e.g. one chunk of an export), without memoizing them.
+
+        Args:
+            name (str): A per-instrument entry.
+            isins (list, optional): The instruments to draw ; all of them (memoized figure) when None.
+
+        Returns:
+            list: The figures, in the order of `isins`.
+        """
+        if isins is None:
+            figure = self[name]
+            return figure if isinstance(figure, list) else [figure]
+        builder, inputs = self.builders[name]
+        args = [self._value(key).subset(isins) if key == 'instruments' else self._value(key) for key in inputs]
+        with stage_timer.stage(f'plot: {name}'):
+            return builder(*args)
+
+    def __iter__(self):
+        return iter(self.builders)
+
+    def __len__(self):
+        return len(self.builders)
+
+    def discard(self, name=None):
+        """
+        Forgets (and closes) a memoized figure, or all of them when name is None.
+        """
+        names = list(self.figures) if name is None else [name]
+        for key in names:
+            if key not in self.figures:
+                continue
+            figure = self.figures.pop(key)[0]
+            for fig in figure if isinstance(figure, list) else [figure]:
+                plt.close(fig)
@@ -0,0 +1,420 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Dense date x instrument position engine
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import numpy as np
+import pandas as pd
+
+# Columns of the daily dataset joined with its instruments (former wide layout, CSV export), in output order
+CUMULATIVE_COLUMNS = [
+    'Date', 'Products', 'ISIN', 'Place', 'Exec Place',
+    'Qty', 'Buying_value', 'Actual_value',
+    'Asset Type', 'Sector', 'Geographical Location', 'test fifo'
+]
+
+# Descriptive columns, constant per instrument : one row per ISIN in the instrument table
+INSTRUMENT_COLUMNS = ['Products', 'Place', 'Exec Place', 'Asset Type', 'Sector', 'Geographical Location']
+DIMENSION_COLUMNS = ['ISIN'] + INSTRUMENT_COLUMNS
+
+# Columns of the daily fact table : date, instrument key (categorical ISIN) and measures
+FACT_COLUMNS = ['Date', 'ISIN', 'Qty', 'Buying_value', 'Actual_value', 'test fifo']
+
+# dtype of each measure : quantities are whole shares (int32), the amounts and the FIFO cost stay in float64 so that
+# the cost basis keeps every digit of the former loop
+MEASURE_DTYPES = {
+    'Qty': 'int32',
+    'Buying_value': 'float64',
+    'Actual_value': 'float64',
+    'test fifo': 'float64',
+}
+
+def build_position_arrays(df, date_range, isins):
+    """
+    Pivots the transactions into dense (dates x instruments) arrays.
+
+    Each transaction is added into the cell of its trading day and of its instrument, so several
+    trades on the same day for the same ISIN are summed, like the former per-day masks did.
+
+    Args:
+        df (pandas.DataFrame): The DEGIRO transactions, with the 'FIFO Unit Cost' column already computed.
+            Index 0 is the trading date, index 3 the ISIN, index 6 the quantity and index 16 the traded amount.
+        date_range (pandas.DatetimeIndex): The daily calendar of the dataset.
+        isins (list): The instruments to keep, in output order.
+
+    Returns:
+        tuple: Three arrays of shape (len(date_range), len(isins)):
+            - quantities: traded quantity per day (int64).
+            - amounts: traded amount per day, sign inverted (a buy is a positive investment).
+            - fifo_costs: sum of the FIFO unit costs of the sales of the day.
+    """
+    shape = (len(date_range), len(isins))
+    quantities = np.zeros(shape, dtype='int64')
+    amounts = np.zeros(shape, dtype='float64')
+    fifo_costs = np.zeros(shape, dtype='float64')
+
+    # Row (date) and column (instrument) position of every transaction
+    date_pos = date_range.get_indexer(pd.to_datetime(df.iloc[:, 0]))
+    isin_pos = pd.Index(isins).get_indexer(df.iloc[:, 3])
+    keep = (date_pos >= 0) & (isin_pos >= 0)
+    date_pos, isin_pos = date_pos[keep], isin_pos[keep]
+
+    # Unbuffered adds, so that trades sharing a cell are accumulated
+    np.add.at(quantities, (date_pos, isin_pos), df.iloc[:, 6].to_numpy()[keep].astype('int64'))
+    np.add.at(amounts, (date_pos, isin_pos), -np.nan_to_num(df.iloc[:, 16].to_numpy(dtype='float64')[keep]))
+    np.add.at(fifo_costs, (date_pos, isin_pos), np.nan_to_num(df['FIFO Unit Cost'].to_numpy(dtype='float64')[keep]))
+
+    return quantities, amounts, fifo_costs
+
+def compute_positions(quantities, amounts, fifo_costs, prices, initial_quantity=None, initial_amount=None):
+    """
+    Computes the running quantity, invested amount and market value of every instrument on every day.
+
+    The invested amount follows the rules of the former day-by-day loop:
+        - while the position is closed (running quantity of 0), the invested amount is left untouched;
+        - on a day with a sale (FIFO cost), the invested amount decreases by FIFO cost x sold quantity,
+          so that selling everything deducts exactly what was invested;
+        - otherwise, the traded amount of the day is added.
+    None of these increments depends on the invested amount itself, so the whole recurrence is a cumulative sum.
+
+    Args:
+        quantities (numpy.ndarray): Traded quantity per (date, instrument).
+        amounts (numpy.ndarray): Traded amount per (date, instrument), a buy being positive.
+        fifo_costs (numpy.ndarray): FIFO unit cost of the sales per (date, instrument).
+        prices (numpy.ndarray): Closing price per (date, instrument), 0 when unknown.
+        initial_quantity, initial_amount (numpy.ndarray, optional): Running quantity and invested amount per
+            instrument on the day before the first date (e.g. from a checkpoint) ; 0 by default.
+
+    Returns:
+        tuple: Three arrays of the same shape as the inputs: running quantity, invested amount and market value.
+    """
+    running_quantity = np.cumsum(quantities, axis=0)
+    if initial_quantity is not None:
+        running_quantity += np.asarray(initial_quantity, dtype=running_quantity.dtype)
+
+    increments = np.where(fifo_costs != 0, fifo_costs * quantities, amounts)
+    increments = np.where(running_quantity == 0, 0.0, increments)
+    if initial_amount is not None and len(increments):
+        # Same additions, in the same order, as the cumulative sum over the whole calendar
+        increments[0] += np.asarray(initial_amount, dtype='float64')
+    running_amount = np.cumsum(increments, axis=0)
+
+    market_value = prices * running_quantity
+
+    return running_quantity, running_amount, market_value
+
+def positions_to_frame(date_range, isins, running_quantity, running_amount, market_value, fifo_costs):
+    """
+    Flattens the position arrays into the daily fact table (one row per instrument and per day).
+
+    Rows are ordered by instrument first and by date second. The descriptive columns are not repeated on every
+    row : they live in the instrument table (see instruments_frame and join_instruments).
+
+    Args:
+        date_range (pandas.DatetimeIndex): The daily calendar of the dataset.
+        isins (list): The instruments, in the column order of the arrays.
+        running_quantity, running_amount, market_value, fifo_costs (numpy.ndarray): Arrays of shape
+            (len(date_range), len(isins)).
+
+    Returns:
+        pandas.DataFrame: The fact table, with the columns listed in FACT_COLUMNS, in a compact schema :
+            'Date' as datetime64, 'ISIN' as a categorical (the instrument key) and the measures as in MEASURE_DTYPES.
+    """
+    n_dates, n_isins = len(date_range), len(isins)
+    if n_isins == 0:
+        return empty_positions_frame()
+
+    # Instrument-major layout : transpose then flatten
+    def flat(values, column):
+        return np.asarray(values).T.reshape(-1).astype(MEASURE_DTYPES[column], copy=False)
+
+    # Row i belongs to the instrument i // n_dates : the ISIN is repeated through its code
+    isin_key = pd.Categorical(list(isins))
+    return pd.DataFrame({
+        'Date': np.tile(date_range.normalize().to_numpy(dtype='datetime64[ns]'), n_isins),
+        'ISIN': pd.Categorical.from_codes(np.repeat(isin_key.codes, n_dates), dtype=isin_key.dtype),
+        'Qty': flat(running_quantity, 'Qty'),
+        'Buying_value': flat(running_amount, 'Buying_value'),
+        'Actual_value': flat(market_value, 'Actual_value'),
+        'test fifo': flat(fifo_costs, 'test fifo'),
+    }, columns=FACT_COLUMNS)
+
+def empty_positions_frame():
+    """
+    Returns an empty fact table with the columns and dtypes of positions_to_frame.
+    """
+    dtypes = {'Date': 'datetime64[ns]', 'ISIN': 'category', **MEASURE_DTYPES}
+    return pd.DataFrame({column: pd.Series(dtype=dtypes[column]) for column in FACT_COLUMNS})
+
+def instruments_frame(isins, metadata):
+    """
+    Builds the instrument table : one row per ISIN with its descriptive columns.
+
+    Args:
+        isins (list): The instruments, in output order.
+        metadata (pandas.DataFrame): Descriptive columns indexed by ISIN (INSTRUMENT_COLUMNS).
+
+    Returns:
+        pandas.DataFrame: The INSTRUMENT_COLUMNS, indexed by 'ISIN'.
+    """
+    instruments_df = metadata.reindex(index=list(isins), columns=INSTRUMENT_COLUMNS)
+    instruments_df.index.name = 'ISIN'
+    return instruments_df
+
+def join_instruments(df, instruments_df, columns=None):
+    """
+    Adds descriptive columns of the instrument table to rows of the fact table (or of a view of it), for the views
+    needing them (pies, pivot table, CSV export, ...). The columns are built as categoricals from the codes of the
+    'ISIN' key, so the cost is one integer per row and per column.
+
+    Args:
+        df (pandas.DataFrame): Rows with an 'ISIN' column (e.g. cumulative_df or today's rows).
+        instruments_df (pandas.DataFrame): The instrument table (see instruments_frame) ; None returns `df` as is.
+        columns (list, optional): The columns to add (default: all the INSTRUMENT_COLUMNS). Columns already in
+            `df` are kept.
+
+    Returns:
+        pandas.DataFrame: A new frame, its columns in the order of CUMULATIVE_COLUMNS then the other columns of `df`.
+
+    Example:
+        >>> today_data = join_instruments(cumulative_df[cumulative_df['Date'] == today], instruments_df)
+        >>> by_product = join_instruments(cumulative_df, instruments_df, ['Products'])
+    """
+    if instruments_df is None:
+        return df
+    columns = [column for column in (INSTRUMENT_COLUMNS if columns is None else columns) if column not in df]
+    isin = df['ISIN'].astype('category')
+    # Row of the instrument table of each row of df (-1 : unknown instrument)
+    keys = instruments_df.index.get_indexer(isin.cat.categories)
+    keys = np.append(keys, -1)[isin.cat.codes.to_numpy()]
+    added = {}
+    for column in columns:
+        values = pd.Categorical(instruments_df[column])
+        codes = np.where(keys >= 0, values.codes[keys], -1)
+        added[column] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+    order = [column for column in CUMULATIVE_COLUMNS if column in df or column in added]
+    order += [column for column in df.columns if column not in order]
+    return pd.DataFrame({column: added[column] if column in added else df[column] for column in order}, index=df.index)
+
+def legacy_layout(df, instruments_df=None):
+    """
+    Returns the fact table joined with its instruments in the former layout : Python `date` objects, one string
+    object per row for the descriptive columns, int64 quantities and float64 amounts. Only used to measure what the
+    compact schema saves (see functions.profiling.memory_report).
+    """
+    legacy = join_instruments(df, instruments_df).copy()
+    legacy['Date'] = pd.Series(legacy['Date'].dt.date, index=legacy.index, dtype=object)
+    for column in DIMENSION_COLUMNS:
+        legacy[column] = legacy[column].astype(object)
+    for column in MEASURE_DTYPES:
+        legacy[column] = legacy[column].astype('int64' if column == 'Qty' else 'float64')
+    return legacy
+
+class SparsePositions:
+    """
+    Sparse storage of the daily fact table : each instrument is only recorded over its holding intervals (days
+    with a non-zero quantity, invested amount, value or FIFO cost), as runs of consecutive days with the same
+    measures. A position held flat over a week-end or bought and left untouched for months is one row ; days
+    before the first buy and after the last sale are not stored at all (implicit zeros).
+
+    The dense daily rows are only materialized on request (to_frame), for the whole calendar or for some
+    instruments / dates.
+
+    Example:
+        >>> sparse_positions = SparsePositions.from_arrays(date_range, isins, running_quantity, running_amount,
+        ...                                                market_value, fifo_costs)
+        >>> len(sparse_positions), len(date_range) * len(isins)  # stored runs vs dense rows
+        >>> sparse_positions.to_frame(isins=['NL0010273215'])     # dense rows of one instrument
+        >>> sparse_positions.to_frame(active_only=True)           # daily rows of the holding intervals only
+    """
+
+    def __init__(self, runs, date_range, isins):
+        """
+        Args:
+            runs (pandas.DataFrame): One row per run : 'ISIN' (categorical), 'Start' (first day), 'Days' (length)
+                and the measures of MEASURE_DTYPES, ordered by instrument then by date.
+            date_range (pandas.DatetimeIndex): The daily calendar of the dataset.
+            isins (list): The instruments, in output order.
+        """
+        self.runs = runs
+        self.date_range = date_range
+        self.isins = list(isins)
+        self.isin_dtype = pd.Categorical(self.isins).dtype
+
+    @classmethod
+    def from_arrays(cls, date_range, isins, running_quantity, running_amount, market_value, fifo_costs):
+        """
+        Run-length encodes the position arrays of compute_positions (shape (len(date_range), len(isins))).
+        """
+        n_dates, n_isins = len(date_range), len(isins)
+        # Instrument-major layout, as positions_to_frame
+        measures = {
+            column: np.asarray(values).T.reshape(n_isins, n_dates).astype(MEASURE_DTYPES[column], copy=False)
+            for column, values in zip(MEASURE_DTYPES, (running_quantity, running_amount, market_value, fifo_costs))
+        }
+        # A run starts on the first day of each instrument and on each day one of the measures changes
+        change = np.ones((n_isins, n_dates), dtype=bool)
+        change[:, 1:] = np.logical_or.reduce([values[:, 1:] != values[:, :-1] for values in measures.values()])
+        active = np.logical_or.reduce([values != 0 for values in measures.values()])
+
+        starts = np.flatnonzero(change)
+        days = np.diff(np.append(starts, n_isins * n_dates))
+        # Runs of zeros (before the first buy, after the last sale) are not stored
+        keep = active.reshape(-1)[starts]
+        starts, days = starts[keep], days[keep]
+        instrument, first_day = np.divmod(starts, n_dates)
+
+        isin_key = pd.Categorical(list(isins))
+        runs = pd.DataFrame({
+            'ISIN': pd.Categorical.from_codes(isin_key.codes[instrument], dtype=isin_key.dtype),
+            'Start': date_range.normalize().to_numpy(dtype='datetime64[ns]')[first_day],
+            'Days': days.astype('int32'),
+            **{column: values.reshape(-1)[starts] for column, values in measures.items()},
+        })
+        return cls(runs, date_range, isins)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def holding_intervals(self):
+        """
+        Returns the holding intervals : consecutive runs of an instrument merged.
+
+        Returns:
+            pandas.DataFrame: 'ISIN', 'First' and 'Last' (dates included) of each interval.
+        """
+        start = self.runs['Start']
+        end = start + pd.to_timedelta(self.runs['Days'], unit='D')
+        isin = self.runs['ISIN']
+        # A new interval when the instrument changes or when the previous run did not end the day before
+        new = (isin != isin.shift()) | (start != end.shift())
+        interval = new.cumsum()
+        return pd.DataFrame({
+            'ISIN': isin[new].to_numpy(),
+            'First': start[new].to_numpy(),
+            'Last': (end.groupby(interval).last() - pd.Timedelta(days=1)).to_numpy(),
+        })
+
+    def clip(self, until):
+        """
+        Returns the positions up to a date (included) : the calendar and the runs are cut at that date.
+        """
+        until = pd.Timestamp(until).normalize()
+        date_range = self.date_range[self.date_range.normalize() <= until]
+        runs = self.runs[self.runs['Start'] <= until].copy()
+        last_day = (until - runs['Start']).dt.days + 1
+        runs['Days'] = np.minimum(runs['Days'], last_day).astype('int32')
+        return SparsePositions(runs.reset_index(drop=True), date_range, self.isins)
+
+    def extend(self, newer):
+        """
+        Appends the positions of the following days (e.g. valued since a checkpoint) : the calendars are chained,
+        the new instruments added after the known ones, and a run continuing over the junction is merged back into
+        one run.
+
+        Args:
+            newer (SparsePositions): Positions of the days after the last date of this calendar.
+
+        Returns:
+            SparsePositions: The positions over both calendars.
+        """
+        isins = self.isins + [isin for isin in newer.isins if isin not in self.isins]
+        isin_dtype = pd.Categorical(isins).dtype
+        runs = pd.concat([part.runs.astype({'ISIN': object}) for part in (self, newer)], ignore_index=True)
+        # Instrument-major order, then by date
+        order = np.lexsort((runs['Start'].to_numpy(), pd.Index(isins).get_indexer(runs['ISIN'])))
+        runs = runs.iloc[order].reset_index(drop=True)
+
+        # A run continues the previous one when same instrument, contiguous days and same measures
+        end = runs['Start'] + pd.to_timedelta(runs['Days'], unit='D')
+        same = (runs['ISIN'] == runs['ISIN'].shift()) & (runs['Start'] == end.shift())
+        for column in MEASURE_DTYPES:
+            same &= runs[column] == runs[column].shift()
+        group = (~same).cumsum()
+        merged = runs.groupby(group, sort=False).agg({'ISIN': 'first', 'Start': 'first', 'Days': 'sum',
+                                                      **{column: 'first' for column in MEASURE_DTYPES}})
+        merged['ISIN'] = pd.Categorical(merged['ISIN'], dtype=isin_dtype)
+        merged['Days'] = merged['Days'].astype('int32')
+        merged = merged.astype(MEASURE_DTYPES).reset_index(drop=True)
+        return SparsePositions(merged, self.date_range.append(newer.date_range), isins)
+
+    def to_frame(self, isins=None, dates=None, active_only=False):
+        """
+        Materializes daily fact rows (FACT_COLUMNS), identical to the ones of positions_to_frame.
+
+        Args:
+            isins (list, optional): The instruments (default: all), in output order.
+            dates (list, optional): The dates (default: the whole calendar), in any order.
+            active_only (bool): Only the rows of the holding intervals (no row of zeros).
+
+        Returns:
+            pandas.DataFrame: The rows, ordered by instrument then by date.
+        """
+        isins = self.isins if isins is None else list(isins)
+        dates = self.date_range.normalize() if dates is None else pd.DatetimeIndex(dates).normalize().sort_values()
+        n_dates = len(dates)
+        runs = self.runs[self.runs['ISIN'].isin(isins)] if isins != self.isins else self.runs
+
+        # Dates of `dates` covered by each run : [first, end[
+        run_start = runs['Start'].to_numpy()
+        first = dates.searchsorted(run_start)
+        end = dates.searchsorted(run_start + pd.to_timedelta(runs['Days'], unit='D').to_numpy())
+        counts = end - first
+        # Position of the covered rows in the instrument-major grid of (isins x dates)
+        instrument = pd.Index(isins).get_indexer(runs['ISIN'].astype(object))
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.repeat(instrument * n_dates + first, counts) + offsets
+
+        if active_only:
+            order = np.argsort(rows, kind='stable')
+            rows = rows[order]
+            measures = {column: np.repeat(runs[column].to_numpy(), counts)[order] for column in MEASURE_DTYPES}
+        else:
+            measures = {}
+            for column, dtype in MEASURE_DTYPES.items():
+                values = np.zeros(len(isins) * n_dates, dtype=dtype)
+                values[rows] = np.repeat(runs[column].to_numpy(), counts)
+                measures[column] = values
+            rows = np.arange(len(isins) * n_dates)
+
+        isin_codes = pd.Categorical(isins, dtype=self.isin_dtype).codes
+        return pd.DataFrame({
+            'Date': dates.to_numpy(dtype='datetime64[ns]')[rows % max(n_dates, 1)],
+            'ISIN': pd.Categorical.from_codes(isin_codes[rows // max(n_dates, 1)], dtype=self.isin_dtype),
+            **measures,
+        }, columns=FACT_COLUMNS)
+
+def create_positions_df(df, date_range, isins, prices, metadata, sparse=False):
+    """
+    Runs the position engine : transactions and prices in, daily dataset out.
+
+    Args:
+        df (pandas.DataFrame): The DEGIRO transactions, with the 'FIFO Unit Cost' column.
+        date_range (pandas.DatetimeIndex): The daily calendar of the dataset.
+        isins (list): The instruments to value, in output order.
+        prices (numpy.ndarray): Closing price per (date, instrument), 0 when unknown.
+        metadata (pandas.DataFrame): Descriptive columns indexed by ISIN (see instruments_frame).
+        sparse (bool): Return the daily positions as SparsePositions (holding intervals only) instead of the
+            dense fact table.
+
+    Returns:
+        tuple:
+            - pandas.DataFrame or SparsePositions: The daily fact table (see FACT_COLUMNS).
+            - pandas.DataFrame: The instrument table, one row per ISIN (see INSTRUMENT_COLUMNS).
+
+    Example:
+        >>> cumulative_df, instruments_df = create_positions_df(df, date_range, ['NL0010273215'], prices, metadata)
+    """
+    quantities, amounts, fifo_costs = build_position_arrays(df, date_range, isins)
+    running_quantity, running_amount, market_value = compute_positions(quantities, amounts, fifo_costs, prices)
+    if sparse:
+        cumulative_df = SparsePositions.from_arrays(date_range, isins, running_quantity, running_amount, market_value, fifo_costs)
+    else:
+        cumulative_df = positions_to_frame(date_range, isins, running_quantity, running_amount, market_value, fifo_costs)
+    return cumulative_df, instruments_frame(isins, metadata)
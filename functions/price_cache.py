@@ -0,0 +1,323 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Persistent local price store, only the missing dates are fetched online
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import pandas as pd
+import sqlite3
+import os
+from collections import defaultdict
+from contextlib import closing
+
+# ----- From Files
+from functions.prices import normalize_history
+from functions.fetching import yahoo_history, yahoo_bulk_history
+
+# Price columns kept in the store, named as in a Yahoo Finance history
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+# An empty answer over a longer range is more likely a failed call than a market closure : it is not marked as covered
+MAX_EMPTY_COVERED_DAYS = 7
+
+class PriceStore:
+    """
+    On-disk price cache (SQLite), keyed by Yahoo ticker and date, which survives across runs.
+
+    Next to the prices, the store records which date ranges were already asked to the provider for each ticker
+    (a range without any price, like a week-end, is covered as well). A request only fetches the gaps of that
+    coverage, usually the last day or two since the previous run.
+
+    The current day is never marked as covered : its close is not final yet, so it is fetched again next time.
+
+    The closes are adjusted for dividends and splits (Yahoo Finance auto-adjust), on the basis of the day they are
+    fetched. When a new dividend or split shows up in a fetched range, the older prices of the ticker are on a former
+    basis : they are dropped with their coverage, and fetched again over the requested range.
+
+    Example:
+        >>> store = PriceStore('cache/prices.db')
+        >>> history = store.get_history('ASML.AS', '2024-01-01', '2025-03-20')
+        >>> # Offline, with a fake provider
+        >>> store = PriceStore(':memory:', provider=lambda ticker, start, end: fake_history)
+    """
+
+    def __init__(self, db_path, provider=yahoo_history, bulk_provider=yahoo_bulk_history):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Its folder is created if needed.
+            provider (callable): Source of the missing prices, one ticker at a time (default: yahoo_history).
+            bulk_provider (callable): Source of the missing prices of several tickers in one request
+                (default: yahoo_bulk_history), used by get_close_frame.
+        """
+        self.db_path = db_path
+        self.provider = provider
+        self.bulk_provider = bulk_provider
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # An in-memory database only lives as long as its connection
+        self._memory_conn = sqlite3.connect(':memory:', check_same_thread=False) if db_path == ':memory:' else None
+        self._create_tables()
+
+    def _connect(self):
+        if self._memory_conn is not None:
+            return _NonClosingConnection(self._memory_conn)
+        return closing(sqlite3.connect(self.db_path, timeout=30))
+
+    def _create_tables(self):
+        with self._connect() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS prices (
+                Ticker TEXT NOT NULL,
+                Date TEXT NOT NULL,
+                Open REAL, High REAL, Low REAL, Close REAL,
+                Volume REAL, Dividends REAL, "Stock Splits" REAL,
+                PRIMARY KEY (Ticker, Date))''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS coverage (
+                Ticker TEXT NOT NULL,
+                Start TEXT NOT NULL,
+                End TEXT NOT NULL)''')
+            conn.commit()
+
+    # ---------------------------------------------------------------- Coverage
+    def get_coverage(self, yahoo_ticker):
+        """
+        Returns the date ranges already fetched for a ticker, as a sorted list of (start, end) Timestamps,
+        `end` being exclusive.
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT Start, End FROM coverage WHERE Ticker = ? ORDER BY Start',
+                                (yahoo_ticker,)).fetchall()
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in rows]
+
+    def missing_ranges(self, yahoo_ticker, start, end):
+        """
+        Returns the parts of [start, end) not covered yet for a ticker, as a list of (start, end) Timestamps.
+        """
+        start, end = _day(start), _day(end)
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.get_coverage(yahoo_ticker):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _add_coverage(self, conn, yahoo_ticker, start, end):
+        # Merge the new range with the overlapping or adjacent ones, so that coverage stays a few rows per ticker
+        rows = conn.execute('SELECT Start, End FROM coverage WHERE Ticker = ? AND Start <= ? AND End >= ?',
+                            (yahoo_ticker, _iso(end), _iso(start))).fetchall()
+        for covered_start, covered_end in rows:
+            start = min(start, pd.Timestamp(covered_start))
+            end = max(end, pd.Timestamp(covered_end))
+        conn.execute('DELETE FROM coverage WHERE Ticker = ? AND Start <= ? AND End >= ?',
+                     (yahoo_ticker, _iso(end), _iso(start)))
+        conn.execute('INSERT INTO coverage (Ticker, Start, End) VALUES (?, ?, ?)',
+                     (yahoo_ticker, _iso(start), _iso(end)))
+
+    # ---------------------------------------------------------------- Prices
+    def _has_new_actions(self, conn, yahoo_ticker, tickers_data):
+        # A dividend or split of the fetched history not stored yet, with older prices stored before it
+        actions = tickers_data[(tickers_data['Dividends'].fillna(0) != 0) | (tickers_data['Stock Splits'].fillna(0) != 0)]
+        if actions.empty:
+            return False
+        stored = conn.execute('SELECT Date, Dividends, "Stock Splits" FROM prices WHERE Ticker = ? AND Date >= ? AND Date <= ?',
+                              (yahoo_ticker, _iso(actions['Date'].min()), _iso(actions['Date'].max()))).fetchall()
+        stored_actions = {date for date, dividends, splits in stored if dividends or splits}
+        new_dates = [date for date in actions['Date'] if _iso(date) not in stored_actions]
+        if not new_dates:
+            return False
+        older = conn.execute('SELECT 1 FROM prices WHERE Ticker = ? AND Date < ? LIMIT 1',
+                             (yahoo_ticker, _iso(min(new_dates)))).fetchone()
+        return older is not None
+
+    def store_history(self, yahoo_ticker, tickers_data, start, end):
+        """
+        Saves a fetched history and marks [start, end) as covered for the ticker. The current day is left uncovered,
+        and so is a long range without any price.
+
+        Returns:
+            bool: True when the history brings a new dividend or split : the older prices of the ticker were dropped
+            with their coverage (former adjustment basis) and must be fetched again.
+        """
+        tickers_data = normalize_history(tickers_data)
+        for column in PRICE_COLUMNS:
+            if column not in tickers_data.columns:
+                tickers_data[column] = None
+        rows = [
+            (yahoo_ticker, _iso(date), *values)
+            for date, *values in tickers_data[['Date'] + PRICE_COLUMNS].itertuples(index=False, name=None)
+        ]
+        end = min(_day(end), _day(pd.Timestamp.today()))
+        with self._connect() as conn:
+            rebased = self._has_new_actions(conn, yahoo_ticker, tickers_data)
+            if rebased:
+                conn.execute('DELETE FROM prices WHERE Ticker = ?', (yahoo_ticker,))
+                conn.execute('DELETE FROM coverage WHERE Ticker = ?', (yahoo_ticker,))
+            conn.executemany('INSERT OR REPLACE INTO prices (Ticker, Date, Open, High, Low, Close, Volume, Dividends, '
+                             '"Stock Splits") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            if _day(start) < end and (rows or end - _day(start) <= pd.Timedelta(days=MAX_EMPTY_COVERED_DAYS)):
+                self._add_coverage(conn, yahoo_ticker, _day(start), end)
+            conn.commit()
+        if rebased:
+            print(f"New dividend or split for {yahoo_ticker}: older prices fetched again")
+        return rebased
+
+    def load_history(self, yahoo_ticker, start, end):
+        """
+        Reads the stored history of a ticker over [start, end), without any network access.
+
+        Returns:
+            pandas.DataFrame: A 'Date' column (datetime64) followed by the PRICE_COLUMNS, sorted by date.
+        """
+        with self._connect() as conn:
+            tickers_data = pd.read_sql_query(
+                'SELECT Date, Open, High, Low, Close, Volume, Dividends, "Stock Splits" FROM prices '
+                'WHERE Ticker = ? AND Date >= ? AND Date < ? ORDER BY Date',
+                conn, params=(yahoo_ticker, _iso(start), _iso(end)))
+        tickers_data['Date'] = pd.to_datetime(tickers_data['Date'])
+        return tickers_data
+
+    def get_history(self, yahoo_ticker, start, end):
+        """
+        Returns the daily history of a ticker over [start, end), fetching only the dates not stored yet.
+
+        When the provider fails (no network, unknown ticker, ...), the error is printed and the stored prices are
+        returned as they are.
+
+        Args:
+            yahoo_ticker (str): The Yahoo Finance ticker.
+            start (str or datetime): First date (inclusive).
+            end (str or datetime): Last date (exclusive, like yfinance).
+
+        Returns:
+            pandas.DataFrame: See load_history.
+        """
+        rebased = False
+        for gap_start, gap_end in self.missing_ranges(yahoo_ticker, start, end):
+            rebased |= self._fetch_gap(yahoo_ticker, gap_start, gap_end)
+        if rebased:
+            # Older prices dropped by a new dividend or split : fetched again, on the new basis
+            for gap_start, gap_end in self.missing_ranges(yahoo_ticker, start, end):
+                self._fetch_gap(yahoo_ticker, gap_start, gap_end)
+        return self.load_history(yahoo_ticker, start, end)
+
+    def _fetch_gap(self, yahoo_ticker, gap_start, gap_end):
+        # One ticker, one gap, through the single-ticker provider ; True when the older prices were dropped
+        try:
+            fetched = self.provider(yahoo_ticker, gap_start, gap_end)
+        except Exception as e:
+            print(f"Unable to fetch {yahoo_ticker} from {gap_start.date()} to {gap_end.date()}: {e}")
+            return False
+        print(f"Fetched {yahoo_ticker} from {gap_start.date()} to {gap_end.date()}")
+        return self.store_history(yahoo_ticker, fetched, gap_start, gap_end)
+
+    def load_close_frame(self, yahoo_tickers, start, end):
+        """
+        Reads the stored closing prices of several tickers over [start, end), without any network access.
+
+        Returns:
+            pandas.DataFrame: Wide frame indexed by date (datetime64), one column per ticker in the requested order.
+                A ticker without any stored price is an all-NaN column.
+        """
+        yahoo_tickers = list(dict.fromkeys(yahoo_tickers))
+        with self._connect() as conn:
+            closes = pd.read_sql_query(
+                f'SELECT Date, Ticker, Close FROM prices WHERE Ticker IN ({", ".join(["?"] * len(yahoo_tickers))}) '
+                'AND Date >= ? AND Date < ?',
+                conn, params=(*yahoo_tickers, _iso(start), _iso(end)))
+        closes['Date'] = pd.to_datetime(closes['Date'])
+        closes = closes.pivot(index='Date', columns='Ticker', values='Close').sort_index()
+        return closes.reindex(columns=yahoo_tickers)
+
+    def get_close_frame(self, yahoo_tickers, start, end):
+        """
+        Returns the closing prices of several tickers over [start, end) as one wide (date x ticker) frame, fetching
+        only the dates not stored yet.
+
+        Tickers sharing the same missing range (usually the tail since the previous run) are downloaded together,
+        in one multi-symbol request of the bulk provider. A ticker which fails in bulk falls back to the single-ticker
+        provider. An empty bulk answer over a short range (week-end, holiday) is stored as is.
+
+        Args:
+            yahoo_tickers (list): The Yahoo Finance tickers.
+            start (str or datetime): First date (inclusive).
+            end (str or datetime): Last date (exclusive, like yfinance).
+
+        Returns:
+            pandas.DataFrame: See load_close_frame.
+
+        Example:
+            >>> closes = store.get_close_frame(['ASML.AS', 'SAN.PA'], '2024-01-01', '2025-03-20')
+        """
+        yahoo_tickers = list(dict.fromkeys(yahoo_tickers))
+        rebased = self._fetch_close_gaps(yahoo_tickers, start, end)
+        if rebased:
+            # Older prices dropped by a new dividend or split : fetched again, on the new basis
+            self._fetch_close_gaps(rebased, start, end)
+        return self.load_close_frame(yahoo_tickers, start, end)
+
+    def _fetch_close_gaps(self, yahoo_tickers, start, end):
+        # Missing ranges of several tickers, in bulk ; returns the tickers whose older prices were dropped
+        rebased = []
+        # Tickers grouped by missing range
+        gaps = defaultdict(list)
+        for yahoo_ticker in yahoo_tickers:
+            for gap in self.missing_ranges(yahoo_ticker, start, end):
+                gaps[gap].append(yahoo_ticker)
+
+        for (gap_start, gap_end), group in gaps.items():
+            try:
+                fetched = self.bulk_provider(group, gap_start, gap_end)
+                print(f"Fetched {len(group)} tickers in bulk from {gap_start.date()} to {gap_end.date()}")
+                nothing_traded = not any(len(history) for history in fetched.values())
+            except Exception as e:
+                print(f"Bulk download failed from {gap_start.date()} to {gap_end.date()}: {e}")
+                fetched = {}
+                nothing_traded = False
+
+            short_gap = gap_end - gap_start <= pd.Timedelta(days=MAX_EMPTY_COVERED_DAYS)
+            for yahoo_ticker in group:
+                history = fetched.get(yahoo_ticker)
+                if history is not None and len(history):
+                    dropped = self.store_history(yahoo_ticker, history, gap_start, gap_end)
+                elif nothing_traded and short_gap:
+                    # Market closed for everyone : nothing to retry
+                    dropped = self.store_history(yahoo_ticker, pd.DataFrame(), gap_start, gap_end)
+                else:
+                    # Failed in bulk : per-ticker fallback
+                    dropped = self._fetch_gap(yahoo_ticker, gap_start, gap_end)
+                if dropped and yahoo_ticker not in rebased:
+                    rebased.append(yahoo_ticker)
+        return rebased
+
+class _NonClosingConnection:
+    # Context manager handing out the shared in-memory connection without closing it
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        return False
+
+def _day(date):
+    # Naive Timestamp at midnight
+    date = pd.Timestamp(date)
+    if date.tzinfo is not None:
+        date = date.tz_localize(None)
+    return date.normalize()
+
+def _iso(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
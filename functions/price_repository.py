@@ -0,0 +1,82 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : In-process repository of the ticker mapping and price histories of the last run, reused by the exports
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import pandas as pd
+
+class PriceRepository:
+    """
+    Ticker mapping and price histories of the last create_dataset run, kept in the process so that the later
+    exports (Export DB) write them without any network access.
+
+    The histories downloaded one ticker at a time are handed over as they are ; the others (bulk download, closes
+    only) are read from the local price store of the run on first request, then kept.
+
+    Example:
+        >>> price_repository.reset({'NL0010273215': 'ASML.AS'}, price_store, min_date, max_date)
+        >>> price_repository.ticker('NL0010273215')
+        'ASML.AS'
+        >>> price_repository.history('ASML.AS', '2024-01-01', '2025-03-20')   # no network
+    """
+
+    def __init__(self):
+        self.tickers = {}     # ISIN -> Yahoo ticker (None when unknown)
+        self.histories = {}   # Yahoo ticker -> history over [start, end) (Date + PRICE_COLUMNS)
+        self.store = None     # PriceStore of the run
+        self.start = None
+        self.end = None
+
+    def reset(self, tickers, store, start, end):
+        """
+        Starts the repository of a new run.
+
+        Args:
+            tickers (dict): ISIN -> Yahoo ticker (None when unknown).
+            store (PriceStore): The price store of the run, holding every history downloaded.
+            start, end (datetime): The date range of the run (`end` exclusive).
+        """
+        self.tickers = dict(tickers)
+        self.histories = {}
+        self.store = store
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+
+    def add_history(self, yahoo_ticker, tickers_data):
+        """
+        Keeps a history of the run (over its whole date range).
+        """
+        self.histories[yahoo_ticker] = tickers_data
+
+    def ticker(self, isin):
+        """
+        Returns the Yahoo ticker of an ISIN (None when unknown or not part of the run).
+        """
+        return self.tickers.get(isin)
+
+    def knows(self, isin):
+        return isin in self.tickers
+
+    def history(self, yahoo_ticker, start=None, end=None):
+        """
+        Returns the history of a ticker over [start, end) (the range of the run by default), without network access.
+
+        Returns:
+            pandas.DataFrame: A 'Date' column (datetime64) followed by the price columns, sorted by date ; empty when
+            the ticker has no price.
+        """
+        if yahoo_ticker not in self.histories:
+            self.histories[yahoo_ticker] = self.store.load_history(yahoo_ticker, self.start, self.end)
+        tickers_data = self.histories[yahoo_ticker]
+        start = pd.Timestamp(start) if start is not None else self.start
+        end = pd.Timestamp(end) if end is not None else self.end
+        return tickers_data[(tickers_data['Date'] >= start) & (tickers_data['Date'] < end)].reset_index(drop=True)
+
+# Repository of the current process, filled by create_dataset
+price_repository = PriceRepository()
@@ -0,0 +1,135 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : As-of price lookup on sorted arrays
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import numpy as np
+import pandas as pd
+
+def normalize_history(tickers_data):
+    """
+    Puts a Yahoo Finance history in the layout used across the project : 'Date' as a column, without timezone,
+    truncated to the day.
+
+    Args:
+        tickers_data (pandas.DataFrame): The output of `yf.Ticker(...).history()`, either indexed by date or already
+            reset. An empty DataFrame is accepted.
+
+    Returns:
+        pandas.DataFrame: A copy of the history with a naive, day-precision 'Date' column (datetime64).
+    """
+    tickers_data = tickers_data.copy()
+    if 'Date' not in tickers_data.columns:
+        tickers_data = tickers_data.reset_index()
+    if 'Date' not in tickers_data.columns:
+        # Empty history : nothing to index on
+        tickers_data['Date'] = pd.Series(dtype='datetime64[ns]')
+    dates = pd.to_datetime(tickers_data['Date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    tickers_data['Date'] = dates.dt.normalize()
+    return tickers_data
+
+class AsOfPriceIndex:
+    """
+    Price lookup "as of" a date : the price of the date itself, or of the closest previous date when the date
+    is missing (week-end, holiday, ...).
+
+    The index is built once per ticker from sorted `datetime64` arrays, then a whole date range is resolved
+    in one vectorized `searchsorted` call.
+
+    Example:
+        >>> index = AsOfPriceIndex.from_history(tickers_data)
+        >>> index.lookup(pd.date_range('2025-01-01', '2025-03-01'))
+        array([  0. ,   0. , 101.2, 101.2, ...])
+    """
+
+    def __init__(self, dates, values):
+        """
+        Args:
+            dates (array-like): Dates of the prices, in any order. When a date appears several times, the last
+                price wins.
+            values (array-like): The prices, aligned with `dates`.
+        """
+        dates = pd.to_datetime(np.asarray(dates)).values.astype('datetime64[ns]')
+        values = np.asarray(values, dtype='float64')
+
+        # Stable sort then keep the last price of each date
+        order = np.argsort(dates, kind='stable')
+        dates, values = dates[order], values[order]
+        last_of_date = np.append(dates[1:] != dates[:-1], True) if len(dates) else np.zeros(0, dtype=bool)
+        self.dates = dates[last_of_date]
+        self.values = values[last_of_date]
+
+    @classmethod
+    def from_history(cls, tickers_data, column='Close'):
+        """
+        Builds the index from a Yahoo Finance history.
+
+        Args:
+            tickers_data (pandas.DataFrame): A history, as returned by `yf.Ticker(...).history()` or by normalize_history.
+            column (str): The price column to index (default: 'Close').
+
+        Returns:
+            AsOfPriceIndex: The index ; empty when the history is empty.
+        """
+        tickers_data = normalize_history(tickers_data)
+        if column not in tickers_data.columns:
+            return cls([], [])
+        return cls(tickers_data['Date'], tickers_data[column])
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0
+
+    def lookup(self, dates, default=0.0):
+        """
+        Returns the as-of prices for several dates at once.
+
+        Args:
+            dates (array-like): The requested dates (e.g. a pandas.DatetimeIndex), in any order.
+            default (float): Price returned for dates earlier than the first known price (default: 0).
+
+        Returns:
+            numpy.ndarray: One price per requested date.
+        """
+        dates = pd.to_datetime(np.asarray(dates)).values.astype('datetime64[ns]')
+        if self.empty:
+            return np.full(len(dates), default, dtype='float64')
+        # Position of the last known date <= requested date
+        positions = np.searchsorted(self.dates, dates, side='right') - 1
+        return np.where(positions >= 0, self.values[np.clip(positions, 0, None)], default)
+
+def asof_lookup_frame(closes, dates, default=0.0):
+    """
+    As-of lookup on a wide (date x ticker) price frame, for all the tickers at once.
+
+    Each column is first carried forward over the dates where its own market was closed, then the rows of the
+    requested dates are picked with one `searchsorted` call. Dates before the first price of a ticker get `default`.
+
+    Args:
+        closes (pandas.DataFrame): Prices indexed by date, one column per ticker (e.g. PriceStore.get_close_frame).
+        dates (array-like): The requested dates (e.g. a pandas.DatetimeIndex).
+        default (float): Price returned when no earlier price exists (default: 0).
+
+    Returns:
+        numpy.ndarray: Array of shape (len(dates), number of tickers), columns in the order of `closes`.
+    """
+    dates = pd.to_datetime(np.asarray(dates)).values.astype('datetime64[ns]')
+    closes = closes.sort_index().ffill()
+    if closes.empty:
+        return np.full((len(dates), closes.shape[1]), default, dtype='float64')
+    index = pd.to_datetime(closes.index).values.astype('datetime64[ns]')
+    positions = np.searchsorted(index, dates, side='right') - 1
+    values = closes.to_numpy(dtype='float64')[np.clip(positions, 0, None)]
+    values[positions < 0] = default
+    return np.where(np.isnan(values), default, values)
@@ -0,0 +1,143 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Stage timing of the pipeline, optional cProfile dump of a run and memory footprint of the datasets
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import cProfile
+import pstats
+import threading
+import time
+import os
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+
+class StageTimer:
+    """
+    Wall time and number of calls of the stages of a run (e.g. 'create_dataset', 'plot: KPI Plot').
+
+    Stages can be nested and timed from several threads at once ; each name accumulates its own calls.
+
+    Example:
+        >>> timer = StageTimer()
+        >>> with timer.stage('calculation_df'):
+        ...     cumulative_df = calculation_df(base_df)
+        >>> print(timer.summary())
+    """
+
+    def __init__(self):
+        self.stats = {}  # name -> [count, total, max]
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            stat = self.stats.setdefault(name, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the enclosed block under `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """
+        Decorator timing every call of a function under `name`.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapped(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapped
+        return decorator
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def summary(self):
+        """
+        Returns the stages, in the order of their first call, as a printable table.
+        """
+        width = max([len(name) for name in self.stats] + [5]) + 2
+        lines = [f"{'Stage':<{width}}{'Calls':>8}{'Total (s)':>12}{'Mean (s)':>10}{'Max (s)':>10}"]
+        with self.lock:
+            for name, (count, total, longest) in self.stats.items():
+                lines.append(f"{name:<{width}}{count:>8}{total:>12.3f}{total / count:>10.3f}{longest:>10.3f}")
+        return "\n".join(lines)
+
+# Timer shared by the whole pipeline (dataset, charts, UI)
+stage_timer = StageTimer()
+
+@contextmanager
+def profile_run(output_path=None, top=30):
+    """
+    Profiles the enclosed block with cProfile.
+
+    Args:
+        output_path (str, optional): Where the pstats dump is written (readable with `pstats.Stats(path)` or
+            snakeviz). Nothing is profiled when None.
+        top (int): Number of functions printed, sorted by cumulative time.
+
+    Example:
+        >>> with profile_run('output/2025-03-20/profile.pstats'):
+        ...     main()
+    """
+    if output_path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        folder = os.path.dirname(output_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        profiler.dump_stats(output_path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+        print(f"Profile written to {output_path}")
+
+def memory_report(frames):
+    """
+    Compares the memory footprint of several layouts of a dataset, column by column (deep size, strings included).
+
+    Args:
+        frames (dict): Layout name -> DataFrame, or list of DataFrames for a layout split in several tables
+            (their columns are added up), e.g. {'object layout': legacy_df, 'star schema': [cumulative_df, instruments_df]}.
+
+    Returns:
+        pandas.DataFrame: Megabytes per column and per layout, a 'Total' row, and the ratio of the first layout
+            to each of the others ('x <name>' columns).
+
+    Example:
+        >>> print(memory_report({'object layout': legacy_layout(cumulative_df, instruments_df),
+        ...                      'star schema': [cumulative_df, instruments_df]}))
+    """
+    def usage(tables):
+        tables = tables if isinstance(tables, (list, tuple)) else [tables]
+        sizes = pd.concat([table.memory_usage(deep=True, index=False) for table in tables])
+        return sizes.groupby(level=0, sort=False).sum()
+
+    sizes = pd.concat({name: usage(tables) for name, tables in frames.items()}, axis=1, sort=False).fillna(0)
+    sizes.loc['Total'] = sizes.sum()
+    report = sizes / 2**20
+    reference = sizes.columns[0]
+    for name in sizes.columns[1:]:
+        report[f'x {name}'] = sizes[reference] / sizes[name]
+    return report.round(3)
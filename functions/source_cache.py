@@ -0,0 +1,119 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Columnar snapshots (Parquet) of the parsed DEGIRO exports, so that an unchanged export is not parsed again
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+import hashlib
+import os
+from contextlib import closing
+import pandas as pd
+
+# Const
+from Config.config import *
+
+# Bumped when the parsing of the exports changes : older snapshots are then parsed again
+SNAPSHOT_VERSION = 1
+
+class TransactionSnapshots:
+    """
+    Persistent snapshots of the parsed and validated DEGIRO exports : one Parquet file per export content, and an
+    SQLite index keyed by file path, with the size, mtime and content hash (SHA-256) of the file.
+
+    A file with the same size and mtime is loaded from its snapshot without being read ; a file touched but not
+    modified (same hash) too. Only new or modified files are parsed, then stored.
+
+    Example:
+        >>> snapshots = TransactionSnapshots('cache/transactions')
+        >>> df = snapshots.load('source/Transactions.csv', read_degiro_export)
+    """
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): Folder of the snapshots and of their index. It is created if needed.
+        """
+        self.folder = folder
+        self.db_path = os.path.join(folder, SNAPSHOT_INDEX_DB)
+        os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS snapshots (
+                Path TEXT PRIMARY KEY,
+                Size INTEGER NOT NULL,
+                Mtime INTEGER NOT NULL,
+                Hash TEXT NOT NULL,
+                Version INTEGER NOT NULL)''')
+            conn.commit()
+
+    @staticmethod
+    def file_hash(path, chunk_size=1 << 20):
+        """
+        Returns the SHA-256 hex digest of a file, read by chunks.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def snapshot_path(self, digest):
+        return os.path.join(self.folder, f'{digest}.parquet')
+
+    def _read(self, digest):
+        try:
+            return pd.read_parquet(self.snapshot_path(digest))
+        except (ImportError, OSError, ValueError):
+            # Missing or unreadable snapshot : the file is parsed again
+            return None
+
+    def load(self, path, parse):
+        """
+        Returns the parsed transactions of one export, from its snapshot when the file did not change.
+
+        Args:
+            path (str): The CSV export.
+            parse (callable): `parse(path)` -> pandas.DataFrame, called for a new or modified file only. Its errors
+                (e.g. InvalidExport) are raised as is, and nothing is stored.
+
+        Returns:
+            pandas.DataFrame: The parsed transactions, identical to `parse(path)`.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            row = conn.execute('SELECT Size, Mtime, Hash FROM snapshots WHERE Path = ? AND Version = ?',
+                               (key, SNAPSHOT_VERSION)).fetchone()
+
+        # Same size and mtime : the file is not even read
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            df = self._read(row[2])
+            if df is not None:
+                return df
+
+        digest = self.file_hash(path)
+        df = self._read(digest) if row is not None and row[2] == digest else None
+        if df is None:
+            df = parse(path)
+            try:
+                df.to_parquet(self.snapshot_path(digest), index=False)
+            except (ImportError, OSError, ValueError, TypeError) as e:
+                # No snapshot (e.g. pyarrow missing, column of mixed types) : the file is parsed on each run
+                print(f"No snapshot of {path}: {e}")
+                return df
+
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO snapshots (Path, Size, Mtime, Hash, Version) VALUES (?, ?, ?, ?, ?)',
+                             (key, stat.st_size, stat.st_mtime_ns, digest, SNAPSHOT_VERSION))
+            # Snapshot of the former content, if no other export shares it
+            if row is not None and row[2] != digest:
+                shared = conn.execute('SELECT 1 FROM snapshots WHERE Hash = ?', (row[2],)).fetchone()
+                if shared is None and os.path.exists(self.snapshot_path(row[2])):
+                    os.remove(self.snapshot_path(row[2]))
+        return df
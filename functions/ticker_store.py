@@ -0,0 +1,102 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : SQLite export of the price histories (Export DB), written in bulk through one connection
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+import itertools
+import os
+import pandas as pd
+
+# ----- From Files
+from functions.prices import normalize_history
+from functions.price_cache import PRICE_COLUMNS
+
+class TickerStore:
+    """
+    SQLite store of the exported price histories : one fixed, typed table in long format (ticker, date, OHLCV,
+    dividends, splits), created once.
+
+    The store keeps one connection (WAL journal) for its whole life and writes each history with one executemany ;
+    everything written between the opening and the closing of the store is one transaction.
+
+    Example:
+        >>> with TickerStore('output/2026-10-18/tickers_data.db') as store:
+        ...     store.write('ASML.AS', history)
+        ...     store.write('SAN.PA', other_history)
+        >>> # Committed once, when leaving the block
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Its folder is created if needed.
+        """
+        self.db_path = db_path
+        self.rows = 0
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps the file consistent ; syncing on each checkpoint only is enough for an export
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS tickers_data (
+            Date TEXT NOT NULL,
+            Ticker TEXT NOT NULL,
+            Open REAL,
+            High REAL,
+            Low REAL,
+            Close REAL,
+            Volume INTEGER,
+            Dividends REAL,
+            "Stock Splits" REAL,
+            PRIMARY KEY (Date, Ticker))''')
+
+    def write(self, yahoo_ticker, tickers_data):
+        """
+        Adds the history of a ticker ; the dates already stored for it are kept as they are.
+
+        Args:
+            yahoo_ticker (str): The Yahoo Finance ticker.
+            tickers_data (pandas.DataFrame): Its history (Yahoo Finance layout, see normalize_history) ; the columns
+                out of PRICE_COLUMNS are not stored.
+
+        Returns:
+            int: The number of rows added.
+        """
+        tickers_data = normalize_history(tickers_data).reindex(columns=['Date'] + PRICE_COLUMNS)
+        # Columns turned into Python scalars at once (NaN as NULL), zipped into row tuples
+        columns = [tickers_data['Date'].dt.strftime('%Y-%m-%d').to_numpy(dtype=object), itertools.repeat(yahoo_ticker)]
+        for column in PRICE_COLUMNS:
+            values = tickers_data[column].to_numpy(dtype=object)
+            values[pd.isna(values)] = None
+            columns.append(values)
+        cursor = self.conn.executemany(
+            'INSERT OR IGNORE INTO tickers_data (Date, Ticker, Open, High, Low, Close, Volume, Dividends, "Stock Splits") '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', zip(*columns))
+        self.rows += cursor.rowcount
+        return cursor.rowcount
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # One transaction per export : committed when complete, rolled back otherwise
+        if exc_type is None:
+            self.commit()
+        else:
+            self.conn.rollback()
+        self.close()
@@ -7,8 +7,16 @@ import pandas as pd
 from datetime import datetime
 import matplotlib.pyplot as plt
 import matplotlib.transforms as mtransforms  # Import necessary transforms
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+import numpy as np
 # Const
 from Config.config import *
+# ----- From Files
+from functions.plot_registry import PlotRegistry
+from functions.positions import join_instruments
+from functions.analysis import adjust_values, dense_frame
 
 def create_ReadMe():
     # Create a figure and axis
@@ -83,6 +91,134 @@ def create_page_section(title):
     plt.axis('off') 
     return fig
 
+def plot_colored_segments(ax, dates, values, up, label=None, up_color='green', down_color='red'):
+    """
+    Draws a line over time whose segments are green or red, as one LineCollection (one artist) instead of one
+    `plot` call (one Line2D) per pair of consecutive days.
+
+    Args:
+        ax (matplotlib.axes.Axes): Where to draw.
+        dates (array-like): The x values (datetime). Segments touching a missing date (NaT) are not drawn.
+        values (array-like): The y values.
+        up (array-like of bool): Per point ; the segment ending on point i is `up_color` when up[i], `down_color` otherwise.
+        label (str, optional): Legend entry, drawn with the color of the last segment.
+        up_color, down_color (str): The two colors (default: green / red).
+
+    Returns:
+        tuple: (LineCollection, Line2D or None)
+            - The drawn segments.
+            - The legend handle of the line (a proxy, not drawn) ; None without label or segment. It is passed to
+              `legend(handles=...)` : the collection itself is not a legend entry.
+
+    Example:
+        >>> fig, ax = plt.subplots()
+        >>> segments, handle = plot_colored_segments(ax, df['Date'], df['Actual_value'], df['Actual_value'] > df['Buying_value'], 'Product value')
+        >>> ax.legend(handles=[handle])
+    """
+    x = mdates.date2num(pd.to_datetime(pd.Series(dates)).to_numpy())
+    y = np.asarray(values, dtype='float64')
+    # Segment i joins the points i and i+1, colored by the condition on its end point
+    points = np.column_stack([x, y])
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    colors = np.where(np.asarray(up, dtype=bool)[1:], up_color, down_color)
+    keep = np.isfinite(segments).all(axis=(1, 2))
+
+    collection = LineCollection(segments[keep], colors=colors[keep], linestyle='-', capstyle='projecting', joinstyle='round')
+    ax.add_collection(collection, autolim=False)
+    # Data limits of every point with a value, as a line through the same points
+    ax.update_datalim(points[np.isfinite(points).all(axis=1)])
+    ax.xaxis_date()
+    ax.autoscale_view()
+    handle = Line2D([], [], color=colors[-1], label=label, linestyle='-') if label and len(colors) else None
+    return collection, handle
+
+def plot_segments_per_pair(ax, dates, values, up, label=None, up_color='green', down_color='red'):
+    """
+    The former drawing of plot_colored_segments : one `plot` call (one Line2D) per pair of consecutive days, the
+    legend entry carried by the last segment. Kept as the reference of the rendering test and of the benchmark
+    (Docs/benchmarks/colored_segments.py) ; same arguments and return value as plot_colored_segments.
+    """
+    dates, values, up = pd.Series(dates).reset_index(drop=True), pd.Series(values).reset_index(drop=True), np.asarray(up)
+    lines = []
+    for i in range(1, len(dates)):
+        lines += ax.plot(dates.iloc[i-1:i+1], values.iloc[i-1:i+1], color=up_color if up[i] else down_color, linestyle='-',
+                         label=label if label and i == len(dates) - 1 else "")
+    return lines, lines[-1] if label and lines else None
+
+class InstrumentPartition:
+    """
+    View of the dataset split by ISIN, in one pass : the rows of each instrument and its product name are computed
+    once, then shared by all the per-ISIN charts (instead of one `df[df['ISIN'] == isin]` per instrument and per chart).
+
+    Example:
+        >>> instruments = InstrumentPartition(cumulative_df, instruments_df)
+        >>> for isin, isin_data, product_name in instruments:
+        ...     print(isin, product_name, len(isin_data))
+    """
+
+    def __init__(self, df, instruments_df=None, sparse_positions=None):
+        """
+        Args:
+            df (pandas.DataFrame): The dataset (e.g. cumulative_df), with 'ISIN' and 'Date' columns.
+            instruments_df (pandas.DataFrame, optional): The instrument table, giving the product names ;
+                without it, they are read from the 'Products' column of df.
+            sparse_positions (SparsePositions, optional): The sparse storage of df : the rows of an instrument are
+                then materialized on the whole calendar when first requested (requires instruments_df).
+        """
+        self.df = df
+        self.sparse_positions = sparse_positions
+        if sparse_positions is None:
+            # Row positions of each ISIN, in the order of first appearance (as df['ISIN'].unique())
+            self.positions = df.groupby('ISIN', sort=False, observed=True).indices
+            # Number of distinct dates of the whole portfolio
+            self.dates_count = df['Date'].nunique()
+        else:
+            self.positions = dict.fromkeys(sparse_positions.isins)
+            self.dates_count = len(sparse_positions.date_range)
+        self.isins = list(self.positions)
+        self.slices = {}
+        if instruments_df is not None:
+            self.product_names = instruments_df['Products'].reindex(self.isins).to_dict()
+        else:
+            self.product_names = {isin: df['Products'].iat[rows[0]] for isin, rows in self.positions.items()}
+
+    def subset(self, isins):
+        """
+        Returns the same view restricted to some instruments, in the given order (e.g. one chunk of an export).
+        """
+        part = InstrumentPartition.__new__(InstrumentPartition)
+        part.df = self.df
+        part.sparse_positions = self.sparse_positions
+        part.positions = {isin: self.positions[isin] for isin in isins}
+        part.isins = list(isins)
+        part.slices = self.slices
+        part.product_names = self.product_names
+        part.dates_count = self.dates_count
+        return part
+
+    def __getitem__(self, isin):
+        """
+        Returns the rows of an instrument (cached ; copy it before modifying it).
+        """
+        if isin not in self.slices and self.sparse_positions is not None:
+            self.slices[isin] = adjust_values(self.sparse_positions.to_frame(isins=[isin]))
+        elif isin not in self.slices:
+            self.slices[isin] = self.df.iloc[self.positions[isin]]
+        return self.slices[isin]
+
+    def __iter__(self):
+        for isin in self.isins:
+            yield isin, self[isin], self.product_names[isin]
+
+    def __len__(self):
+        return len(self.isins)
+
+def as_instrument_partition(df):
+    """
+    Returns `df` split by ISIN ; an InstrumentPartition is returned as is.
+    """
+    return df if isinstance(df, InstrumentPartition) else InstrumentPartition(df)
+
 def plot_portfolio_product_percentage_by_date(df):
     """
     Plots the percentage contribution of each product in a portfolio over time.
@@ -124,7 +260,8 @@ def plot_portfolio_product_percentage_by_date(df):
         columns='Products', 
         values='Product_pct_in_portfolio_for_day', 
         aggfunc='sum', 
-        fill_value=0
+        fill_value=0,
+        observed=True
     )
 
     # Create a figure and axes object for the plot
@@ -183,17 +320,8 @@ def plot_total_pct_by_date(df):
     # Create the plot with a specific figure size
     fig, ax = plt.subplots(figsize=(10,6))
     
-    # Loop through the data to plot each segment of the variation with the appropriate color
-    for i in range(1, len(df_copy)):
-        if df_copy['Variation_%'].iloc[i] >= 0:
-            color = 'green'  # Positive or 0% variation
-        else:
-            color = 'red'  # Negative variation
-        
-        # Plot the segment between consecutive points (i-1 and i)
-        ax.plot(df_copy['Date'].iloc[i-1:i+1], 
-                df_copy['Variation_%'].iloc[i-1:i+1], 
-                color=color, linestyle='-', label='All' if i == len(df_copy) - 1 else "")
+    # Segments of the variation : green for positive or 0% variation, red for negative variation
+    plot_colored_segments(ax, df_copy['Date'], df_copy['Variation_%'], df_copy['Variation_%'] >= 0, label='All')
 
     # Add labels for x and y axes and set the plot title
     ax.set_xlabel('Date')
@@ -219,17 +347,8 @@ def plot_total_var_by_date(df):
     # Create the plot with a specific figure size
     fig, ax = plt.subplots(figsize=(10,6))
     
-    # Loop through the data to plot each segment of the variation with the appropriate color
-    for i in range(1, len(df_copy)):
-        if df_copy['Value_diff'].iloc[i] >= 0:
-            color = 'green'  # Positive or 0% variation
-        else:
-            color = 'red'  # Negative variation
-        
-        # Plot the segment between consecutive points (i-1 and i)
-        ax.plot(df_copy['Date'].iloc[i-1:i+1], 
-                df_copy['Value_diff'].iloc[i-1:i+1], 
-                color=color, linestyle='-', label='All' if i == len(df_copy) - 1 else "")
+    # Segments of the variation : green for positive or 0 variation, red for negative variation
+    plot_colored_segments(ax, df_copy['Date'], df_copy['Value_diff'], df_copy['Value_diff'] >= 0, label='All')
 
     # Add labels for x and y axes and set the plot title
     ax.set_xlabel('Date')
@@ -284,27 +403,18 @@ def plot_total_by_date(df, start_date=None, end_date=None):
     # Create and store the plot for the total Actual_value by date
     fig = plt.figure(figsize=(12, 6))
     
-    # Loop through the data to plot each point with the appropriate color
-    for i in range(1, len(df_copy)):
-        # Check if 'Actual_value' is ahead or not for this segment
-        if df_copy['Actual_value'].iloc[i] > df_copy['Buying_value'].iloc[i]:
-            color = 'green'  # 'Actual_value' is ahead
-        else:
-            color = 'red'  # 'Actual_value' is not ahead
-        
-        # Plot the segment between consecutive points (i-1 and i)
-        plt.plot(df_copy['Date'].iloc[i-1:i+1], 
-                 df_copy['Actual_value'].iloc[i-1:i+1], 
-                 color=color, label='Product value' if i == len(df_copy) - 1 else "", linestyle='-')
+    # Segments of the value : green where 'Actual_value' is ahead of 'Buying_value', red otherwise
+    segments, value_handle = plot_colored_segments(plt.gca(), df_copy['Date'], df_copy['Actual_value'],
+                                                   df_copy['Actual_value'] > df_copy['Buying_value'], label='Product value')
 
     # Plot the 'Buying_value' line in blue
-    plt.plot(df_copy['Date'], df_copy['Buying_value'], color='Blue', label='Invested value', linestyle='-')
+    invested_line, = plt.plot(df_copy['Date'], df_copy['Buying_value'], color='Blue', label='Invested value', linestyle='-')
 
     plt.title('Portfolio Progress')
     plt.xlabel('Date')
     plt.ylabel('Value')
     plt.xticks(rotation=45)
-    plt.legend()
+    plt.legend(handles=[handle for handle in (value_handle, invested_line) if handle is not None])
     plt.tight_layout()
 
     return fig
@@ -357,39 +467,28 @@ def plots_ISIN_by_date(df):
         >>> plots = plots_ISIN_by_date(df)
         >>> # This will return a list of Matplotlib figure objects, which can be displayed or saved.
     """
-    # Create a copy of the dataframe to avoid modifying the original
-    df_copy = df.copy()
+    # Rows of each ISIN, split once
+    instruments = as_instrument_partition(df)
     # List to store all the figures
     plots = []
     # Create and store the plot for each ISIN showing its Actual_value
-    isin_list = df_copy['ISIN'].unique()
-    for isin in isin_list:
+    for isin, isin_data, product_name in instruments:
         plt_isin = plt.figure(figsize=(12, 6))
-        # Filter data for the current ISIN
-        isin_data = df_copy[df_copy['ISIN'] == isin]
+        # Copy of the data of the current ISIN, to avoid modifying the shared slice
+        isin_data = isin_data.copy()
         # Filter the rows where 'Actual_value' is 0 and drop the 'Date' column
         isin_data.loc[isin_data['Actual_value'] == 0, 'Date'] = None
-        product_name = df_copy[df_copy['ISIN'] == isin]['Products'].unique()[0]
-        grouped_data = df_copy.groupby('Date')[['Actual_value','Buying_value']].sum().reset_index()
-        # Loop through the data for the current ISIN and plot segments with different colors
-        for i in range(1, len(isin_data)):
-            # Check if Actual_value is ahead or not for this segment
-            if isin_data['Actual_value'].iloc[i] > isin_data['Buying_value'].iloc[i]:
-                color = 'green'  # Actual_value is ahead
-            else:
-                color = 'red'  # Actual_value is not ahead
-            
-            # Plot the segment between consecutive points (i-1 and i) for Actual_value
-            plt.plot(isin_data['Date'].iloc[i-1:i+1], 
-                    isin_data['Actual_value'].iloc[i-1:i+1], 
-                    color=color,label='Product value' if i == len(grouped_data) - 1 else "", linestyle='-')
-
-        plt.plot(isin_data['Date'], isin_data['Buying_value'], color='blue', label=f"Invested value", linestyle='-')
+        # Segments of the Actual_value : green where it is ahead of the Buying_value, red otherwise
+        segments, value_handle = plot_colored_segments(plt.gca(), isin_data['Date'], isin_data['Actual_value'],
+                                                       isin_data['Actual_value'] > isin_data['Buying_value'],
+                                                       label='Product value' if len(isin_data) == instruments.dates_count else None)
+
+        invested_line, = plt.plot(isin_data['Date'], isin_data['Buying_value'], color='blue', label=f"Invested value", linestyle='-')
         plt.title(f'Portfolio Value for {product_name}')
         plt.xlabel('Date')
         plt.ylabel('Value')
         plt.xticks(rotation=45)
-        plt.legend()
+        plt.legend(handles=[handle for handle in (value_handle, invested_line) if handle is not None])
         plt.tight_layout()
         # Store the plot in the array
         plots.append(plt_isin)
@@ -505,8 +604,8 @@ def plots_portfolio_by_ISIN_by_date(df):
     list: A list containing two matplotlib figure objects with the generated plots.
     """
     
-    # Create a copy of the DataFrame to avoid modifying the original data
-    df_copy = df.copy()
+    # Rows of each ISIN, split once
+    instruments = as_instrument_partition(df)
     
     # List to store the generated plots
     generated_plots = []
@@ -519,14 +618,8 @@ def plots_portfolio_by_ISIN_by_date(df):
         # Create a new figure for the plot
         plot = plt.figure(figsize=(12, 6))
         
-        # Loop through each unique ISIN in the DataFrame to plot the data
-        for isin in df_copy['ISIN'].unique():
-            # Filter data for the current ISIN
-            isin_data = df_copy[df_copy['ISIN'] == isin]
-            
-            # Get the product name for the current ISIN
-            product_name = isin_data['Products'].unique()[0]
-            
+        # Loop through each ISIN to plot its data
+        for isin, isin_data, product_name in instruments:
             # Plot the specified value (Actual_value or Buying_value) for the current ISIN
             plt.plot(isin_data['Date'], isin_data[value_type], label=f"{product_name}", linestyle='-')
 
@@ -557,20 +650,14 @@ def plots_ISIN_pct_by_date(df):
     List: A list of matplotlib figure objects, each corresponding to a plot for one ISIN.
     """
     
-    # Create a copy of the DataFrame to avoid modifying the original data
-    df_copy = df.copy()
+    # Rows of each ISIN, split once
+    instruments = as_instrument_partition(df)
     
     # List to store all the plot figures
     plots = []
     
-    # Loop through each unique ISIN in the DataFrame
-    for isin in df_copy['ISIN'].unique():
-        # Filter the data for the current ISIN
-        isin_data = df_copy[df_copy['ISIN'] == isin]
-        
-        # Get the product name for the current ISIN (assuming one product per ISIN)
-        product_name = isin_data['Products'].unique()[0]
-        
+    # Loop through each ISIN
+    for isin, isin_data, product_name in instruments:
         # Group by 'Date' and calculate the total Buying_value and Actual_value per date for this ISIN
         grouped_data = isin_data.groupby('Date').agg({
             'Buying_value': 'sum',
@@ -584,14 +671,9 @@ def plots_ISIN_pct_by_date(df):
         # Create the plot for this ISIN
         fig, ax = plt.subplots(figsize=(10, 6))
 
-        # Loop through the data to plot each point with the appropriate color (green for positive or 0%, red for negative)
-        for i in range(1, len(grouped_data)):
-            color = 'green' if grouped_data['Variation_%'].iloc[i] >= 0 else 'red'
-            
-            # Plot the segment between consecutive points (i-1 and i)
-            ax.plot(grouped_data['Date'].iloc[i-1:i+1], 
-                    grouped_data['Variation_%'].iloc[i-1:i+1], 
-                    color=color, linestyle='-', label=product_name if i == len(grouped_data) - 1 else "")
+        # Segments of the variation : green for positive or 0%, red for negative
+        plot_colored_segments(ax, grouped_data['Date'], grouped_data['Variation_%'], grouped_data['Variation_%'] >= 0,
+                              label=product_name)
         
         # Add labels and title to the plot
         ax.set_xlabel('Date')
@@ -645,7 +727,7 @@ def plot_pie_portfolio_by_ISIN(df):
     df_copy = df.copy()
     current_date = df_copy['Date'].max().strftime('%d/%m/%Y')
     # Calculate total value for each ISIN
-    Product_value = df_copy.groupby('Products')['Actual_value'].sum()
+    Product_value = df_copy.groupby('Products', observed=True)['Actual_value'].sum()
     # Pie chart for portfolio distribution
     fig = plt.figure(figsize=(12, 6))
     plt.pie(Product_value, labels=Product_value.index, autopct='%1.1f%%', startangle=140)
@@ -684,7 +766,7 @@ def plot_pie_portfolio_by_asset_type(df):
     df_copy = df.copy()
     current_date = df_copy['Date'].max().strftime('%d/%m/%Y')
     # Calculate total value for each ISIN
-    Product_value = df_copy.groupby('Asset Type')['Actual_value'].sum()
+    Product_value = df_copy.groupby('Asset Type', observed=True)['Actual_value'].sum()
     # Pie chart for portfolio distribution
     fig = plt.figure(figsize=(12, 6))
     plt.pie(Product_value, labels=Product_value.index, autopct='%1.1f%%', startangle=140)
@@ -767,7 +849,8 @@ def plot_KPI(df):
 
     return fig
 
-def get_all_plots(cumulative_df, today_data,grouped_df, start_date=None, end_date=None):
+def get_all_plots(cumulative_df, today_data,grouped_df, start_date=None, end_date=None, instruments_df=None,
+                  sparse_positions=None):
     """
     Generates and returns a dictionary of various plot objects for visualization.
 
@@ -783,36 +866,53 @@ def get_all_plots(cumulative_df, today_data,grouped_df, start_date=None, end_dat
                                        KPI and other time-sensitive visualizations.
         grouped_df (pandas.DataFrame): A DataFrame with grouped data, primarily used for plotting 
                                        totals and percentage breakdowns by date.
+        instruments_df (pandas.DataFrame, optional): The instrument table (one row per ISIN) of cumulative_df ;
+                                       its descriptive columns are joined only by the figures needing them
+                                       (product names). None when cumulative_df already has them.
+        sparse_positions (SparsePositions, optional): The sparse storage of cumulative_df (holding intervals only) ;
+                                       the figures drawn over the whole calendar materialize their dense rows
+                                       when they are built.
 
     Returns:
-        dict: A dictionary where the keys are strings representing plot titles (e.g., "Guard Page", 
+        PlotRegistry: A read-only mapping where the keys are strings representing plot titles (e.g., "Guard Page", 
               "ReadMe", "KPI Plot", etc.), and the values are plot objects generated by the respective 
-              plot functions.
+              plot functions. A figure is only built when it is first requested (tab shown, export), then memoized ;
+              `plots.set_data(...)` with new data rebuilds the figures depending on it on their next request.
               
     Notes:
         - The function assumes that the helper functions (e.g., `create_guard_page`, `plot_KPI`, etc.) 
           are defined elsewhere and return valid plot objects or sections.
-        - The dictionary returned can be used for dynamically generating reports or visualizations.
+        - The registry returned can be used for dynamically generating reports or visualizations.
     """
-    # Create a dictionary to store the plot objects
-    plots = {}
-    
-    # Add plots to the dictionary with meaningful keys
-    plots["Guard Page"] = create_guard_page()
-    plots["ReadMe"] = create_ReadMe()
-    plots["KPI Plot"] = plot_KPI(today_data)
-    plots["Pivot Table"] = plot_pivot_table(today_data)
-    plots["Total by Date"] = plot_total_by_date(grouped_df, start_date, end_date)
-    plots["Total Pct by Date"] = plot_total_pct_by_date(grouped_df)
-    plots["Portfolio Product Percentage"] = plot_portfolio_product_percentage_by_date(cumulative_df)
-    plots["Pie Portfolio by ISIN"] = plot_pie_portfolio_by_ISIN(today_data)
-    plots["Pie Portfolio by Asset Type"] = plot_pie_portfolio_by_asset_type(today_data)
-    plots["Appendixes"] = create_page_section('Appendixes')
-    plots["Total Var by Date"] = plot_total_var_by_date(grouped_df)
+    # Figures are built on first request, then memoized until their data changes
+    plots = PlotRegistry()
+
+    # Add plots to the registry with meaningful keys and the data they depend on
+    plots.register("Guard Page", create_guard_page)
+    plots.register("ReadMe", create_ReadMe)
+    plots.register("KPI Plot", plot_KPI, inputs=('today_data',))
+    plots.register("Pivot Table", plot_pivot_table, inputs=('today_data',))
+    plots.register("Total by Date", plot_total_by_date, inputs=('grouped_df', 'start_date', 'end_date'))
+    plots.register("Total Pct by Date", plot_total_pct_by_date, inputs=('grouped_df',))
+    plots.register("Portfolio Product Percentage", plot_portfolio_product_percentage_by_date, inputs=('product_view',))
+    plots.register("Pie Portfolio by ISIN", plot_pie_portfolio_by_ISIN, inputs=('today_data',))
+    plots.register("Pie Portfolio by Asset Type", plot_pie_portfolio_by_asset_type, inputs=('today_data',))
+    plots.register("Appendixes", lambda: create_page_section('Appendixes'))
+    plots.register("Total Var by Date", plot_total_var_by_date, inputs=('grouped_df',))
 
     # Extend with additional plots from the functions that return lists
-    plots["ISIN Percentage by Date"] = plots_ISIN_pct_by_date(cumulative_df)
-    plots["ISIN by Date"] = plots_ISIN_by_date(cumulative_df)
-    plots["Portfolio by ISIN by Date"] = plots_portfolio_by_ISIN_by_date(cumulative_df)
-    
+    # (they share the rows of cumulative_df split once by ISIN)
+    plots.register("ISIN Percentage by Date", plots_ISIN_pct_by_date, inputs=('instruments',), per_instrument=True)
+    plots.register("ISIN by Date", plots_ISIN_by_date, inputs=('instruments',), per_instrument=True)
+    plots.register("Portfolio by ISIN by Date", plots_portfolio_by_ISIN_by_date, inputs=('instruments',))
+
+    plots.derive('instruments', InstrumentPartition, inputs=('cumulative_df', 'instruments_df', 'sparse_positions'))
+    # Daily rows of every instrument on every day, with their product name only
+    plots.derive('product_view', lambda df, instruments_df, sparse_positions:
+                 join_instruments(dense_frame(df, sparse_positions), instruments_df, ['Products']),
+                 inputs=('cumulative_df', 'instruments_df', 'sparse_positions'))
+
+    plots.set_data(cumulative_df=cumulative_df, today_data=today_data, grouped_df=grouped_df,
+                   start_date=start_date, end_date=end_date, instruments_df=instruments_df,
+                   sparse_positions=sparse_positions)
     return plots
\ No newline at end of file
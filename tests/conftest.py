@@ -0,0 +1,69 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Shared setup of the test suite : python -m pytest tests
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+import sys
+import pandas as pd
+import pytest
+
+# The modules import each other from the root of the repository (Config, functions), like Main.py and Batch.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Column titles of a DEGIRO export (French interface)
+DEGIRO_HEADER = ["Date", "Heure", "Produit", "Code ISIN", "Place boursiè", "Lieu d'exécution", "Quantité", "Cours", "",
+                 "Montant devise locale", "", "Montant", "", "Taux de change", "Frais de courtage", "", "Montant négocié",
+                 "", "ID Ordre"]
+
+@pytest.fixture
+def write_degiro_export():
+    """
+    Writer of DEGIRO CSV exports : `write(path, trades, encoding='utf-8', delimiter=';')`, each trade a tuple
+    (date 'dd-mm-yyyy', time 'HH:MM', product, ISIN, exchange, quantity, price, fees, order ID).
+    """
+    def write(path, trades, encoding='utf-8', delimiter=';'):
+        lines = [delimiter.join(DEGIRO_HEADER)]
+        for date, time, product, isin, exchange, quantity, price, fees, order_id in trades:
+            amount = round(-quantity * price, 2)
+            lines.append(delimiter.join(map(str, [
+                date, time, product, isin, exchange, 'XAMS', quantity, price, 'EUR', amount, 'EUR', amount, 'EUR', '',
+                fees, 'EUR', round(amount + fees, 2), 'EUR', order_id])))
+        path.write_bytes(("\n".join(lines) + "\n").encode(encoding))
+        return path
+    return write
+
+# Yahoo Finance ticker (OpenFIGI answer) of the ISINs of the offline runs
+OFFLINE_TICKERS = {'NL0010273215': 'ASML', 'FR0000120578': 'SAN', 'DE0007164600': 'SAP'}
+
+def offline_history(yahoo_ticker, start, end):
+    # Same closes for a date whatever the requested range : business days, end exclusive
+    days = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+    close = 20 + sum(map(ord, yahoo_ticker)) % 80 + (days - pd.Timestamp('2020-01-01')).days % 37 * 0.5
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0,
+                         'Dividends': 0.0, 'Stock Splits': 0.0}, index=days)
+
+@pytest.fixture
+def offline_providers(monkeypatch):
+    """
+    Runs create_dataset without network : internet reported up, OpenFIGI answering OFFLINE_TICKERS, Yahoo Finance
+    replaced by deterministic closes (offline_history) and fixed metadata.
+    """
+    from functions import Data_Fetching_Cleaning
+    from functions.openfigi import OpenFigiMapper
+    monkeypatch.setattr(Data_Fetching_Cleaning, 'is_internet_up', lambda: True)
+    monkeypatch.setattr(OpenFigiMapper, 'fetch', lambda self, isins: {isin: OFFLINE_TICKERS.get(isin) for isin in isins})
+    monkeypatch.setattr(Data_Fetching_Cleaning, 'yahoo_history', offline_history)
+    monkeypatch.setattr(Data_Fetching_Cleaning, 'yahoo_bulk_history', lambda yahoo_tickers, start, end: {
+        yahoo_ticker: offline_history(yahoo_ticker, start, end) for yahoo_ticker in yahoo_tickers})
+    monkeypatch.setattr(Data_Fetching_Cleaning, 'yahoo_metadata', lambda yahoo_ticker: {
+        'Asset Type': 'Equity', 'Sector': 'Technology', 'Geographical Location': 'Europe'})
+    return Data_Fetching_Cleaning
@@ -0,0 +1,64 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Exit codes of the headless batch run (Batch.run), on offline providers
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+from datetime import datetime
+import pandas as pd
+import pytest
+
+# Const
+from Config.config import *
+# ----- From Files
+import Batch
+from functions.errors import EXIT_OK, EXIT_SOURCE_EMPTY, EXIT_INVALID_EXPORT, EXIT_EXPORT_FAILED
+
+@pytest.fixture
+def folders(tmp_path):
+    return {name: tmp_path / name for name in ('source', 'output', 'cache')}
+
+def run(folders, *options):
+    return Batch.run(Batch.parse_args(['--source', str(folders['source']), '--output', str(folders['output']),
+                                       '--cache', str(folders['cache']), '--workers', '1', *options]))
+
+def test_missing_source_folder(folders, capsys):
+    assert run(folders) == EXIT_SOURCE_EMPTY
+    assert 'Source Folder Empty' in capsys.readouterr().err
+
+def test_invalid_export(folders, offline_providers):
+    folders['source'].mkdir()
+    (folders['source'] / 'statement.csv').write_text("Date,Description,Amount\n2024-01-02,Deposit,1000\n", encoding='utf-8')
+
+    assert run(folders) == EXIT_INVALID_EXPORT
+    assert not folders['output'].exists()
+
+@pytest.fixture
+def export(folders, offline_providers, write_degiro_export):
+    folders['source'].mkdir()
+    write_degiro_export(folders['source'] / 'Transactions.csv',
+                        [('02-01-2024', '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 600.0, -2.0, 'order-1'),
+                         ('03-01-2024', '11:00', 'SANOFI', 'FR0000120578', 'EPA', 8, 90.0, -1.0, 'order-2')])
+
+def test_successful_run(folders, export):
+    assert run(folders, '--no-pdf', '--no-png', '--parquet') == EXIT_OK
+
+    date_folder = folders['output'] / datetime.now().strftime('%Y-%m-%d')
+    dataset = pd.read_csv(date_folder / 'output_file.csv')
+    assert set(dataset['ISIN']) == {'NL0010273215', 'FR0000120578'}
+    assert dataset['Date'].min() == '2024-01-02'
+    assert os.path.isdir(date_folder / DATASET_PARQUET_FOLDER)
+    assert not list(date_folder.glob('*.png')) and not list(date_folder.glob('*.pdf'))
+
+def test_export_failed(folders, export, capsys):
+    # The output folder is a file : nothing can be written
+    folders['output'].write_text('', encoding='utf-8')
+
+    assert run(folders, '--no-pdf', '--no-png') == EXIT_EXPORT_FAILED
+    assert 'Export failed' in capsys.readouterr().err
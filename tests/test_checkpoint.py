@@ -0,0 +1,165 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Checkpoint of the portfolio (functions.checkpoint) : price fingerprint, storage, and resumed runs of
+# --         create_dataset compared with full runs
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+import pytest
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.checkpoint import CheckpointStore, PortfolioCheckpoint
+from functions.cost_basis import FifoLedger
+from functions.positions import SparsePositions
+
+@pytest.fixture
+def closes():
+    dates = pd.bdate_range('2024-01-01', '2024-03-29')
+    return pd.DataFrame({'ASML.AS': np.linspace(600, 800, len(dates)), 'SAN.PA': np.linspace(90, 85, len(dates))},
+                        index=dates)
+
+def make_checkpoint(closes):
+    date_range = pd.date_range('2024-01-01', '2024-03-31')
+    isins = ['NL0010273215', 'FR0000120578']
+    quantity = np.zeros((len(date_range), 2), dtype='int64')
+    quantity[10:] = [10, 4]
+    value = quantity * 100.0
+    history = SparsePositions.from_arrays(date_range, isins, quantity, value, value, np.zeros(quantity.shape))
+    ledger = FifoLedger()
+    ledger.buy('NL0010273215', 10, 600.0)
+    ledger.buy('FR0000120578', 4, 90.0)
+    return PortfolioCheckpoint(date_range[-1], 'transactions', isins, quantity[-1], value[-1],
+                               {isin: closes.index[-1] for isin in isins}, ledger, history,
+                               price_fingerprint=PortfolioCheckpoint.closes_fingerprint(closes))
+
+def test_revised_closes_do_not_match(closes):
+    checkpoint = make_checkpoint(closes)
+    assert checkpoint.prices_match(closes.copy())
+
+    # Closes adjusted again (dividend), a close missing, another ticker
+    adjusted = closes.copy()
+    adjusted.loc[:'2024-02-15', 'SAN.PA'] *= 0.98
+    assert not checkpoint.prices_match(adjusted)
+    assert not checkpoint.prices_match(closes.drop(closes.index[5]))
+    assert not checkpoint.prices_match(closes.rename(columns={'SAN.PA': 'SNY'}))
+
+def test_checkpoint_without_price_fingerprint_never_matches(closes):
+    checkpoint = make_checkpoint(closes)
+    checkpoint.price_fingerprint = None
+    assert not checkpoint.prices_match(closes)
+
+def test_store_keeps_the_price_fingerprint(closes, tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoint.db'))
+    checkpoint = make_checkpoint(closes)
+    store.save(checkpoint)
+    loaded = store.load()
+
+    assert loaded.prices_match(closes)
+    assert loaded.fingerprint == 'transactions' and loaded.date == checkpoint.date
+    pd.testing.assert_frame_equal(loaded.history.to_frame(), checkpoint.history.to_frame())
+    assert loaded.history.to_frame()['Qty'].dtype == 'int32'
+
+def day(days_ago):
+    return (pd.Timestamp('today') - pd.Timedelta(days=days_ago)).strftime('%d-%m-%Y')
+
+def trades():
+    # (date, time, product, ISIN, exchange, quantity, price, fees, order ID), all before the checkpoint date
+    return [(day(200), '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 600.0, -2.0, 'order-1'),
+            (day(150), '11:00', 'SANOFI', 'FR0000120578', 'EPA', 8, 90.0, -1.0, 'order-2'),
+            (day(100), '15:12', 'ASML HOLDING', 'NL0010273215', 'EAM', -4, 650.0, -2.9, 'order-3'),
+            (day(60), '10:30', 'SANOFI', 'FR0000120578', 'EPA', 5, 92.0, -1.0, 'order-4')]
+
+@pytest.fixture
+def run_dataset(offline_providers, tmp_path, monkeypatch, capsys):
+    """
+    Runs create_dataset on the offline providers.
+
+    Returns:
+        callable: `run(cache, incremental)` -> (positions, instruments, resumed from a checkpoint, full rebuild messages).
+    """
+    resumed = []
+    resume_positions_df = offline_providers.resume_positions_df
+    def recording_resume(df, date_range, isins, prices, metadata, checkpoint, *args, **kwargs):
+        resumed.append(checkpoint is not None)
+        return resume_positions_df(df, date_range, isins, prices, metadata, checkpoint, *args, **kwargs)
+    monkeypatch.setattr(offline_providers, 'resume_positions_df', recording_resume)
+
+    def run(cache, incremental):
+        monkeypatch.setattr(offline_providers, 'INCREMENTAL_RUN', incremental)
+        resumed.clear()
+        capsys.readouterr()
+        positions, instruments = offline_providers.create_dataset(str(tmp_path / 'source'), str(tmp_path / cache),
+                                                                  MemoryReport=False)
+        messages = [line for line in capsys.readouterr().out.splitlines() if 'full rebuild' in line]
+        if isinstance(positions, SparsePositions):
+            positions = positions.to_frame()
+        return positions, instruments, resumed == [True], messages
+    return run
+
+@pytest.fixture(params=[False, True], ids=['dense', 'sparse'])
+def export(request, offline_providers, tmp_path, write_degiro_export, monkeypatch):
+    monkeypatch.setattr(offline_providers, 'SPARSE_POSITIONS', request.param)
+    (tmp_path / 'source').mkdir()
+    return lambda trades: write_degiro_export(tmp_path / 'source' / 'Transactions.csv', trades)
+
+def assert_same_dataset(run, other):
+    pd.testing.assert_frame_equal(run[0], other[0])
+    pd.testing.assert_frame_equal(run[1], other[1])
+
+def test_resumed_run_equals_a_full_run(export, run_dataset):
+    export(trades())
+    first = run_dataset('cache', incremental=True)
+    assert not first[2] and first[3] == []
+
+    # A trade of a held instrument and a first trade of another one, both after the checkpoint
+    export(trades() + [(day(1), '09:30', 'ASML HOLDING', 'NL0010273215', 'EAM', 3, 640.0, -2.0, 'order-5'),
+                       (day(1), '10:00', 'SAP SE', 'DE0007164600', 'XETR', 6, 150.0, -2.0, 'order-6')])
+    resumed = run_dataset('cache', incremental=True)
+    full = run_dataset('fresh cache', incremental=False)
+
+    assert resumed[2] and resumed[3] == []
+    assert 'DE0007164600' in set(resumed[0]['ISIN'])
+    assert_same_dataset(resumed, full)
+
+def test_edited_transaction_rebuilds(export, run_dataset):
+    export(trades())
+    run_dataset('cache', incremental=True)
+
+    # The quantity of a trade before the checkpoint corrected in a new export
+    edited = trades()
+    edited[1] = edited[1][:5] + (18,) + edited[1][6:]
+    export(edited)
+    rebuilt = run_dataset('cache', incremental=True)
+    full = run_dataset('fresh cache', incremental=False)
+
+    assert not rebuilt[2] and len(rebuilt[3]) == 1 and 'Transactions changed' in rebuilt[3][0]
+    assert_same_dataset(rebuilt, full)
+
+def test_revised_close_rebuilds(export, run_dataset, tmp_path):
+    export(trades())
+    run_dataset('cache', incremental=True)
+
+    # Closes before the checkpoint adjusted again (e.g. after a dividend) in the price store
+    with closing(sqlite3.connect(tmp_path / 'cache' / PRICE_CACHE_DB)) as conn:
+        revised = conn.execute("UPDATE prices SET Close = Close * 0.98 WHERE Ticker = 'SAN.PA' AND Date <= ?",
+                               ((pd.Timestamp('today') - pd.Timedelta(days=30)).strftime('%Y-%m-%d'),)).rowcount
+        conn.commit()
+    assert revised > 0
+    rebuilt = run_dataset('cache', incremental=True)
+    full = run_dataset('cache', incremental=False)
+
+    assert not rebuilt[2] and len(rebuilt[3]) == 1 and 'Prices changed' in rebuilt[3][0]
+    assert_same_dataset(rebuilt, full)
+    # Checkpoint saved again with the revised closes : the next run resumes
+    assert run_dataset('cache', incremental=True)[2]
@@ -0,0 +1,71 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Round-trip of the columnar exports of the dataset (Parquet partitioned by year, Feather) through read_dataset
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.dataset_io import export_df_feather, export_df_parquet, read_dataset
+
+@pytest.fixture
+def dataset():
+    """
+    Daily rows of two instruments over three calendar years, with the dtypes of the joined dataset.
+    """
+    dates = pd.date_range('2023-12-20', '2025-01-10', freq='D')
+    isins = ['NL0010273215', 'FR0000120578']
+    df = pd.DataFrame({'Date': np.repeat(dates, len(isins)), 'ISIN': np.tile(isins, len(dates))})
+    df['ISIN'] = df['ISIN'].astype('category')
+    df['Qty'] = (np.arange(len(df)) % 9).astype('int32')
+    df['Close'] = 100 + np.arange(len(df)) / 4
+    df['Products'] = np.where(df['ISIN'] == 'NL0010273215', 'ASML HOLDING', 'SANOFI')
+    return df
+
+def assert_dtypes_kept(df):
+    assert isinstance(df['ISIN'].dtype, pd.CategoricalDtype)
+    assert df['Qty'].dtype == np.int32
+    assert pd.api.types.is_datetime64_dtype(df['Date'])
+
+def test_parquet_round_trip(dataset, tmp_path):
+    path = export_df_parquet(str(tmp_path), dataset, popup=False)
+
+    assert sorted(os.listdir(path)) == ['Year=2023', 'Year=2024', 'Year=2025']
+    df = read_dataset(path)
+    assert_dtypes_kept(df)
+    # The rows of the dataset are in date order : year by year is the same order
+    pd.testing.assert_frame_equal(df, dataset)
+
+def test_parquet_years_are_filtered(dataset, tmp_path):
+    path = export_df_parquet(str(tmp_path), dataset, popup=False)
+    df = read_dataset(path, years=[2024])
+
+    assert_dtypes_kept(df)
+    expected = dataset[dataset['Date'].dt.year == 2024].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, expected)
+
+def test_parquet_export_replaces_the_previous_one(dataset, tmp_path):
+    export_df_parquet(str(tmp_path), dataset, popup=False)
+    path = export_df_parquet(str(tmp_path), dataset[dataset['Date'].dt.year == 2025], popup=False)
+
+    assert os.listdir(path) == ['Year=2025']
+    assert len(read_dataset(path)) == (dataset['Date'].dt.year == 2025).sum()
+
+def test_feather_round_trip(dataset, tmp_path):
+    path = export_df_feather(str(tmp_path), dataset.set_index('Date', drop=False), popup=False)
+
+    assert path == str(tmp_path / DATASET_FEATHER_FILE)
+    df = read_dataset(path)
+    assert_dtypes_kept(df)
+    pd.testing.assert_frame_equal(df, dataset)
@@ -0,0 +1,148 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Export DB (store_tickers_data_sqlite3_DB) from the data of the run, without any network access, and its
+# --         streamed CSV export (export_sqlite_to_csv)
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import csv
+import gzip
+import sqlite3
+from contextlib import closing
+import pandas as pd
+import pytest
+import requests
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.Data_Fetching_Cleaning import export_sqlite_to_csv, store_tickers_data_sqlite3_DB
+from functions.openfigi import OpenFigiMapper
+from functions.price_cache import PriceStore
+from functions.price_repository import PriceRepository
+from functions.ticker_store import TickerStore
+
+def offline(*args, **kwargs):
+    raise AssertionError("network access during the export")
+
+def history(start, end):
+    days = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+    close = 100 + days.dayofyear.to_numpy() / 10
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0,
+                         'Dividends': 0.0, 'Stock Splits': 0.0}, index=days)
+
+@pytest.fixture
+def cache_folder(tmp_path, monkeypatch):
+    """
+    Caches of a previous run : prices of ASML.AS and SAP.DE, the ticker of SAP in the OpenFIGI cache.
+    Any price or mapping request fails the test.
+    """
+    monkeypatch.setattr(OpenFigiMapper, 'fetch', offline)
+    monkeypatch.setattr(requests.Session, 'request', offline)
+    cache_folder = tmp_path / 'cache'
+    store = PriceStore(str(cache_folder / PRICE_CACHE_DB), provider=offline, bulk_provider=offline)
+    for yahoo_ticker in ('ASML.AS', 'SAP.DE'):
+        store.store_history(yahoo_ticker, history('2024-01-01', '2024-03-01'), '2024-01-01', '2024-03-01')
+    OpenFigiMapper(str(cache_folder / FIGI_CACHE_DB))._save([('DE0007164600', 'SAP', 'found')])
+    return cache_folder
+
+@pytest.fixture
+def dataset():
+    # ASML and Sanofi valued by the run, SAP and an ISIN never mapped out of it
+    dates = pd.date_range('2024-01-02', '2024-02-29', freq='D')
+    places = {'NL0010273215': 'EAM', 'FR0000120578': 'EPA', 'DE0007164600': 'XETR', 'US0000000001': 'NDQ'}
+    return pd.DataFrame([(date, isin, place) for isin, place in places.items() for date in dates],
+                        columns=['Date', 'ISIN', 'Place'])
+
+def stored_rows(output_folder):
+    with closing(sqlite3.connect(output_folder / 'tickers_data.db')) as conn:
+        return dict(conn.execute('SELECT Ticker, COUNT(*) FROM tickers_data GROUP BY Ticker').fetchall())
+
+def test_export_is_offline(cache_folder, dataset, tmp_path):
+    repository = PriceRepository()
+    repository.reset({'NL0010273215': 'ASML.AS', 'FR0000120578': None},
+                     PriceStore(str(cache_folder / PRICE_CACHE_DB), provider=offline, bulk_provider=offline),
+                     '2024-01-02', '2024-03-01')
+    store_tickers_data_sqlite3_DB(dataset, str(tmp_path), str(cache_folder), repository)
+
+    # Business days from the 2nd of January to the 28th of February (end exclusive)
+    expected = len(pd.bdate_range('2024-01-02', '2024-02-28'))
+    assert stored_rows(tmp_path) == {'ASML.AS': expected, 'SAP.DE': expected}
+
+def test_export_without_run_reads_the_caches(cache_folder, dataset, tmp_path):
+    # A new process : no mapping of a run, only the caches of the last one
+    store_tickers_data_sqlite3_DB(dataset, str(tmp_path), str(cache_folder), PriceRepository())
+
+    assert set(stored_rows(tmp_path)) == {'SAP.DE'}
+
+@pytest.fixture
+def tickers_db(tmp_path):
+    db_path = tmp_path / 'tickers_data.db'
+    with TickerStore(str(db_path)) as store:
+        for yahoo_ticker in ('ASML.AS', 'SAN.PA', 'SAP.DE'):
+            store.write(yahoo_ticker, history('2024-01-01', '2024-02-01'))
+    return db_path
+
+@pytest.fixture
+def batches(monkeypatch):
+    """
+    Number of rows of each batch written to a CSV.
+    """
+    sizes = []
+    writer = csv.writer
+    class Writer:
+        def __init__(self, csvfile):
+            self.writer = writer(csvfile)
+        def writerow(self, row):
+            return self.writer.writerow(row)
+        def writerows(self, rows):
+            sizes.append(len(rows))
+            return self.writer.writerows(rows)
+    monkeypatch.setattr(csv, 'writer', Writer)
+    return sizes
+
+def expected_rows(db_path, query, params=()):
+    with closing(sqlite3.connect(db_path)) as conn:
+        cursor = conn.execute(query, params)
+        return [[description[0] for description in cursor.description]] + [
+            ['' if value is None else str(value) for value in row] for row in cursor.fetchall()]
+
+def test_export_is_streamed_by_batches(tickers_db, tmp_path, batches):
+    rows = export_sqlite_to_csv(str(tickers_db), 'tickers_data', str(tmp_path / 'dboutput.csv'), batch_size=10)
+
+    expected = expected_rows(tickers_db, 'SELECT * FROM tickers_data')
+    assert rows == len(expected) - 1 == 3 * 23
+    assert batches == [10] * 6 + [9]
+    with open(tmp_path / 'dboutput.csv', newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == expected
+
+def test_filtered_export_is_compressed(tickers_db, tmp_path, batches):
+    output_csv = str(tmp_path / 'dboutput.csv.gz')
+    rows = export_sqlite_to_csv(str(tickers_db), 'tickers_data', output_csv, start='2024-01-10', end=pd.Timestamp('2024-01-20'),
+                                tickers=['SAP.DE', 'ASML.AS', 'UNKNOWN'], batch_size=4)
+
+    expected = expected_rows(tickers_db, "SELECT * FROM tickers_data WHERE Date >= '2024-01-10' AND Date < '2024-01-20' "
+                                         "AND Ticker IN ('ASML.AS', 'SAP.DE')")
+    # Business days from the 10th to the 19th, for two tickers
+    assert rows == len(expected) - 1 == 2 * 8
+    assert batches == [4] * 4
+    with gzip.open(output_csv, 'rt', newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == expected
+
+def test_compression_follows_the_parameter(tickers_db, tmp_path):
+    export_sqlite_to_csv(str(tickers_db), 'tickers_data', str(tmp_path / 'plain.csv.gz'), tickers=['SAN.PA'], compress=False)
+    export_sqlite_to_csv(str(tickers_db), 'tickers_data', str(tmp_path / 'packed.csv'), tickers=['SAN.PA'], compress=True)
+
+    assert (tmp_path / 'plain.csv.gz').read_bytes().startswith(b'Date,Ticker')
+    with gzip.open(tmp_path / 'packed.csv', 'rb') as f:
+        assert f.read() == (tmp_path / 'plain.csv.gz').read_bytes()
+
+def test_no_matching_row_writes_the_header(tickers_db, tmp_path):
+    assert export_sqlite_to_csv(str(tickers_db), 'tickers_data', str(tmp_path / 'dboutput.csv'), tickers=[]) == 0
+    assert (tmp_path / 'dboutput.csv').read_text(encoding='utf-8').splitlines() == [
+        'Date,Ticker,Open,High,Low,Close,Volume,Dividends,Stock Splits']
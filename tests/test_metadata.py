@@ -0,0 +1,136 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Instrument metadata cache (TTL) and background enrichment (functions.metadata)
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions.metadata import METADATA_COLUMNS, MetadataCache, MetadataEnrichment
+from functions.fetching import UNKNOWN_METADATA
+from functions.plot_registry import PlotRegistry
+
+JOBS = [('NL0010273215', 'ASML.AS'), ('FR0000120578', 'SAN.PA'), ('DE0007164600', 'SAP.DE')]
+METADATA = {
+    'ASML.AS': {'Asset Type': 'Equity', 'Sector': 'Technology', 'Geographical Location': 'Netherlands'},
+    'SAN.PA': {'Asset Type': 'Equity', 'Sector': 'Healthcare', 'Geographical Location': 'France'},
+    'SAP.DE': {'Asset Type': 'Equity', 'Sector': 'Technology', 'Geographical Location': 'Germany'},
+}
+
+class FakeMetadata:
+    """
+    Yahoo Finance .info stand-in, every call recorded ; `release` lets the calls return.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, yahoo_ticker):
+        self.release.wait(5)
+        self.calls.append(yahoo_ticker)
+        return METADATA[yahoo_ticker]
+
+@pytest.fixture
+def cache(tmp_path):
+    return MetadataCache(str(tmp_path / 'metadata.db'), ttl_days=30)
+
+def age(cache, isin, days):
+    # Entry saved `days` ago
+    updated = (datetime.now() - timedelta(days=days)).isoformat(timespec='seconds')
+    with closing(sqlite3.connect(cache.db_path)) as conn:
+        conn.execute('UPDATE instrument_metadata SET Updated = ? WHERE ISIN = ?', (updated, isin))
+        conn.commit()
+
+def enrich(cache, get_metadata):
+    # As create_dataset : only the ISINs without a fresh entry are fetched
+    known = cache.get_fresh([isin for isin, yahoo_ticker in JOBS])
+    return known, MetadataEnrichment([job for job in JOBS if job[0] not in known], cache, get_metadata).run()
+
+def test_expired_entry_is_fetched_again(cache):
+    get_metadata = FakeMetadata()
+    enrich(cache, get_metadata)
+    assert sorted(get_metadata.calls) == ['ASML.AS', 'SAN.PA', 'SAP.DE']
+
+    # SAP older than the TTL, ASML just under it
+    age(cache, 'DE0007164600', 31)
+    age(cache, 'NL0010273215', 29)
+    known, fetched = enrich(cache, get_metadata)
+
+    assert set(known) == {'NL0010273215', 'FR0000120578'}
+    assert known['NL0010273215'] == METADATA['ASML.AS']
+    assert get_metadata.calls[3:] == ['SAP.DE'] and set(fetched) == {'DE0007164600'}
+    # Refreshed : fresh again
+    assert set(cache.get_fresh(['DE0007164600'])) == {'DE0007164600'}
+
+def test_failed_lookup_is_not_cached(cache):
+    def get_metadata(yahoo_ticker):
+        if yahoo_ticker == 'SAN.PA':
+            raise ValueError("no data")
+        return METADATA[yahoo_ticker]
+    known, fetched = enrich(cache, get_metadata)
+
+    assert set(fetched) == {'NL0010273215', 'DE0007164600'}
+    assert set(cache.get_fresh([isin for isin, yahoo_ticker in JOBS])) == {'NL0010273215', 'DE0007164600'}
+
+def instruments():
+    return pd.DataFrame({'Products': ['ASML HOLDING', 'SANOFI', 'SAP SE'], **{column: 'Unknown' for column in METADATA_COLUMNS}},
+                        index=pd.Index([isin for isin, yahoo_ticker in JOBS], name='ISIN'))
+
+def test_apply_fills_the_fetched_instruments(cache):
+    enrichment = MetadataEnrichment(JOBS[:2], cache, FakeMetadata())
+    enrichment.run()
+    instruments_df = instruments()
+    assert enrichment.apply(instruments_df) is instruments_df
+
+    assert instruments_df.loc['NL0010273215', METADATA_COLUMNS].to_dict() == METADATA['ASML.AS']
+    assert instruments_df.loc['FR0000120578', METADATA_COLUMNS].to_dict() == METADATA['SAN.PA']
+    # Not enriched : left as it was
+    assert instruments_df.loc['DE0007164600', METADATA_COLUMNS].to_dict() == UNKNOWN_METADATA
+    assert list(instruments_df['Products']) == ['ASML HOLDING', 'SANOFI', 'SAP SE']
+
+def test_charts_do_not_wait_for_the_enrichment(cache):
+    get_metadata = FakeMetadata()
+    get_metadata.release.clear()
+    enrichment = MetadataEnrichment(JOBS, cache, get_metadata).start()
+    instruments_df = instruments()
+
+    # As Main.py : the figures are registered and built while the metadata is still being fetched
+    plots = PlotRegistry()
+    plots.register("Pie Portfolio by Asset Type", lambda today_data: today_data['Asset Type'].tolist(), inputs=('today_data',))
+    plots.register("ISIN by Date", lambda instruments_df: instruments_df['Products'].tolist(), inputs=('instruments_df',))
+    plots.set_data(today_data=instruments_df.copy(), instruments_df=instruments_df)
+    assert plots["Pie Portfolio by Asset Type"] == ['Unknown'] * 3
+    names = plots["ISIN by Date"]
+
+    applied = threading.Event()
+    def apply_metadata(enrichment):
+        enrichment.apply(instruments_df)
+        plots.set_data(today_data=instruments_df.copy())
+        applied.set()
+    enrichment.add_done_callback(apply_metadata)
+    assert not applied.is_set()
+
+    get_metadata.release.set()
+    assert applied.wait(5)
+    # Only the figures of the latest data are built again
+    assert not plots.is_built("Pie Portfolio by Asset Type") and plots.is_built("ISIN by Date")
+    assert plots["Pie Portfolio by Asset Type"] == ['Equity'] * 3
+    assert plots["ISIN by Date"] is names
+
+    # Added once done : called right away
+    called = []
+    enrichment.add_done_callback(called.append)
+    assert called == [enrichment]
@@ -0,0 +1,149 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Batched OpenFIGI mapping (functions.openfigi) against a local HTTP stand-in of the API
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import json
+import sqlite3
+import threading
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# Const
+from Config.config import *
+# ----- From Files
+from functions.openfigi import OpenFigiMapper
+from functions.fetching import RateLimiter
+
+class FigiStandIn(BaseHTTPRequestHandler):
+    """
+    The mapping endpoint : ISINs starting with 'XX' are unknown, the others map to their 4 first letters.
+    The first `server.rate_limited` requests are answered 429 ; the last `server.missing_answers` answers of each
+    request are left out.
+    """
+
+    def do_POST(self):
+        jobs = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append({'jobs': [job['idValue'] for job in jobs],
+                                     'api_key': self.headers.get('X-OPENFIGI-APIKEY')})
+        if self.server.rate_limited:
+            self.server.rate_limited -= 1
+            self.send_response(429)
+            self.end_headers()
+            return
+        answers = [{'warning': 'No identifier found.'} if isin.startswith('XX') else {'data': [{'ticker': isin[:4]}]}
+                   for isin in (job['idValue'] for job in jobs)]
+        answers = answers[:len(answers) - self.server.missing_answers]
+        body = json.dumps(answers).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FigiStandIn)
+    server.requests = []
+    server.rate_limited = 0
+    server.missing_answers = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_mapper(server, db_path, api_key=None):
+    mapper = OpenFigiMapper(str(db_path), api_key=api_key, url=f'http://127.0.0.1:{server.server_port}/v3/mapping',
+                            timeout=5)
+    # The stand-in is local : no proxy from the environment
+    mapper.session.trust_env = False
+    # Same limits, over a window short enough for a test (429 retries wait one window)
+    mapper.rate_limiter = RateLimiter(mapper.rate_limiter.max_calls, 0.01)
+    return mapper
+
+ISINS = [f'FR{index:010d}' for index in range(23)] + ['XX0000000001', 'XX0000000002']
+
+@pytest.mark.parametrize('api_key, batch_size', [(None, OPENFIGI_MAX_JOBS), ('secret', OPENFIGI_MAX_JOBS_WITH_KEY)])
+def test_isins_are_batched(server, tmp_path, api_key, batch_size):
+    # Two full batches and a partial one
+    isins = [f'FR{index:010d}' for index in range(batch_size * 2 + 3)] + ['XX0000000001', 'XX0000000002']
+    mapping = make_mapper(server, tmp_path / 'openfigi.db', api_key).map_isins(isins)
+
+    assert [len(request['jobs']) for request in server.requests] == [
+        min(batch_size, len(isins) - start) for start in range(0, len(isins), batch_size)]
+    assert all(request['api_key'] == api_key for request in server.requests)
+    assert [isin for request in server.requests for isin in request['jobs']] == isins
+    assert mapping[isins[0]] == isins[0][:4] and mapping['XX0000000001'] is None
+
+def test_rate_limit_is_retried(server, tmp_path):
+    server.rate_limited = 2
+    mapping = make_mapper(server, tmp_path / 'openfigi.db').map_isins(ISINS[:3])
+
+    # The same batch is sent again after each 429
+    assert [request['jobs'] for request in server.requests] == [ISINS[:3]] * 3
+    assert mapping == {isin: isin[:4] for isin in ISINS[:3]}
+
+def test_rate_limit_exhausted_is_not_cached(server, tmp_path):
+    server.rate_limited = OPENFIGI_MAX_RETRIES + 1
+    mapper = make_mapper(server, tmp_path / 'openfigi.db')
+
+    assert mapper.map_isins(ISINS[:3]) == {isin: None for isin in ISINS[:3]}
+    assert len(server.requests) == OPENFIGI_MAX_RETRIES + 1
+    assert mapper.get_cached(ISINS[:3]) == {}
+
+def test_answers_are_cached(server, tmp_path):
+    db_path = tmp_path / 'openfigi.db'
+    first = make_mapper(server, db_path).map_isins(ISINS)
+    with closing(sqlite3.connect(db_path)) as conn:
+        rows = {isin: (ticker, status) for isin, ticker, status in conn.execute('SELECT ISIN, Ticker, Status FROM figi_mapping')}
+    assert rows == {isin: (None, 'not found') if isin.startswith('XX') else (isin[:4], 'found') for isin in ISINS}
+
+    # Second run, new mapper on the same cache : no mapping call at all, "not found" included
+    requests_sent = len(server.requests)
+    assert make_mapper(server, db_path).map_isins(ISINS) == first
+    assert len(server.requests) == requests_sent
+
+def test_short_answer_is_not_cached(server, tmp_path, capsys):
+    server.missing_answers = 1
+    mapper = make_mapper(server, tmp_path / 'openfigi.db')
+
+    # A full batch and a partial one, each answered one result short : no answer matched to the wrong ISIN
+    isins = ISINS[:OPENFIGI_MAX_JOBS + 3]
+    assert mapper.map_isins(isins) == {isin: None for isin in isins}
+    assert mapper.get_cached(isins) == {}
+    assert capsys.readouterr().out.count('batch not cached') == 2
+
+    # Asked again on the next run
+    server.missing_answers = 0
+    assert mapper.map_isins(isins) == {isin: isin[:4] for isin in isins}
+    assert [request['jobs'] for request in server.requests[2:]] == [isins[:OPENFIGI_MAX_JOBS], isins[OPENFIGI_MAX_JOBS:]]
+
+def test_api_key_from_the_environment(offline_providers, tmp_path, write_degiro_export, monkeypatch):
+    keys = []
+    init = OpenFigiMapper.__init__
+    def recording_init(self, db_path, api_key=None, **kwargs):
+        keys.append(api_key)
+        init(self, db_path, api_key=api_key, **kwargs)
+    monkeypatch.setattr(OpenFigiMapper, '__init__', recording_init)
+    (tmp_path / 'source').mkdir()
+    write_degiro_export(tmp_path / 'source' / 'Transactions.csv',
+                        [('02-01-2024', '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 600.0, -2.0, 'order-1')])
+
+    monkeypatch.delenv('OPENFIGI_API_KEY', raising=False)
+    monkeypatch.setattr(offline_providers, 'OPENFIGI_API_KEY', 'from config')
+    offline_providers.create_dataset(str(tmp_path / 'source'), str(tmp_path / 'cache'), MemoryReport=False)
+    monkeypatch.setenv('OPENFIGI_API_KEY', 'from environment')
+    offline_providers.create_dataset(str(tmp_path / 'source'), str(tmp_path / 'cache'), MemoryReport=False)
+
+    assert keys == ['from config', 'from environment']
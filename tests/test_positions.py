@@ -0,0 +1,165 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Parity of the position engine (functions.positions) with the former per-day loop of create_dataset
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions.Data_Fetching_Cleaning import read_degiro_export
+from functions.cost_basis import compute_fifo_costs
+from functions.positions import CUMULATIVE_COLUMNS, create_positions_df, join_instruments
+from functions.prices import AsOfPriceIndex
+
+HEADER = ("Date;Heure;Produit;Code ISIN;Place boursiè;Lieu d'exécution;Quantité;Cours;;Montant devise locale;;Montant;;"
+          "Taux de change;Frais de courtage;;Montant négocié;;ID Ordre")
+
+# (date, time, product, ISIN, exchange, quantity, price, fees)
+TRADES = [
+    # Partial sale : 15 bought in two lots, 8 sold, then two buys on the same day
+    ('02-01-2024', '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 100.0, -2.0),
+    ('04-01-2024', '10:30', 'ASML HOLDING', 'NL0010273215', 'EAM', 5, 110.5, -2.0),
+    ('11-01-2024', '15:12', 'ASML HOLDING', 'NL0010273215', 'EAM', -8, 120.25, -2.9),
+    ('16-01-2024', '09:45', 'ASML HOLDING', 'NL0010273215', 'EAM', 2, 118.0, -1.0),
+    ('16-01-2024', '16:01', 'ASML HOLDING', 'NL0010273215', 'EAM', 3, 117.5, -1.0),
+    # Sold out, then bought back and partly sold again
+    ('03-01-2024', '11:00', 'SANOFI', 'FR0000120578', 'EPA', 20, 50.1, -3.0),
+    ('09-01-2024', '14:20', 'SANOFI', 'FR0000120578', 'EPA', -20, 55.3, -3.0),
+    ('17-01-2024', '10:10', 'SANOFI', 'FR0000120578', 'EPA', 7, 48.7, -2.0),
+    ('23-01-2024', '12:00', 'SANOFI', 'FR0000120578', 'EPA', -3, 51.05, -2.0),
+    # Bought before its first known close (valued 0 until then)
+    ('06-01-2024', '13:30', 'SAP SE', 'DE0007164600', 'XET', 4, 160.0, -4.5),
+]
+
+METADATA = {'Asset Type': 'Equity', 'Sector': 'Technology', 'Geographical Location': 'Europe'}
+
+def write_export(path):
+    """
+    Writes TRADES as a DEGIRO CSV export.
+    """
+    lines = [HEADER]
+    for order_id, (date, time, product, isin, exchange, quantity, price, fees) in enumerate(TRADES):
+        amount = round(-quantity * price, 2)
+        lines.append(f"{date};{time};{product};{isin};{exchange};XAMS;{quantity};{price};EUR;{amount};EUR;{amount};EUR;;"
+                     f"{fees};EUR;{round(amount + fees, 2)};EUR;order-{order_id}")
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+def closes(isin, date_range):
+    """
+    Business-day closes of an instrument : week-ends are missing, SAP has no close before the 10th.
+    """
+    days = pd.bdate_range(date_range[0], date_range[-1])
+    if isin == 'DE0007164600':
+        days = days[days >= '2024-01-10']
+    rng = np.random.default_rng(sum(map(ord, isin)))
+    return pd.DataFrame({'Date': days, 'Close': 100 + rng.standard_normal(len(days)).cumsum()})
+
+def legacy_positions(df, date_range, histories, metadata):
+    """
+    The per-day loop of create_dataset before the position engine, prices given instead of downloaded.
+    """
+    cumulative_values = []
+    for ISIN in df.iloc[:, 3].dropna().unique():
+        product_df = df[df.iloc[:, 3] == ISIN]
+        running_quantity = 0
+        running_montant = 0
+        running_value = 0
+        tickers_data = histories[ISIN].copy()
+        tickers_data['Date'] = pd.to_datetime(tickers_data['Date']).dt.date
+        tickers_data_dict = dict(zip(tickers_data['Date'], tickers_data['Close']))
+        for single_date in date_range:
+            fifo_cost = product_df[product_df.iloc[:, 0] == single_date]['FIFO Unit Cost'].sum()
+            daily_quantity = product_df[product_df.iloc[:, 0] == single_date].iloc[:, 6].sum()
+            daily_montant = - product_df[product_df.iloc[:, 0] == single_date].iloc[:, 16].sum()
+            day = pd.to_datetime(single_date).date()
+            if day in tickers_data_dict:
+                daily_value = tickers_data_dict[day]
+            else:
+                filtered_dates = [date for date in tickers_data_dict if date <= day]
+                daily_value = tickers_data_dict[max(filtered_dates)] if filtered_dates else 0
+            running_quantity += daily_quantity
+            if running_quantity == 0:
+                running_montant += 0
+            elif fifo_cost != 0:
+                running_montant += fifo_cost * daily_quantity
+            else:
+                running_montant += daily_montant
+            running_value = (daily_value * running_quantity)
+
+            product = product_df.iloc[:, 2].iloc[0]
+            place = product_df.iloc[:, 4].iloc[0]
+            exec_place = product_df.iloc[:, 5].iloc[0]
+            cumulative_values.append([
+                single_date, product, ISIN, place, exec_place,
+                running_quantity, running_montant, running_value,
+                metadata['Asset Type'], metadata['Sector'], metadata['Geographical Location'], fifo_cost
+            ])
+    return pd.DataFrame(cumulative_values, columns=CUMULATIVE_COLUMNS)
+
+@pytest.fixture
+def transactions(tmp_path):
+    """
+    The parsed export, sorted and with its FIFO unit costs, as create_dataset prepares it.
+    """
+    write_export(tmp_path / 'Transactions.csv')
+    df = read_degiro_export(str(tmp_path / 'Transactions.csv'))
+    df['DateTime'] = df.iloc[:, 0] + df.iloc[:, 1]
+    df = df.sort_values(by='DateTime', ascending=True)
+    df['FIFO Unit Cost'], ledger = compute_fifo_costs(df)
+    return df
+
+def engine_inputs(df):
+    date_range = pd.date_range(df.iloc[:, 0].min(), '2024-02-05', freq='D')
+    isins = list(df.iloc[:, 3].dropna().unique())
+    histories = {isin: closes(isin, date_range) for isin in isins}
+    prices = np.column_stack([AsOfPriceIndex.from_history(histories[isin]).lookup(date_range) for isin in isins])
+    first_rows = df.drop_duplicates(subset=df.columns[3], keep='first').set_index(df.columns[3])
+    metadata = pd.DataFrame({
+        'Products': first_rows[df.columns[2]], 'Place': first_rows[df.columns[4]], 'Exec Place': first_rows[df.columns[5]],
+        **METADATA,
+    }).loc[isins]
+    return date_range, isins, histories, prices, metadata
+
+def as_plain_frame(df):
+    """
+    Categoricals as plain objects, for a value by value comparison.
+    """
+    return df.astype({column: object for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_positions_match_legacy_loop(transactions, sparse):
+    date_range, isins, histories, prices, metadata = engine_inputs(transactions)
+    expected = legacy_positions(transactions, date_range, histories, METADATA)
+
+    cumulative_df, instruments_df = create_positions_df(transactions, date_range, isins, prices, metadata, sparse=sparse)
+    if sparse:
+        cumulative_df = cumulative_df.to_frame()
+    result = as_plain_frame(join_instruments(cumulative_df, instruments_df)).reset_index(drop=True)
+
+    assert list(result.columns) == CUMULATIVE_COLUMNS
+    # Whole shares, as in the export
+    assert pd.api.types.is_integer_dtype(result['Qty'])
+    for column in CUMULATIVE_COLUMNS:
+        pd.testing.assert_series_equal(result[column], expected[column], check_dtype=False, check_exact=True,
+                                       obj=f"column {column!r}")
+
+def test_scenarios_are_covered(transactions):
+    """
+    The export holds a partial sale and a product sold out then bought back.
+    """
+    date_range, isins, histories, prices, metadata = engine_inputs(transactions)
+    cumulative_df, instruments_df = create_positions_df(transactions, date_range, isins, prices, metadata)
+    quantity = cumulative_df.set_index(['ISIN', 'Date'])['Qty']
+
+    assert quantity[('NL0010273215', pd.Timestamp('2024-01-11'))] == 7
+    sanofi = quantity['FR0000120578']
+    assert (sanofi['2024-01-09':'2024-01-16'] == 0).all()
+    assert sanofi['2024-01-17'] == 7 and sanofi.iloc[-1] == 4
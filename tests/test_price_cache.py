@@ -0,0 +1,115 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Persistent price store (functions.price_cache), offline with fake providers
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions.price_cache import PriceStore
+
+class FakeProvider:
+    """
+    Business-day histories computed from the date, every call recorded. `dividends` (date -> amount) are reported on
+    their date, and the closes before them are adjusted like Yahoo Finance does (auto-adjust).
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.dividends = {}
+
+    def history(self, yahoo_ticker, start, end):
+        days = pd.bdate_range(pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+        close = 100 + days.dayofyear.to_numpy() / 10
+        dividends = np.zeros(len(days))
+        for date, amount in self.dividends.items():
+            close = np.where(days < date, close * (1 - amount / 100), close)
+            dividends[days == date] = amount
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0,
+                             'Dividends': dividends, 'Stock Splits': 0.0}, index=days)
+
+    def single(self, yahoo_ticker, start, end):
+        self.calls.append((yahoo_ticker, pd.Timestamp(start), pd.Timestamp(end)))
+        return self.history(yahoo_ticker, start, end)
+
+    def bulk(self, yahoo_tickers, start, end):
+        self.calls.append((tuple(yahoo_tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        return {yahoo_ticker: self.history(yahoo_ticker, start, end) for yahoo_ticker in yahoo_tickers}
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+@pytest.fixture
+def store(provider, tmp_path):
+    return PriceStore(str(tmp_path / 'prices.db'), provider=provider.single, bulk_provider=provider.bulk)
+
+def test_coverage_is_recorded_and_merged(store, provider):
+    store.get_history('ASML.AS', '2024-01-01', '2024-01-15')
+    store.get_history('ASML.AS', '2024-02-01', '2024-02-15')
+    assert store.get_coverage('ASML.AS') == [(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-15')),
+                                            (pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-15'))]
+
+    # Only the hole between both ranges is fetched, then the three ranges are one
+    store.get_history('ASML.AS', '2024-01-01', '2024-02-15')
+    assert provider.calls[-1] == ('ASML.AS', pd.Timestamp('2024-01-15'), pd.Timestamp('2024-02-01'))
+    assert store.get_coverage('ASML.AS') == [(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-15'))]
+
+def test_covered_range_makes_no_call(store, provider):
+    first = store.get_history('ASML.AS', '2024-01-01', '2024-03-01')
+    closes = store.get_close_frame(['ASML.AS'], '2024-01-01', '2024-03-01')
+    calls = len(provider.calls)
+
+    pd.testing.assert_frame_equal(store.get_history('ASML.AS', '2024-01-10', '2024-02-10'),
+                                  first[(first['Date'] >= '2024-01-10') & (first['Date'] < '2024-02-10')].reset_index(drop=True))
+    pd.testing.assert_frame_equal(store.get_close_frame(['ASML.AS'], '2024-01-01', '2024-03-01'), closes)
+    assert len(provider.calls) == calls == 1
+
+def test_close_frame_fetches_the_gaps_in_bulk(store, provider):
+    store.get_history('ASML.AS', '2024-01-01', '2024-02-01')
+    closes = store.get_close_frame(['ASML.AS', 'SAN.PA'], '2024-01-01', '2024-02-01')
+
+    assert provider.calls[-1] == (('SAN.PA',), pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'))
+    assert list(closes.columns) == ['ASML.AS', 'SAN.PA'] and closes.notna().all().all()
+
+def test_current_day_is_fetched_again(store, provider):
+    today = pd.Timestamp.today().normalize()
+    start, end = today - pd.Timedelta(days=10), today + pd.Timedelta(days=1)
+    store.get_history('ASML.AS', start, end)
+    assert store.get_coverage('ASML.AS') == [(start, today)]
+
+    store.get_history('ASML.AS', start, end)
+    assert provider.calls[-1] == ('ASML.AS', today, end)
+    assert len(provider.calls) == 2
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_new_dividend_refetches_older_prices(store, provider, bulk):
+    def closes(start, end):
+        if bulk:
+            return store.get_close_frame(['ASML.AS'], start, end)['ASML.AS']
+        return store.get_history('ASML.AS', start, end).set_index('Date')['Close']
+
+    closes('2024-01-01', '2024-02-01')
+    # A dividend in the new days : Yahoo Finance now returns the older closes on a new basis
+    provider.dividends = {pd.Timestamp('2024-02-06'): 2.0}
+    result = closes('2024-01-01', '2024-03-01')
+
+    expected = provider.history('ASML.AS', '2024-01-01', '2024-03-01')['Close']
+    expected = expected[expected.index < '2024-02-01']
+    np.testing.assert_allclose(result[result.index < '2024-02-01'].to_numpy(), expected.to_numpy())
+    # The tail, then the older range again
+    assert [call[1:] for call in provider.calls[1:]] == [(pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01')),
+                                                         (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'))]
+    assert store.get_coverage('ASML.AS') == [(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'))]
+
+    # Known dividend : nothing more is fetched
+    closes('2024-01-01', '2024-03-01')
+    assert len(provider.calls) == 3
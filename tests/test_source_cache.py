@@ -0,0 +1,87 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Parquet snapshots of the parsed DEGIRO exports (TransactionSnapshots) : reuse and invalidation
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import os
+from pathlib import Path
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions.Data_Fetching_Cleaning import read_degiro_export
+from functions.source_cache import TransactionSnapshots
+
+# (date, time, product, ISIN, exchange, quantity, price, fees, order ID)
+TRADES = [('02-01-2024', '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 100.0, -2.0, 'order-1'),
+          ('03-01-2024', '11:00', 'SOCIÉTÉ GÉNÉRALE', 'FR0000130809', 'EPA', 5, 25.1, -1.0, 'order-2'),
+          ('11-01-2024', '15:12', 'ASML HOLDING', 'NL0010273215', 'EAM', -4, 120.25, -2.9, 'order-3')]
+
+class CountingParser:
+    """
+    read_degiro_export, every parsed file recorded.
+    """
+
+    def __init__(self):
+        self.parsed = []
+
+    def __call__(self, path):
+        self.parsed.append(path)
+        return read_degiro_export(path)
+
+@pytest.fixture
+def export(tmp_path, write_degiro_export):
+    return str(write_degiro_export(tmp_path / 'Transactions.csv', TRADES))
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return TransactionSnapshots(str(tmp_path / 'cache'))
+
+def parquet_files(snapshots):
+    return sorted(name for name in os.listdir(snapshots.folder) if name.endswith('.parquet'))
+
+def test_snapshot_equals_a_fresh_parse(export, snapshots):
+    parse = CountingParser()
+    first = snapshots.load(export, parse)
+    # Read back from the Parquet file by a new process
+    second = TransactionSnapshots(snapshots.folder).load(export, parse)
+
+    assert parse.parsed == [export]
+    assert parquet_files(snapshots) == [f'{TransactionSnapshots.file_hash(export)}.parquet']
+    pd.testing.assert_frame_equal(second, read_degiro_export(export))
+    pd.testing.assert_frame_equal(first, second)
+
+def test_touched_file_reuses_its_snapshot(export, snapshots):
+    parse = CountingParser()
+    snapshots.load(export, parse)
+    # Same content, another mtime : hashed, not parsed
+    stat = os.stat(export)
+    os.utime(export, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    df = snapshots.load(export, parse)
+
+    assert parse.parsed == [export]
+    pd.testing.assert_frame_equal(df, read_degiro_export(export))
+
+def test_same_size_new_content_is_parsed_again(export, snapshots, write_degiro_export):
+    parse = CountingParser()
+    snapshots.load(export, parse)
+    old_snapshots = parquet_files(snapshots)
+    stat = os.stat(export)
+
+    # Another order ID of the same length : same size, another content
+    write_degiro_export(Path(export), TRADES[:2] + [TRADES[2][:8] + ('order-4',)])
+    os.utime(export, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(export).st_size == stat.st_size
+    df = snapshots.load(export, parse)
+
+    assert parse.parsed == [export, export]
+    assert df.iloc[2, 18] == 'order-4'
+    pd.testing.assert_frame_equal(df, read_degiro_export(export))
+    # The snapshot of the former content is removed
+    assert parquet_files(snapshots) == [f'{TransactionSnapshots.file_hash(export)}.parquet'] != old_snapshots
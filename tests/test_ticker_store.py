@@ -0,0 +1,101 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : SQLite export of the price histories (TickerStore) : bulk upsert and one transaction per export
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions.ticker_store import TickerStore
+
+def history(start, end):
+    days = pd.bdate_range(start, end, name='Date')
+    close = 100 + np.arange(len(days)) / 4
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000.0,
+                         'Dividends': 0.0, 'Stock Splits': 0.0}, index=days)
+
+def stored(db_path, query='SELECT Ticker, COUNT(*) FROM tickers_data GROUP BY Ticker'):
+    with closing(sqlite3.connect(db_path)) as conn:
+        return conn.execute(query).fetchall()
+
+class RecordingConnection:
+    """
+    Connection stand-in recording the SQL of each executemany, everything else passed to the connection.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.bulk = []
+
+    def executemany(self, sql, rows):
+        self.bulk.append(sql)
+        return self.conn.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'output' / 'tickers_data.db')
+
+def test_store_is_in_wal_mode(db_path):
+    with TickerStore(db_path) as store:
+        assert store.conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+
+    assert stored(db_path, 'PRAGMA journal_mode') == [('wal',)]
+
+def test_one_executemany_per_history(db_path):
+    with TickerStore(db_path) as store:
+        store.conn = RecordingConnection(store.conn)
+        assert store.write('ASML.AS', history('2024-01-01', '2024-01-31')) == 23
+        assert store.write('SAN.PA', history('2024-01-01', '2024-01-10')) == 8
+
+    assert len(store.conn.bulk) == 2
+    assert all(sql.startswith('INSERT OR IGNORE INTO tickers_data') for sql in store.conn.bulk)
+    assert stored(db_path) == [('ASML.AS', 23), ('SAN.PA', 8)]
+
+def test_writing_twice_adds_no_duplicate(db_path):
+    with TickerStore(db_path) as store:
+        store.write('ASML.AS', history('2024-01-01', '2024-01-31'))
+    # A later export overlapping the first : only the new dates are added, the stored ones are kept
+    newer = history('2024-01-15', '2024-02-09') + 1000
+    with TickerStore(db_path) as store:
+        assert store.write('ASML.AS', newer) == 7
+        assert store.write('ASML.AS', newer) == 0
+    assert store.rows == 7
+
+    assert stored(db_path) == [('ASML.AS', 30)]
+    assert stored(db_path, "SELECT MAX(Close) FROM tickers_data WHERE Date < '2024-02-01'") == [
+        (history('2024-01-01', '2024-01-31')['Close'].max(),)]
+
+def test_missing_values_are_null(db_path):
+    prices = history('2024-01-01', '2024-01-05')
+    prices.loc[prices.index[1], 'Volume'] = np.nan
+    with TickerStore(db_path) as store:
+        store.write('ASML.AS', prices)
+
+    assert stored(db_path, 'SELECT Date, Volume FROM tickers_data ORDER BY Date')[:3] == [
+        ('2024-01-01', 1000), ('2024-01-02', None), ('2024-01-03', 1000)]
+
+def test_failed_export_is_rolled_back(db_path):
+    with TickerStore(db_path) as store:
+        store.write('ASML.AS', history('2024-01-01', '2024-01-31'))
+
+    with pytest.raises(RuntimeError):
+        with TickerStore(db_path) as store:
+            store.write('SAN.PA', history('2024-01-01', '2024-01-31'))
+            store.write('ASML.AS', history('2024-02-01', '2024-02-29'))
+            raise RuntimeError("export interrupted")
+
+    # Nothing of the interrupted export is kept
+    assert stored(db_path) == [('ASML.AS', 23)]
@@ -0,0 +1,138 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : Reading of the DEGIRO exports and the transactions repeated across overlapping exports
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+# Const
+from Config.config import *
+
+# ----- From Files
+from functions import Data_Fetching_Cleaning
+from functions.Data_Fetching_Cleaning import (SampledFile, detect_delimiter, detect_file_encoding, drop_duplicate_transactions,
+                                             read_degiro_export)
+
+# (date, time, product, ISIN, exchange, quantity, price, fees, order ID)
+BUY_ASML = ('02-01-2024', '09:05', 'ASML HOLDING', 'NL0010273215', 'EAM', 10, 100.0, -2.0, 'order-1')
+# Two executions of one order, identical : two real trades
+PARTIAL_SANOFI = ('03-01-2024', '11:00', 'SANOFI', 'FR0000120578', 'EPA', 5, 50.1, -1.0, 'order-2')
+SELL_ASML = ('11-01-2024', '15:12', 'ASML HOLDING', 'NL0010273215', 'EAM', -4, 120.25, -2.9, 'order-3')
+BUY_SAP = ('06-02-2024', '13:30', 'SAP SE', 'DE0007164600', 'XET', 4, 160.0, -4.5, 'order-4')
+
+@pytest.fixture
+def read_exports(tmp_path, write_degiro_export):
+    """
+    Writes each list of trades as one export, then reads and concatenates them as create_dataset does.
+
+    Returns:
+        callable: `read_exports(*exports)` -> (transactions, export of each row).
+    """
+    def read_exports(*exports):
+        dfs = [read_degiro_export(str(write_degiro_export(tmp_path / f'export_{index}.csv', trades)))
+               for index, trades in enumerate(exports)]
+        for df in dfs[1:]:
+            df.columns = dfs[0].columns
+        return pd.concat(dfs, ignore_index=True), np.repeat(np.arange(len(dfs)), [len(df) for df in dfs])
+    return read_exports
+
+def order_ids(df):
+    return list(df.iloc[:, 18])
+
+def test_identical_rows_within_one_export_are_kept(read_exports):
+    df, file_ids = read_exports([BUY_ASML, PARTIAL_SANOFI, PARTIAL_SANOFI, SELL_ASML])
+    result, dropped = drop_duplicate_transactions(df, file_ids)
+
+    assert dropped == 0
+    pd.testing.assert_frame_equal(result, df)
+
+@pytest.mark.parametrize('first, second', [(2, 3), (3, 2), (2, 2), (1, 0)])
+def test_overlapping_exports_keep_the_most_repeated(read_exports, first, second):
+    # A trade n times in an export and m times in another is kept max(n, m) times
+    df, file_ids = read_exports([BUY_ASML] + [PARTIAL_SANOFI] * first, [PARTIAL_SANOFI] * second + [SELL_ASML])
+    result, dropped = drop_duplicate_transactions(df, file_ids)
+
+    assert order_ids(result).count('order-2') == max(first, second)
+    assert dropped == min(first, second)
+    assert order_ids(result) == ['order-1'] + ['order-2'] * first + ['order-2'] * max(second - first, 0) + ['order-3']
+
+def test_partially_overlapping_exports(read_exports):
+    # A yearly export, then a year-to-date one overlapping its last trades
+    yearly = [BUY_ASML, PARTIAL_SANOFI, PARTIAL_SANOFI, SELL_ASML]
+    year_to_date = [PARTIAL_SANOFI, PARTIAL_SANOFI, SELL_ASML, BUY_SAP]
+    df, file_ids = read_exports(yearly, year_to_date)
+    result, dropped = drop_duplicate_transactions(df, file_ids)
+
+    assert dropped == 3
+    expected, expected_ids = read_exports(yearly + [BUY_SAP])
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_same_order_different_execution_is_kept(read_exports):
+    # Same order ID, another price : another partial execution, not a duplicate
+    other_execution = PARTIAL_SANOFI[:6] + (50.2,) + PARTIAL_SANOFI[7:]
+    df, file_ids = read_exports([PARTIAL_SANOFI], [PARTIAL_SANOFI, other_execution])
+    result, dropped = drop_duplicate_transactions(df, file_ids)
+
+    assert dropped == 1
+    assert list(result.iloc[:, 7]) == [50.1, 50.2]
+
+def many_trades(count):
+    """
+    `count` trades of products with accented names, on consecutive days.
+    """
+    products = [('SOCIÉTÉ GÉNÉRALE', 'FR0000130809', 'EPA'), ("L'ORÉAL", 'FR0000120321', 'EPA'),
+                ('NESTLÉ', 'CH0038863350', 'SWX'), ('ASML HOLDING', 'NL0010273215', 'EAM')]
+    dates = pd.date_range('2015-01-01', periods=count, freq='D')
+    return [(date.strftime('%d-%m-%Y'), f'{9 + index % 8:02d}:{index % 60:02d}', *products[index % len(products)],
+             1 + index % 7, round(20 + index % 97 * 1.25, 2), -2.0, f'order-{index}')
+            for index, date in enumerate(dates)]
+
+def plain_read(path, delimiter, encoding):
+    """
+    The export read with its known delimiter and encoding, converted like read_degiro_export.
+    """
+    df = pd.read_csv(path, delimiter=delimiter, encoding=encoding)
+    df[df.columns[1]] = pd.to_timedelta(df.iloc[:, 1] + ':00')
+    df[df.columns[0]] = pd.to_datetime(df.iloc[:, 0], format='%d-%m-%Y')
+    return df
+
+@pytest.mark.parametrize('encoding, delimiter', [('latin-1', ';'), ('utf-8', ','), ('latin-1', ',')])
+def test_export_larger_than_the_sample(tmp_path, write_degiro_export, encoding, delimiter):
+    path = write_degiro_export(tmp_path / 'Transactions.csv', many_trades(3000), encoding, delimiter)
+    assert path.stat().st_size > 2 * SNIFF_SAMPLE_SIZE
+
+    pd.testing.assert_frame_equal(read_degiro_export(str(path)), plain_read(path, delimiter, encoding))
+
+def test_encoding_and_delimiter_of_the_sample(tmp_path, write_degiro_export):
+    path = write_degiro_export(tmp_path / 'Transactions.csv', many_trades(200), 'latin-1', ',')
+    sample = path.read_bytes()[:SNIFF_SAMPLE_SIZE]
+
+    assert detect_delimiter(sample, detect_file_encoding(sample)) == ','
+    assert 'SOCIÉTÉ GÉNÉRALE' in sample.decode(detect_file_encoding(sample))
+
+def test_sample_cut_in_a_character(tmp_path, write_degiro_export, monkeypatch):
+    # A sample ending inside a two-byte UTF-8 character : the sniffer ignores it, the parser gets the whole file
+    path = write_degiro_export(tmp_path / 'Transactions.csv', many_trades(50), 'utf-8', ';')
+    content = path.read_bytes()
+    cut = content.index('É'.encode('utf-8'), 2000) + 1
+    monkeypatch.setattr(Data_Fetching_Cleaning, 'SNIFF_SAMPLE_SIZE', cut)
+
+    pd.testing.assert_frame_equal(read_degiro_export(str(path)), plain_read(path, ';', 'utf-8'))
+
+def test_sampled_file_streams_the_whole_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(bytes(range(256)) * 1000)
+    with open(path, 'rb') as f:
+        sample = f.read(1000)
+        content = io.BufferedReader(SampledFile(sample, f), buffer_size=300).read()
+
+    assert content == path.read_bytes()
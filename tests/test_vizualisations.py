@@ -0,0 +1,129 @@
+# ----------------------------------------------------
+# -- Projet : DEGIRO_Analysis
+# -- Author : Ronaf
+# -- Created : 18/10/2026
+# -- Usage : The red/green value lines (plot_colored_segments) render like the former per-pair plot calls
+# --         (plot_segments_per_pair ; timings : Docs/benchmarks/colored_segments.py)
+# -- Update :
+# --
+# ----------------------------------------------------
+# ==============================================================================================================================
+# Imports
+# ==============================================================================================================================
+import io
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.colors import to_hex
+import numpy as np
+import pandas as pd
+import pytest
+
+# ----- From Files
+from functions import vizualisations
+
+def render(figures):
+    """
+    Renders figures without their legends, whose 'best' location no longer sees the value line (one collection
+    instead of Line2D segments).
+
+    Returns:
+        list: (PNG pixels, legend entries as (label, color)) per figure.
+    """
+    rendered = []
+    for fig in figures if isinstance(figures, list) else [figures]:
+        entries = []
+        for ax in fig.axes:
+            legend = ax.get_legend()
+            if legend is not None:
+                entries += [(text.get_text(), to_hex(handle.get_color()))
+                            for text, handle in zip(legend.get_texts(), legend.legend_handles)]
+                legend.remove()
+        png = io.BytesIO()
+        fig.savefig(png, format='png')
+        plt.close(fig)
+        rendered.append((plt.imread(io.BytesIO(png.getvalue())), entries))
+    return rendered
+
+def assert_same_rendering(chart, df, monkeypatch):
+    """
+    Draws a chart with plot_colored_segments, then with the former per-pair lines : same pixels, same legend.
+
+    Returns:
+        list: The legend entries of each figure.
+    """
+    after = render(getattr(vizualisations, chart)(df.copy()))
+    with monkeypatch.context() as patched:
+        patched.setattr(vizualisations, 'plot_colored_segments', vizualisations.plot_segments_per_pair)
+        before = render(getattr(vizualisations, chart)(df.copy()))
+
+    assert len(before) == len(after)
+    for (before_png, before_legend), (after_png, after_legend) in zip(before, after):
+        assert before_png.shape == after_png.shape
+        np.testing.assert_array_equal(before_png, after_png)
+        assert before_legend == after_legend
+    return [legend for png, legend in after]
+
+@pytest.fixture
+def grouped_df():
+    dates = pd.date_range('2024-01-01', periods=120, freq='D')
+    buying_value = np.linspace(1000, 5000, len(dates))
+    actual_value = buying_value * (1 + 0.1 * np.sin(np.arange(len(dates)) / 8))
+    df = pd.DataFrame({'Date': dates, 'Buying_value': buying_value, 'Actual_value': actual_value})
+    df['Value_diff'] = df['Actual_value'] - df['Buying_value']
+    df['Variation_%'] = df['Value_diff'] / df['Buying_value'] * 100
+    return df
+
+@pytest.fixture
+def instruments_df():
+    """
+    Daily rows of three instruments :
+    - ASML held on the whole range,
+    - Sanofi sold out for three weeks (no value : gap in the line), then bought back,
+    - SAP only on the last 40 days of the range (fewer rows than dates : no legend entry for its value).
+    """
+    dates = pd.date_range('2024-01-01', periods=120, freq='D')
+    wave = 1 + 0.1 * np.sin(np.arange(len(dates)) / 8)
+    asml = pd.DataFrame({'Date': dates, 'ISIN': 'NL0010273215', 'Products': 'ASML HOLDING',
+                         'Buying_value': np.linspace(1000, 3000, len(dates))})
+    asml['Actual_value'] = asml['Buying_value'] * wave
+    sanofi = pd.DataFrame({'Date': dates, 'ISIN': 'FR0000120578', 'Products': 'SANOFI',
+                           'Buying_value': np.where((dates >= '2024-02-01') & (dates < '2024-02-22'), 0.0, 800.0)})
+    sanofi['Actual_value'] = sanofi['Buying_value'] * wave[::-1]
+    sap = pd.DataFrame({'Date': dates[-40:], 'ISIN': 'DE0007164600', 'Products': 'SAP SE', 'Buying_value': 1500.0})
+    sap['Actual_value'] = sap['Buying_value'] * wave[-40:] * 0.95
+    return pd.concat([asml, sanofi, sap], ignore_index=True)
+
+@pytest.mark.parametrize('chart', ['plot_total_by_date', 'plot_total_pct_by_date', 'plot_total_var_by_date'])
+def test_segments_render_like_per_pair_lines(grouped_df, chart, monkeypatch):
+    legends = assert_same_rendering(chart, grouped_df, monkeypatch)
+    if chart == 'plot_total_by_date':
+        last_up = grouped_df['Actual_value'].iloc[-1] > grouped_df['Buying_value'].iloc[-1]
+        assert legends == [[('Product value', to_hex('green' if last_up else 'red')), ('Invested value', to_hex('blue'))]]
+
+def test_isin_values_render_like_per_pair_lines(instruments_df, monkeypatch):
+    legends = assert_same_rendering('plots_ISIN_by_date', instruments_df, monkeypatch)
+
+    # The value is a legend entry only for the instruments with a row on every date
+    assert [[label for label, color in legend] for legend in legends] == [
+        ['Product value', 'Invested value'], ['Product value', 'Invested value'], ['Invested value']]
+
+def test_sold_out_days_are_not_drawn(instruments_df):
+    figures = vizualisations.plots_ISIN_by_date(instruments_df)
+    ax = figures[1].axes[0]
+    segments = ax.collections[0].get_segments()
+    # The value as one collection, the invested value as the only line
+    assert len(ax.collections) == 1 and len(ax.lines) == 1
+    for fig in figures:
+        plt.close(fig)
+
+    # No segment of Sanofi touches the three weeks without value
+    gap_start, gap_end = mdates.date2num(pd.to_datetime(['2024-02-01', '2024-02-21']))
+    assert not any(((segment[:, 0] >= gap_start) & (segment[:, 0] <= gap_end)).any() for segment in segments)
+    assert len(segments) == 120 - 1 - 22
+
+def test_isin_variations_render_like_per_pair_lines(instruments_df, monkeypatch):
+    # Sold-out days : no invested value, the variation is not finite and the segments around it are not drawn
+    with np.errstate(divide='ignore', invalid='ignore'):
+        assert_same_rendering('plots_ISIN_pct_by_date', instruments_df, monkeypatch)